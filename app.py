@@ -1,18 +1,119 @@
 # app.py
+import contextlib
+import functools
+import logging
 import os
-import importlib
-from flask import Flask, render_template, request, redirect, url_for, session
+import shutil
+import time
+from flask import Flask, Request, Response, render_template, request, redirect, url_for, session, jsonify, abort, g, send_file
 from werkzeug.utils import secure_filename
-from pathlib import Path
 import secrets
+from core import profiling, telemetry
+from core.config import CI_KEY, BootstrapConfig, StreamingConfig
+from core.ground_truth import GT_CACHE, file_version
+from core.parallel import score_in_pool
+from core.registry import EvaluatorRegistry
+from core.scoring import (
+    compare_submissions, evaluator_for, ground_truth_path, prediction_schema, score_submission, scoring_mode,
+)
+from core.uploads import content_hash, open_prediction, source_size, spooled_upload_stream
+from services.jobs import JobQueue, JobQueueFull, raise_if_cancelled, side_effects
+from services.leaderboard import Leaderboard
+from services.profile_store import ProfileStore, is_valid_id
+from services.results_store import ResultsStore
+from services.score_memo import ScoreMemo
+
+class UploadRequest(Request):
+    """Keeps uploaded files in memory unless they exceed UPLOAD_SPOOL_MAX_BYTES."""
+
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return spooled_upload_stream(app.config['UPLOAD_SPOOL_MAX_BYTES'])
 
 # App Configuration
 app = Flask(__name__)
-app.secret_key = secrets.token_hex(16)
-app.config['UPLOADS_DIR'] = 'uploads'
+app.request_class = UploadRequest
+app.secret_key = os.environ.get('SECRET_KEY') or secrets.token_hex(16)
 app.config['COMPETITIONS_DIR'] = 'competitions'
 app.config['EVALUATORS_DIR'] = 'evaluators'
-os.makedirs(app.config['UPLOADS_DIR'], exist_ok=True)
+app.config['GT_CACHE_MAX_BYTES'] = int(os.environ.get('GT_CACHE_MAX_BYTES', 256 * 1024 * 1024))
+app.config['UPLOAD_SPOOL_MAX_BYTES'] = int(os.environ.get('UPLOAD_SPOOL_MAX_BYTES', 32 * 1024 * 1024))
+# gzip, zstd and zip uploads are rejected once they decompress past this size
+app.config['UPLOAD_MAX_DECOMPRESSED_BYTES'] = int(os.environ.get('UPLOAD_MAX_DECOMPRESSED_BYTES', 1024 * 1024 * 1024))
+app.config['JOB_WORKERS'] = int(os.environ.get('JOB_WORKERS', 2))
+app.config['JOB_QUEUE_SIZE'] = int(os.environ.get('JOB_QUEUE_SIZE', 16))
+app.config['JOB_TIMEOUT_SECONDS'] = float(os.environ.get('JOB_TIMEOUT_SECONDS', 120))
+# Multi-file uploads are scored on this many processes; 1 disables the pool
+app.config['EVAL_PROCESSES'] = int(os.environ.get('EVAL_PROCESSES', os.cpu_count() or 1))
+app.config['RESULTS_DB'] = os.environ.get('RESULTS_DB', os.path.join(app.instance_path, 'results.sqlite3'))
+app.config['RESULTS_PER_PAGE'] = int(os.environ.get('RESULTS_PER_PAGE', 10))
+app.config['LEADERBOARD_DB'] = os.environ.get('LEADERBOARD_DB', os.path.join(app.instance_path, 'leaderboard.sqlite3'))
+app.config['LEADERBOARD_PAGE_SIZE'] = int(os.environ.get('LEADERBOARD_PAGE_SIZE', 20))
+app.config['SCORE_MEMO_MAX_ENTRIES'] = int(os.environ.get('SCORE_MEMO_MAX_ENTRIES', 4096))
+app.config['SCORE_MEMO_MAX_BYTES'] = int(os.environ.get('SCORE_MEMO_MAX_BYTES', 16 * 1024 * 1024))
+# Bootstrap confidence intervals, computed when the upload form asks for them
+app.config['BOOTSTRAP_RESAMPLES'] = int(os.environ.get('BOOTSTRAP_RESAMPLES', 1000))
+app.config['BOOTSTRAP_SEED'] = int(os.environ.get('BOOTSTRAP_SEED', 0))
+app.config['BOOTSTRAP_TIME_BUDGET_SECONDS'] = float(os.environ.get('BOOTSTRAP_TIME_BUDGET_SECONDS', 2.0))
+app.config['BOOTSTRAP_CONFIDENCE'] = float(os.environ.get('BOOTSTRAP_CONFIDENCE', 0.95))
+# /api/compare shares its resamples between every submission and may spend longer drawing them
+app.config['COMPARE_TIME_BUDGET_SECONDS'] = float(os.environ.get('COMPARE_TIME_BUDGET_SECONDS', 10.0))
+# Predictions of at least this size are scored in chunks so memory stays flat
+app.config['STREAMING_MIN_BYTES'] = int(os.environ.get('STREAMING_MIN_BYTES', 64 * 1024 * 1024))
+app.config['STREAMING_CHUNK_ROWS'] = int(os.environ.get('STREAMING_CHUNK_ROWS', 100_000))
+# Evaluators are imported once per worker: 'background' (while serving), 'blocking' (during import) or 'off' (on first use)
+app.config['EVALUATOR_PRELOAD'] = os.environ.get('EVALUATOR_PRELOAD', 'background')
+# Also load every ground truth into the cache during the preload
+app.config['PRELOAD_GROUND_TRUTH'] = os.environ.get('PRELOAD_GROUND_TRUTH', '0') == '1'
+# One JSON log line per scored file is written at INFO
+app.config['LOG_LEVEL'] = os.environ.get('LOG_LEVEL', 'WARNING')
+# Profiling is only possible when PROFILE_TOKEN is set: a request that sends it in X-Profile-Token
+# (or ?profile_token=) and asks for X-Profile: sample|cprofile (or ?profile=) is profiled
+app.config['PROFILE_TOKEN'] = os.environ.get('PROFILE_TOKEN', '')
+app.config['PROFILE_DIR'] = os.environ.get('PROFILE_DIR', os.path.join(app.instance_path, 'profiles'))
+app.config['PROFILE_KEEP'] = int(os.environ.get('PROFILE_KEEP', 50))
+os.makedirs(os.path.dirname(app.config['RESULTS_DB']) or '.', exist_ok=True)
+os.makedirs(os.path.dirname(app.config['LEADERBOARD_DB']) or '.', exist_ok=True)
+
+logging.basicConfig(level=app.config['LOG_LEVEL'].upper())
+
+# Ground truth files are parsed once per process and shared by every request
+GT_CACHE.max_bytes = app.config['GT_CACHE_MAX_BYTES']
+
+# Background evaluation jobs submitted through /jobs
+job_queue = JobQueue(
+    workers=app.config['JOB_WORKERS'],
+    max_pending=app.config['JOB_QUEUE_SIZE'],
+    timeout=app.config['JOB_TIMEOUT_SECONDS'],
+)
+
+# Scores are kept server-side; the session cookie only carries an id
+results_store = ResultsStore(app.config['RESULTS_DB'])
+
+def metric_direction_for(competition_name, metric):
+    """The score direction declared by the competition's evaluator spec, if any."""
+    try:
+        spec = evaluator_for(app.config['EVALUATORS_DIR'], competition_name).SPEC
+    except (ImportError, AttributeError):
+        return None
+    return spec.directions().get(metric)
+
+# Every scored submission is ranked per competition and metric
+leaderboard = Leaderboard(app.config['LEADERBOARD_DB'], direction_for=metric_direction_for)
+
+streaming_config = StreamingConfig(
+    chunk_rows=app.config['STREAMING_CHUNK_ROWS'],
+    min_bytes=app.config['STREAMING_MIN_BYTES'],
+)
+
+# Scores of byte-identical re-uploads, keyed by content hash
+score_memo = ScoreMemo(app.config['SCORE_MEMO_MAX_ENTRIES'], app.config['SCORE_MEMO_MAX_BYTES'])
+
+# Cache counters are read when /metrics is scraped
+telemetry.REGISTRY.add_collector(lambda: telemetry.cache_samples('ground_truth_cache', GT_CACHE.stats()))
+telemetry.REGISTRY.add_collector(lambda: telemetry.cache_samples('score_memo', score_memo.stats()))
+
+# Stored profiles of requests an admin asked to profile
+profile_store = ProfileStore(app.config['PROFILE_DIR'], app.config['PROFILE_KEEP']) if app.config['PROFILE_TOKEN'] else None
 
 # Custom sort order for competitions
 CUSTOM_ORDER = [
@@ -43,69 +144,440 @@ def get_competitions():
     except FileNotFoundError:
         return []
 
+def session_id(create=False):
+    """Returns the id keying this browser's stored results, creating one if asked."""
+    if 'sid' not in session and create:
+        session['sid'] = secrets.token_urlsafe(16)
+    return session.get('sid')
+
+@app.before_request
+def start_request_timer():
+    g.request_started = time.perf_counter()
+
+@app.after_request
+def observe_request_latency(response):
+    started = g.pop('request_started', None)
+    if started is not None:
+        telemetry.REGISTRY.observe(
+            'http_request_seconds', time.perf_counter() - started,
+            endpoint=request.endpoint or 'unknown', method=request.method, status=response.status_code,
+        )
+    return response
+
+def is_profile_admin():
+    token = app.config['PROFILE_TOKEN']
+    given = request.headers.get('X-Profile-Token') or request.args.get('profile_token') or ''
+    return bool(token) and secrets.compare_digest(given.encode(), token.encode())
+
+def requested_profile_mode():
+    """'sample' or 'cprofile' if an admin asked for this request to be profiled, else None."""
+    mode = request.headers.get('X-Profile') or request.args.get('profile')
+    if not mode or not is_profile_admin():
+        return None
+    return mode if mode in profiling.MODES else 'cprofile'
+
+def profile_id():
+    """The request's X-Request-ID when it can name a profile, else a new id."""
+    given = request.headers.get('X-Request-ID')
+    return given if is_valid_id(given) else secrets.token_hex(8)
+
+def profile_details():
+    competition = (request.view_args or {}).get('competition_name') or request.form.get('competition_name')
+    return {"method": request.method, "path": request.path, "endpoint": request.endpoint, "competition": competition}
+
+def start_profile():
+    mode = requested_profile_mode()
+    # Jobs are profiled in the thread that runs them; see submit_job
+    if mode is None or request.endpoint in ('submit_job', 'profiles_page', 'profile_file'):
+        return
+    g.profile_stack = contextlib.ExitStack()
+    g.profile = g.profile_stack.enter_context(profiling.profile(mode))
+
+def finish_profile(response):
+    stack = g.pop('profile_stack', None)
+    if stack is not None:
+        stack.close()
+        meta = profile_store.save(profile_id(), g.profile, status=response.status_code, **profile_details())
+        response.headers['X-Profile-Id'] = meta['id']
+    return response
+
+def abandon_profile(error):
+    stack = g.pop('profile_stack', None)
+    if stack is not None:
+        stack.close()
+
+# Registered only when profiling is enabled, so otherwise requests do no profiling work at all
+if profile_store is not None:
+    app.before_request(start_profile)
+    app.after_request(finish_profile)
+    app.teardown_request(abandon_profile)
+
 @app.route('/')
 def index():
     """Displays the main page with a list of competitions."""
     competitions_list = get_competitions()
-    results = session.get('results', {})
-    return render_template('index.html', competitions=competitions_list, results=results)
+    page = max(request.args.get('page', 0, type=int), 0)
+    results, has_older = {}, False
+    if session_id():
+        results, has_older = results_store.page(session_id(), page, app.config['RESULTS_PER_PAGE'])
+    return render_template('index.html', competitions=competitions_list, results=results, page=page, has_older=has_older)
+
+def read_upload_form():
+    """Returns the competition name and uploaded files of an evaluation form, or raises ValueError."""
+    # The first form access receives and spools the whole upload
+    with telemetry.span('receive_upload'):
+        competition_name = request.form.get('competition_name')
+    if not competition_name:
+        raise ValueError("No competition name provided.")
+    if competition_name not in get_competitions():
+        raise ValueError(f"Unknown competition '{competition_name}'.")
+
+    files = request.files.getlist('files[]')
+    if not files or files[0].filename == '':
+        raise ValueError("Please select one or more files to upload.")
+    return competition_name, files
+
+def bootstrap_config():
+    """The confidence interval settings if the form asked for intervals, else None."""
+    if not request.form.get('confidence_intervals'):
+        return None
+    return BootstrapConfig(
+        n_resamples=app.config['BOOTSTRAP_RESAMPLES'],
+        seed=app.config['BOOTSTRAP_SEED'],
+        time_budget=app.config['BOOTSTRAP_TIME_BUDGET_SECONDS'],
+        confidence=app.config['BOOTSTRAP_CONFIDENCE'],
+    )
+
+def cut_short(scores, bootstrap):
+    """Whether the time budget stopped the bootstrap before all of its resamples; such scores are not memoized."""
+    if bootstrap is None or CI_KEY not in scores:
+        return False
+    return scores[CI_KEY]['n_resamples'] < bootstrap.n_resamples
+
+def score_uploads(competition_name, uploads, bootstrap=None):
+    """Scores (filename, stream) pairs and returns one result dict per file, in upload order."""
+    competitions_dir, evaluators_package = app.config['COMPETITIONS_DIR'], app.config['EVALUATORS_DIR']
+    gt_version = file_version(ground_truth_path(competitions_dir, competition_name))
+
+    # Byte-identical re-uploads are answered from the memo without being parsed
+    outcomes = [None] * len(uploads)
+    memo_keys = [None] * len(uploads)
+    duplicates = {}
+    first_pending = {}
+    for i, (_, stream) in enumerate(uploads):
+        digest = content_hash(stream)
+        if digest is None:
+            continue
+        # Streamed and whole-file scores differ slightly (histogram AUCs), so the mode is part of the key
+        try:
+            mode = scoring_mode(
+                open_prediction(stream, app.config['UPLOAD_MAX_DECOMPRESSED_BYTES']), bootstrap, streaming_config
+            )
+        except ValueError as e:
+            # An unreadable archive fails this file alone; the others are still scored
+            outcomes[i] = ('error', str(e))
+            stream.close()
+            continue
+        memo_keys[i] = (competition_name, gt_version, digest, mode, bootstrap)
+        if memo_keys[i] in first_pending:
+            # Same bytes uploaded twice in one request: score the first copy only
+            duplicates[i] = first_pending[memo_keys[i]]
+            stream.close()
+            continue
+        cached = score_memo.get(memo_keys[i])
+        if cached is not None:
+            outcomes[i] = ('scores', cached)
+            stream.close()
+        else:
+            first_pending[memo_keys[i]] = i
+    pending = [i for i, outcome in enumerate(outcomes) if outcome is None and i not in duplicates]
+
+    # Small uploads are sent to the pool as bytes. Anything spilled to disk or large enough to
+    # stream is scored here instead, so it is never read whole into memory. A profiled request
+    # scores in this thread, where the profiler can see it.
+    pooled = []
+    if len(pending) > 1 and app.config['EVAL_PROCESSES'] > 1 and not profiling.active():
+        pool_limit = min(app.config['UPLOAD_SPOOL_MAX_BYTES'], streaming_config.min_bytes)
+        pooled = [i for i in pending if (source_size(uploads[i][1]) or pool_limit) < pool_limit]
+    if len(pooled) < 2:
+        pooled = []
+
+    scored = {}
+    if pooled:
+        payloads = []
+        for i in pooled:
+            stream = uploads[i][1]
+            stream.seek(0)
+            payloads.append(stream.read())
+            stream.close()
+        scored.update(zip(pooled, score_in_pool(
+            competitions_dir, evaluators_package, competition_name, payloads, app.config['EVAL_PROCESSES'],
+            bootstrap, streaming_config, app.config['UPLOAD_MAX_DECOMPRESSED_BYTES'],
+        )))
+    for i in pending:
+        if i in scored:
+            continue
+        # A queued job that has timed out stops here instead of scoring the rest
+        raise_if_cancelled()
+        stream = uploads[i][1]
+        try:
+            scored[i] = ('scores', score_submission(
+                competitions_dir, evaluators_package, competition_name, stream, bootstrap, streaming_config,
+                app.config['UPLOAD_MAX_DECOMPRESSED_BYTES'],
+            ))
+        except Exception as e:
+            scored[i] = ('error', str(e))
+        finally:
+            stream.close()
+
+    for i, outcome in scored.items():
+        outcomes[i] = outcome
+        if outcome[0] == 'scores' and memo_keys[i] is not None and not cut_short(outcome[1], bootstrap):
+            score_memo.put(memo_keys[i], outcome[1])
+    for i, original in duplicates.items():
+        outcomes[i] = outcomes[original]
+
+    results = []
+    for (filename, _), (kind, value) in zip(uploads, outcomes):
+        if kind == 'scores':
+            results.append({"scores": value, "filename": filename})
+        else:
+            results.append({"error": f"An error occurred while processing the file: {value}", "filename": filename})
+    return results
+
+def score_and_store(sid, competition_name, uploads, bootstrap=None):
+    """Scores the uploads and records the results for the given session."""
+    results = score_uploads(competition_name, uploads, bootstrap)
+    # Nothing is stored for a job that timed out while scoring
+    with side_effects(), telemetry.span('store_results', competition=competition_name):
+        for result in results:
+            if 'scores' in result:
+                result['submission_id'] = leaderboard.record(competition_name, result['filename'], result['scores'], sid)
+        results_store.add(sid, competition_name, results)
+    return results
 
 @app.route('/evaluate', methods=['POST'])
 def evaluate():
     """Handles the evaluation for a specific competition."""
-    if 'results' not in session:
-        session['results'] = {}
-
-    competitions_list = get_competitions()
-    
     try:
-        competition_name = request.form.get('competition_name')
-        if not competition_name:
-            raise ValueError("No competition name provided.")
-            
-        files = request.files.getlist('files[]')
-        if not files or files[0].filename == '':
-            raise ValueError("Please select one or more files to upload.")
-        
-        if competition_name not in session['results']:
-            session['results'][competition_name] = []
-
-        for file in files:
-            filename = secure_filename(file.filename)
-            upload_path = Path(app.config['UPLOADS_DIR']) / f"{competition_name}_{filename}"
-            
-            try:
-                file.save(upload_path)
-                ground_truth_path = Path(app.config['COMPETITIONS_DIR']) / competition_name / 'test_ground_truth.csv'
-                
-                evaluator_module = importlib.import_module(f"{app.config['EVALUATORS_DIR']}.{competition_name}")
-                
-                df_gt, df_pred = evaluator_module.validate_and_read_inputs(ground_truth_path, upload_path)
-                scores = evaluator_module.evaluate_predictions(df_gt, df_pred)
-                
-                session['results'][competition_name].append({"scores": scores, "filename": filename})
-
-            except Exception as e:
-                session['results'][competition_name].append({"error": f"An error occurred while processing the file: {str(e)}", "filename": filename})
-            
-            finally:
-                if os.path.exists(upload_path):
-                    os.remove(upload_path)
+        competition_name, files = read_upload_form()
+
+        # Evaluate straight from the upload buffers; nothing is written to disk
+        uploads = [(secure_filename(file.filename), file.stream) for file in files]
+        score_and_store(session_id(create=True), competition_name, uploads, bootstrap_config())
 
     except Exception as e:
         # This will catch errors like no competition name or no files selected
         # We can't associate it with a specific competition, so maybe add a general error display area
         pass
 
-    session.modified = True
     return redirect(url_for('index'))
 
 
+@app.route('/jobs', methods=['POST'])
+def submit_job():
+    """Queues an evaluation and returns its job id immediately (202 Accepted)."""
+    try:
+        competition_name, files = read_upload_form()
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    # The request's own buffers are closed when it ends, so the job gets copies.
+    uploads = []
+    for file in files:
+        buffer = spooled_upload_stream(app.config['UPLOAD_SPOOL_MAX_BYTES'])
+        shutil.copyfileobj(file.stream, buffer)
+        uploads.append((secure_filename(file.filename), buffer))
+
+    job, profiled_as = score_and_store, None
+    mode = requested_profile_mode()
+    if mode is not None:
+        profiled_as = profile_id()
+        job = functools.partial(profile_store.run, profiled_as, mode, score_and_store, **profile_details())
+
+    try:
+        job_id = job_queue.submit(
+            job, session_id(create=True), competition_name, uploads, bootstrap_config(),
+            competition=competition_name, filenames=[filename for filename, _ in uploads],
+        )
+    except JobQueueFull as e:
+        for _, buffer in uploads:
+            buffer.close()
+        response = jsonify({"error": str(e)})
+        response.headers['Retry-After'] = '5'
+        return response, 503
+
+    body = {"job_id": job_id, "status_url": url_for('job_status', job_id=job_id)}
+    if profiled_as is not None:
+        body["profile_id"] = profiled_as
+    return jsonify(body), 202
+
+
+@app.route('/jobs/<job_id>')
+def job_status(job_id):
+    """Reports a job's status and, once finished, its per-file results."""
+    job = job_queue.get(job_id)
+    if job is None:
+        return jsonify({"error": f"Unknown job '{job_id}'."}), 404
+    return jsonify(job)
+
+
+def leaderboard_view(competition_name):
+    """Collects one page of a competition's leaderboard from the query string."""
+    if competition_name not in get_competitions():
+        abort(404)
+    metrics = leaderboard.metrics(competition_name)
+    metric = request.args.get('metric')
+    if metric not in metrics:
+        metric = next(iter(metrics), None)
+    k = min(max(request.args.get('k', app.config['LEADERBOARD_PAGE_SIZE'], type=int), 1), 500)
+    offset = max(request.args.get('offset', 0, type=int), 0)
+    total, entries = leaderboard.top(competition_name, metric, k, offset) if metric else (0, [])
+    return {
+        "competition": competition_name,
+        "metric": metric,
+        "direction": metrics.get(metric),
+        "metrics": metrics,
+        "total": total,
+        "offset": offset,
+        "k": k,
+        "entries": entries,
+    }
+
+
+@app.route('/leaderboard/<competition_name>')
+def leaderboard_page(competition_name):
+    """Displays the ranked submissions of one competition."""
+    return render_template('leaderboard.html', board=leaderboard_view(competition_name))
+
+
+@app.route('/api/leaderboard/<competition_name>')
+def leaderboard_api(competition_name):
+    """Top-k submissions for one metric, e.g. /api/leaderboard/pet_finder?metric=accuracy&k=10."""
+    return jsonify(leaderboard_view(competition_name))
+
+
+@app.route('/api/leaderboard/<competition_name>/submissions/<int:submission_id>')
+def submission_rank(competition_name, submission_id):
+    """The rank of one submission on every metric it was scored on."""
+    if competition_name not in get_competitions():
+        abort(404)
+    ranks = leaderboard.rank(competition_name, submission_id)
+    if not ranks:
+        return jsonify({"error": f"Unknown submission {submission_id}."}), 404
+    return jsonify({"competition": competition_name, "submission_id": submission_id, "ranks": ranks})
+
+
+@app.route('/api/compare', methods=['POST'])
+def compare_api():
+    """
+    Compares two or more uploads to one competition: for every ranked metric,
+    matrices of paired deltas with bootstrap intervals and p-values, plus
+    McNemar's test for accuracy. Entry [i][j] compares file j with file i.
+    """
+    try:
+        competition_name, files = read_upload_form()
+        if len(files) < 2:
+            raise ValueError("Please select at least two files to compare.")
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+
+    sources = {}
+    for file in files:
+        name = base = secure_filename(file.filename)
+        # Keep files uploaded under the same name apart
+        copy = 1
+        while name in sources:
+            copy += 1
+            name = f"{base} ({copy})"
+        sources[name] = file.stream
+    config = BootstrapConfig(
+        n_resamples=app.config['BOOTSTRAP_RESAMPLES'],
+        seed=app.config['BOOTSTRAP_SEED'],
+        time_budget=app.config['COMPARE_TIME_BUDGET_SECONDS'],
+        confidence=app.config['BOOTSTRAP_CONFIDENCE'],
+    )
+    try:
+        comparison = compare_submissions(
+            app.config['COMPETITIONS_DIR'], app.config['EVALUATORS_DIR'], competition_name, sources, config,
+            app.config['UPLOAD_MAX_DECOMPRESSED_BYTES'],
+        )
+    except ValueError as e:
+        return jsonify({"error": str(e)}), 400
+    return jsonify({"competition": competition_name, **comparison})
+
+
+@app.route('/api/schema/<competition_name>')
+def schema_api(competition_name):
+    """The columns and exact dtypes a prediction file is parsed with."""
+    if competition_name not in get_competitions():
+        abort(404)
+    schema = prediction_schema(app.config['COMPETITIONS_DIR'], app.config['EVALUATORS_DIR'], competition_name)
+    strict = evaluator_for(app.config['EVALUATORS_DIR'], competition_name).SPEC.strict_columns
+    return jsonify({"competition": competition_name, "columns": schema.describe(), "strict_columns": strict})
+
+
+@app.route('/healthz')
+def healthz():
+    """
+    Liveness and evaluator preload progress. With ?ready=1 it answers 503
+    until every evaluator has been loaded without errors.
+    """
+    pending = app.config['EVALUATOR_PRELOAD'] != 'off' and not evaluator_registry.ready()
+    status = 503 if pending and request.args.get('ready') else 200
+    return jsonify({"status": "starting" if pending else "ok", "evaluators": evaluator_registry.report()}), status
+
+
+@app.route('/api/cache_stats')
+def cache_stats():
+    """Hit/miss counters for the ground truth cache and the score memo."""
+    return jsonify({"ground_truth": GT_CACHE.stats(), "score_memo": score_memo.stats()})
+
+
+@app.route('/metrics')
+def metrics():
+    """Stage latencies, throughput, memory and cache counters in the Prometheus text format."""
+    return Response(telemetry.REGISTRY.render(), mimetype='text/plain; version=0.0.4')
+
+
+@app.route('/admin/profiles')
+def profiles_page():
+    """Lists the most recent stored profiles (admins only)."""
+    if not is_profile_admin():
+        abort(404)
+    profiles = profile_store.recent(app.config['PROFILE_KEEP'])
+    for profile in profiles:
+        profile['created'] = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(profile['created_at']))
+    return render_template('profiles.html', profiles=profiles, token=request.args.get('profile_token'))
+
+
+@app.route('/admin/profiles/<profile_id>.<kind>')
+def profile_file(profile_id, kind):
+    """Downloads a stored profile's pstats or collapsed-stack file (admins only)."""
+    if not is_profile_admin():
+        abort(404)
+    path = profile_store.path(profile_id, kind)
+    if path is None:
+        abort(404)
+    return send_file(path, as_attachment=True, download_name=path.name)
+
+
 @app.route('/clear_results')
 def clear_results():
+    if session_id():
+        results_store.clear(session_id())
+    # Results stored in the cookie by older versions of the app
     session.pop('results', None)
     return redirect(url_for('index'))
 
 
+# Built last, once every route exists; see core.registry
+evaluator_registry = EvaluatorRegistry(app.config['EVALUATORS_DIR'], app.config['COMPETITIONS_DIR'])
+if app.config['EVALUATOR_PRELOAD'] == 'background':
+    evaluator_registry.start(get_competitions(), app.config['PRELOAD_GROUND_TRUTH'])
+elif app.config['EVALUATOR_PRELOAD'] == 'blocking':
+    evaluator_registry.load(get_competitions(), app.config['PRELOAD_GROUND_TRUTH'])
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
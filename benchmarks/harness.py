@@ -0,0 +1,300 @@
+"""
+Benchmark harness for the evaluators.
+
+For every competition it builds a synthetic ground truth and a shuffled,
+schema-matching prediction file at several multiples of the real row count,
+then times each stage of scoring separately: ground truth load (cold and
+warm), the cached ground truth lookup while reading inputs, prediction
+parsing, id alignment and every metric call. Each case runs in a fresh
+process so its peak RSS can be reported.
+
+    python -m benchmarks.harness --scales 1 10 100 --output-dir bench_results
+    python -m benchmarks.harness --baseline bench_results/baseline.json
+
+The report is written as JSON and markdown. With --baseline, stages that
+got slower than --threshold times the baseline are listed and the exit
+status is 1. --save-baseline copies the new report to a baseline path.
+"""
+import argparse
+import functools
+import importlib
+import json
+import multiprocessing
+import os
+import platform
+import resource
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+REPO_ROOT = Path(__file__).resolve().parent.parent
+GROUND_TRUTH_FILENAME = 'test_ground_truth.csv'
+
+# A stage only counts as a regression if it is also this much slower in absolute terms.
+MIN_REGRESSION_SECONDS = 0.005
+
+
+def synthesize(ground_truth_path, scale, seed=0):
+    """
+    Returns (ground_truth, prediction) DataFrames with `scale` times the rows of
+    the real ground truth. The first column is the id; the prediction is shuffled.
+    """
+    rng = np.random.default_rng(seed)
+    gt = pd.read_csv(ground_truth_path, dtype=str, keep_default_na=False)
+    id_column = gt.columns[0]
+    gt = pd.read_csv(ground_truth_path, dtype={c: str for c in gt.columns if gt[c].str.contains(' ').any()})
+
+    copies = []
+    for k in range(scale):
+        copy = gt.copy()
+        if k:
+            ids = copy[id_column]
+            if pd.api.types.is_integer_dtype(ids):
+                copy[id_column] = ids + k * (int(ids.max()) + 1)
+            else:
+                copy[id_column] = ids.astype(str) + f"_{k}"
+        copies.append(copy)
+    gt = pd.concat(copies, ignore_index=True)
+
+    pred = gt.copy()
+    probability_columns = []
+    for column in gt.columns:
+        if column == id_column:
+            continue
+        values = gt[column]
+        if not pd.api.types.is_numeric_dtype(values):
+            pred[column] = rng.choice(values.dropna().unique(), len(gt))
+        elif set(np.unique(values)) <= {0, 1}:
+            probability_columns.append(column)
+        elif pd.api.types.is_integer_dtype(values):
+            pred[column] = rng.choice(np.unique(values), len(gt))
+        else:
+            pred[column] = values * rng.lognormal(0, 0.2, len(gt))
+
+    if probability_columns:
+        truth = gt[probability_columns].to_numpy(dtype=float)
+        noisy = rng.random(truth.shape) + truth * 0.7
+        if len(probability_columns) > 1 and np.allclose(truth.sum(axis=1), 1):
+            noisy /= noisy.sum(axis=1, keepdims=True)
+        else:
+            noisy = np.clip(noisy / 1.7, 0, 1)
+        pred[probability_columns] = noisy
+
+    pred = pred.sample(frac=1, random_state=seed).reset_index(drop=True)
+    return gt, pred
+
+
+class StageTimer:
+    """Accumulates wall-clock seconds per named stage."""
+
+    def __init__(self):
+        self.seconds = {}
+
+    def add(self, stage, elapsed):
+        self.seconds[stage] = self.seconds.get(stage, 0.0) + elapsed
+
+    def wrap(self, stage, func):
+        @functools.wraps(func)
+        def timed(*args, **kwargs):
+            start = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                self.add(stage, time.perf_counter() - start)
+        return timed
+
+    def time(self, stage, func, *args, **kwargs):
+        return self.wrap(stage, func)(*args, **kwargs)
+
+
+def _instrument(timer):
+    """
+    Swaps the engine's metric functions, alignment step and ground truth
+    lookup for timed wrappers, so each one is reported as its own stage.
+    Returns a callable that restores the originals.
+    """
+    from core import engine
+
+    original_metrics = dict(engine.METRICS)
+    original_align = engine.align_frames
+    original_read_ground_truth = engine.read_ground_truth
+    for name, metric in original_metrics.items():
+        engine.METRICS[name] = engine.Metric(timer.wrap(f"metric:{name}", metric.func), metric.direction)
+    engine.align_frames = timer.wrap('alignment', original_align)
+    engine.read_ground_truth = timer.wrap('ground_truth_lookup', original_read_ground_truth)
+
+    def restore():
+        engine.METRICS.update(original_metrics)
+        engine.align_frames = original_align
+        engine.read_ground_truth = original_read_ground_truth
+    return restore
+
+
+def run_case(competition, scale, repeat, workdir):
+    """Benchmarks one (competition, scale) pair. Meant to run in a fresh process."""
+    sys.path.insert(0, str(REPO_ROOT))
+    os.chdir(REPO_ROOT)
+    rss_start_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    evaluator_module = importlib.import_module(f"evaluators.{competition}")
+
+    gt, pred = synthesize(REPO_ROOT / 'competitions' / competition / GROUND_TRUTH_FILENAME, scale)
+    case_dir = Path(workdir) / f"x{scale}" / competition
+    case_dir.mkdir(parents=True)
+    ground_truth_path = case_dir / GROUND_TRUTH_FILENAME
+    prediction_path = case_dir / 'prediction.csv'
+    gt.to_csv(ground_truth_path, index=False)
+    pred.to_csv(prediction_path, index=False)
+    del gt, pred
+
+    samples = []
+    cold = StageTimer()
+    cold.time('ground_truth_load_cold', evaluator_module.read_ground_truth, ground_truth_path)
+    for _ in range(repeat):
+        timer = StageTimer()
+        timer.time('ground_truth_load_warm', evaluator_module.read_ground_truth, ground_truth_path)
+        restore = _instrument(timer)
+        try:
+            df_gt, df_pred = timer.time('parse', evaluator_module.validate_and_read_inputs, ground_truth_path, prediction_path)
+            # Reading the inputs also looks up the (now cached) ground truth; parse is the prediction alone.
+            timer.add('parse', -timer.seconds.get('ground_truth_lookup', 0.0))
+            timer.time('evaluate_total', evaluator_module.evaluate_predictions, df_gt, df_pred)
+        finally:
+            restore()
+        samples.append(timer.seconds)
+
+    stages = {stage: statistics.median(sample.get(stage, 0.0) for sample in samples) for stage in samples[0]}
+    stages.update(cold.seconds)
+    peak_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return {
+        'competition': competition,
+        'scale': scale,
+        'rows': len(evaluator_module.read_ground_truth(ground_truth_path)),
+        'prediction_bytes': prediction_path.stat().st_size,
+        'stages': stages,
+        'peak_rss_mb': peak_rss_kb / 1024,
+        'peak_rss_delta_mb': (peak_rss_kb - rss_start_kb) / 1024,
+    }
+
+
+def _run_case_in_subprocess(args):
+    competition, scale, repeat, workdir = args
+    try:
+        return run_case(competition, scale, repeat, workdir)
+    except Exception as e:
+        return {'competition': competition, 'scale': scale, 'error': str(e)}
+
+
+def compare(report, baseline, threshold):
+    """Lists the stages whose median time grew by more than `threshold` times the baseline."""
+    previous = {(case['competition'], case['scale']): case for case in baseline['cases'] if 'stages' in case}
+    regressions = []
+    for case in report['cases']:
+        before = previous.get((case['competition'], case['scale']))
+        if before is None or 'stages' not in case:
+            continue
+        for stage, seconds in case['stages'].items():
+            old = before['stages'].get(stage)
+            if old and seconds > old * threshold and seconds - old > MIN_REGRESSION_SECONDS:
+                regressions.append({
+                    'competition': case['competition'],
+                    'scale': case['scale'],
+                    'stage': stage,
+                    'baseline_seconds': old,
+                    'seconds': seconds,
+                    'ratio': seconds / old,
+                })
+    return regressions
+
+
+def to_markdown(report):
+    lines = [
+        f"# Evaluator benchmark ({report['created_at']})",
+        "",
+        f"Python {report['python']} on {report['platform']}, median of {report['repeat']} run(s).",
+        "",
+        "| Competition | Scale | Rows | Stage | Seconds |",
+        "|---|---|---|---|---|",
+    ]
+    for case in report['cases']:
+        if 'error' in case:
+            lines.append(f"| {case['competition']} | x{case['scale']} | - | error | {case['error']} |")
+            continue
+        for stage, seconds in sorted(case['stages'].items()):
+            lines.append(f"| {case['competition']} | x{case['scale']} | {case['rows']} | {stage} | {seconds:.4f} |")
+        lines.append(f"| {case['competition']} | x{case['scale']} | {case['rows']} | peak RSS (MB) | {case['peak_rss_mb']:.1f} |")
+
+    if report.get('regressions') is not None:
+        lines += ["", "## Regressions against baseline", ""]
+        if not report['regressions']:
+            lines.append("None.")
+        for item in report['regressions']:
+            lines.append(
+                f"- {item['competition']} x{item['scale']} {item['stage']}: "
+                f"{item['baseline_seconds']:.4f}s -> {item['seconds']:.4f}s ({item['ratio']:.2f}x)"
+            )
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--competitions', nargs='*', help="Competitions to run (default: all).")
+    parser.add_argument('--scales', nargs='*', type=int, default=[1, 10, 100])
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--output-dir', default='bench_results')
+    parser.add_argument('--baseline', help="Report JSON to compare against.")
+    parser.add_argument('--threshold', type=float, default=1.25, help="Slowdown ratio reported as a regression.")
+    parser.add_argument('--save-baseline', help="Also write the new report to this path.")
+    args = parser.parse_args(argv)
+
+    competitions = args.competitions or sorted(
+        p.name for p in (REPO_ROOT / 'competitions').iterdir() if (p / GROUND_TRUTH_FILENAME).is_file()
+    )
+
+    workdir = tempfile.mkdtemp(prefix='evaluator-bench-')
+    try:
+        cases = []
+        # One short-lived process per case keeps peak RSS measurements independent.
+        context = multiprocessing.get_context('spawn')
+        for scale in args.scales:
+            for competition in competitions:
+                with context.Pool(1) as pool:
+                    case = pool.apply(_run_case_in_subprocess, ((competition, scale, args.repeat, workdir),))
+                cases.append(case)
+                status = case.get('error') or f"{case['stages'].get('evaluate_total', 0):.3f}s evaluate"
+                print(f"{competition} x{scale}: {status}", flush=True)
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'repeat': args.repeat,
+        'cases': cases,
+    }
+    if args.baseline:
+        report['regressions'] = compare(report, json.loads(Path(args.baseline).read_text()), args.threshold)
+
+    output_dir = Path(args.output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    (output_dir / 'report.json').write_text(json.dumps(report, indent=2))
+    (output_dir / 'report.md').write_text(to_markdown(report))
+    if args.save_baseline:
+        Path(args.save_baseline).write_text(json.dumps(report, indent=2))
+    print(f"Report written to {output_dir / 'report.json'} and {output_dir / 'report.md'}")
+
+    if report.get('regressions'):
+        print(f"{len(report['regressions'])} stage(s) regressed beyond {args.threshold}x the baseline.")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
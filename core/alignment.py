@@ -0,0 +1,119 @@
+import numpy as np
+import pandas as pd
+
+from core.ground_truth import ID_INDEX_NAME
+
+# How many offending ids to quote in an error message.
+MAX_REPORTED_IDS = 5
+
+
+class AlignmentError(ValueError):
+    """Raised when the prediction ids do not match the ground truth ids one-to-one."""
+
+    def __init__(self, missing, duplicates, extra):
+        self.missing = missing
+        self.duplicates = duplicates
+        self.extra = extra
+        problems = []
+        if len(missing):
+            problems.append(f"{len(missing)} missing id(s) {_sample(missing)}")
+        if len(duplicates):
+            problems.append(f"{len(duplicates)} duplicated id(s) {_sample(duplicates)}")
+        if len(extra):
+            problems.append(f"{len(extra)} unexpected id(s) {_sample(extra)}")
+        super().__init__("ID mismatch between prediction and ground truth: " + "; ".join(problems) + ".")
+
+
+def truth_index(df_truth, id_column):
+    """
+    Returns the id -> row index for a ground truth frame. Cached ground truth
+    frames carry it as their index, so its hash table is built only once.
+    """
+    if df_truth.index.name == ID_INDEX_NAME:
+        return df_truth.index
+    index = pd.Index(df_truth[id_column])
+    if not index.is_unique:
+        duplicated = index[index.duplicated()].unique()
+        raise ValueError(f"Ground truth contains {len(duplicated)} duplicated id(s) {_sample(duplicated)}.")
+    return index
+
+
+def match_rows(index, pred_ids):
+    """
+    Maps prediction ids onto ground truth rows in one vectorized hash lookup.
+    Returns `order` such that pred_rows[order] lines up with the ground truth.
+    """
+    pred_ids = _coerce_ids(pred_ids, index)
+    positions = index.get_indexer(pred_ids)
+
+    extra = positions < 0
+    counts = np.bincount(positions[~extra], minlength=len(index))
+    if extra.any() or (counts != 1).any():
+        raise AlignmentError(
+            missing=index[counts == 0],
+            duplicates=index[counts > 1],
+            extra=pd.unique(pred_ids[extra]),
+        )
+
+    order = np.empty(len(index), dtype=np.intp)
+    order[positions] = np.arange(len(positions))
+    return order
+
+
+def match_chunk(index, pred_ids, seen):
+    """
+    Ground truth rows for one chunk of a streamed prediction. seen flags the
+    rows matched by earlier chunks and is updated in place; ids that are
+    unknown or already seen raise AlignmentError as soon as their chunk is read.
+    Missing ids show up as a row count short of the ground truth's.
+    """
+    pred_ids = _coerce_ids(pred_ids, index)
+    positions = index.get_indexer(pred_ids)
+
+    extra = positions < 0
+    known = positions[~extra]
+    repeated = seen[known] | pd.Series(known).duplicated().to_numpy()
+    if extra.any() or repeated.any():
+        raise AlignmentError(
+            missing=index[:0],
+            duplicates=index[pd.unique(known[repeated])],
+            extra=pd.unique(pred_ids[extra]),
+        )
+
+    seen[positions] = True
+    return positions
+
+
+def align_frames(df_truth, df_pred, id_column):
+    """
+    Reorders the prediction rows to match the ground truth row order.
+    Both frames are returned with a fresh RangeIndex so their rows line up positionally.
+    """
+    order = match_rows(truth_index(df_truth, id_column), df_pred[id_column].to_numpy())
+    return df_truth.reset_index(drop=True), df_pred.iloc[order].reset_index(drop=True)
+
+
+def _coerce_ids(pred_ids, index):
+    """Brings prediction ids to the ground truth's id type (e.g. '007' vs 7)."""
+    truth_numeric = pd.api.types.is_numeric_dtype(index.dtype)
+    pred_numeric = pd.api.types.is_numeric_dtype(pred_ids.dtype)
+    if truth_numeric and not pred_numeric:
+        coerced = pd.to_numeric(pred_ids, errors='coerce')
+        if not np.isnan(coerced).any():
+            return coerced
+    elif pred_numeric and not truth_numeric:
+        return pred_ids.astype(str)
+    elif pred_numeric and pred_ids.dtype != index.dtype:
+        # e.g. int64 ids against the sidecar's int32 index: a lossless cast lets
+        # get_indexer use the index's hash table instead of upcasting the whole index.
+        with np.errstate(invalid='ignore'):
+            cast = pred_ids.astype(index.dtype)
+        if (cast == pred_ids).all():
+            return cast
+    return pred_ids
+
+
+def _sample(ids):
+    shown = [str(i) for i in list(ids[:MAX_REPORTED_IDS])]
+    suffix = ", ..." if len(ids) > MAX_REPORTED_IDS else ""
+    return "(e.g. " + ", ".join(shown) + suffix + ")"
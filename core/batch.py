@@ -0,0 +1,298 @@
+"""
+Offline batch scoring of a directory tree of submissions.
+
+Every prediction file under the root (.csv, or gzip, zstd or zip
+compressed) is matched to a competition: by a directory named after one,
+or a file name that starts with its name, else by its header; a path that
+names several competitions is an error. Files are scored on a pool of
+processes, each of which imports the evaluators and loads the ground
+truths once.
+Results are appended to the output as each file finishes, as JSON lines
+or, for a .csv output, as one (path, metric, value) row per score.
+Re-running with the same output resumes: files already recorded, at the
+same size and mtime, are skipped.
+
+    python -m core.batch submissions/ --output results.jsonl --jobs 8
+    python -m core.batch submissions/ --output results.csv --competition pet_finder
+"""
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from pathlib import Path
+
+from core.config import StreamingConfig
+from core.ground_truth import file_version
+from core.registry import EvaluatorRegistry
+from core.scoring import GROUND_TRUTH_FILENAME, evaluator_for, ground_truth_path, score_submission
+from core.uploads import open_prediction, read_prediction_csv
+
+SUBMISSION_SUFFIXES = ('.csv', '.gz', '.zst', '.zip')
+
+# Files this large are scored chunk by chunk, as in the web app.
+STREAMING_MIN_BYTES = 64 * 1024 * 1024
+
+# What may follow a competition's name at the start of a file name, e.g. pet_finder-v2.csv.
+NAME_SEPARATORS = ('-', '_', ' ', '+')
+
+CSV_FIELDS = ('path', 'version', 'competition', 'status', 'metric', 'value', 'error', 'seconds')
+
+
+def find_submissions(root):
+    """Prediction files under root, sorted, as paths relative to it."""
+    root = Path(root)
+    return sorted(
+        path.relative_to(root) for path in root.rglob('*')
+        if path.is_file() and path.suffix.lower() in SUBMISSION_SUFFIXES
+    )
+
+
+class CompetitionMatcher:
+    """Finds the competition a submission belongs to, from its path or its header."""
+
+    def __init__(self, competitions_dir, evaluators_package, competitions):
+        self.competitions_dir = competitions_dir
+        self.evaluators_package = evaluators_package
+        self.competitions = competitions
+        self._headers = None
+
+    def match(self, root, relative_path):
+        """(competition, None), or (None, reason) when no single competition fits."""
+        named = [name for name in self.competitions if _names(name, relative_path)]
+        if len(named) == 1:
+            return named[0], None
+        if named:
+            return None, f"Path names several competitions: {', '.join(sorted(named))}"
+
+        try:
+            header = set(read_prediction_csv(open_prediction(root / relative_path), nrows=0).columns)
+        except ValueError as e:
+            return None, str(e)
+        exact = [name for name, (columns, _, _) in self._competition_headers().items() if columns == header]
+        if len(exact) == 1:
+            return exact[0], None
+        fitting = exact or [
+            name for name, (_, required, strict) in self._competition_headers().items()
+            if not strict and required <= header
+        ]
+        if len(fitting) == 1:
+            return fitting[0], None
+        if fitting:
+            return None, f"Header fits several competitions: {', '.join(sorted(fitting))}"
+        return None, "No competition in the path and no competition's columns match the header"
+
+    def _competition_headers(self):
+        """{competition: (ground truth columns, required prediction columns, strict_columns)}"""
+        if self._headers is None:
+            self._headers = {}
+            for name in self.competitions:
+                evaluator = evaluator_for(self.evaluators_package, name)
+                df_truth = evaluator.read_ground_truth(ground_truth_path(self.competitions_dir, name))
+                spec = evaluator.SPEC
+                required = {spec.id_column, *spec.labels_for(df_truth)}
+                self._headers[name] = (set(df_truth.columns), required, spec.strict_columns)
+        return self._headers
+
+
+def _names(competition, relative_path):
+    """
+    Whether a directory on the path is the competition, or the file name
+    (before its first '.') is the competition, alone or followed by a separator.
+    """
+    if competition in relative_path.parts[:-1]:
+        return True
+    stem = relative_path.name.split('.')[0]
+    return stem == competition or any(stem.startswith(competition + separator) for separator in NAME_SEPARATORS)
+
+
+class ResultsFile:
+    """
+    The output, opened for appending. done() lists (path, version) pairs it
+    already holds; a line cut off by an interruption is dropped first.
+    """
+
+    def __init__(self, path):
+        self.path = Path(path)
+        self.is_csv = self.path.suffix.lower() == '.csv'
+        self.recorded = {}
+        if self.path.exists():
+            self._truncate_partial_line()
+            self._read_recorded()
+        new = not self.path.exists() or self.path.stat().st_size == 0
+        self._file = open(self.path, 'a', encoding='utf-8', newline='')
+        if self.is_csv:
+            self._writer = csv.DictWriter(self._file, fieldnames=CSV_FIELDS)
+            if new:
+                self._writer.writeheader()
+
+    def done(self, retry_errors=False):
+        return {key for key, status in self.recorded.items() if status == 'ok' or not retry_errors}
+
+    def write(self, record):
+        if self.is_csv:
+            for row in _csv_rows(record):
+                self._writer.writerow(row)
+        else:
+            self._file.write(json.dumps(record, default=float) + '\n')
+        # Flushed per file, so an interruption loses at most the file being written.
+        self._file.flush()
+
+    def close(self):
+        self._file.close()
+
+    def _truncate_partial_line(self):
+        with open(self.path, 'rb+') as f:
+            data = f.read()
+            if data and not data.endswith(b'\n'):
+                f.truncate(data.rfind(b'\n') + 1)
+
+    def _read_recorded(self):
+        with open(self.path, encoding='utf-8', newline='') as f:
+            if self.is_csv:
+                rows = csv.DictReader(f)
+            else:
+                rows = (json.loads(line) for line in f if line.strip())
+            for row in rows:
+                self.recorded[(row['path'], row['version'])] = row['status']
+
+
+def _version_text(version):
+    mtime_ns, size = version
+    return f"{mtime_ns}:{size}"
+
+
+def _flatten(scores, prefix=''):
+    for key, value in scores.items():
+        if isinstance(value, dict):
+            yield from _flatten(value, f"{prefix}{key}.")
+        else:
+            yield f"{prefix}{key}", value
+
+
+def _csv_rows(record):
+    base = {field: record.get(field) for field in ('path', 'version', 'competition', 'status', 'seconds')}
+    if record['status'] != 'ok':
+        # Keep each row on one line, which resuming relies on.
+        return [{**base, 'error': ' '.join(str(record['error']).split())}]
+    return [{**base, 'metric': metric, 'value': value} for metric, value in _flatten(record['scores'])]
+
+
+# --- Workers -----------------------------------------------------------------
+
+def _init_worker(evaluators_package, competitions_dir, competitions):
+    # Import every evaluator and load its ground truth once, up front.
+    EvaluatorRegistry(evaluators_package, competitions_dir).load(competitions, warm_ground_truth=True, check_unused=False)
+
+
+def _score_file(competitions_dir, evaluators_package, competition, path):
+    """Returns ('ok', scores, seconds) or ('error', message, seconds)."""
+    started = time.perf_counter()
+    try:
+        scores = score_submission(
+            competitions_dir, evaluators_package, competition, path,
+            streaming_config=StreamingConfig(min_bytes=STREAMING_MIN_BYTES),
+        )
+        return 'ok', scores, time.perf_counter() - started
+    except Exception as e:
+        return 'error', str(e), time.perf_counter() - started
+
+
+def score_tree(root, output, competitions_dir='competitions', evaluators_package='evaluators',
+               competition=None, jobs=None, retry_errors=False, log=sys.stderr):
+    """Scores every new submission under root into output. Returns the number of files that failed."""
+    root = Path(root)
+    competitions = sorted(
+        p.name for p in Path(competitions_dir).iterdir() if (p / GROUND_TRUTH_FILENAME).is_file()
+    )
+    if competition is not None and competition not in competitions:
+        raise ValueError(f"Unknown competition '{competition}'.")
+    matcher = CompetitionMatcher(competitions_dir, evaluators_package, competitions)
+    results = ResultsFile(output)
+    done = results.done(retry_errors)
+
+    tasks, skipped, failures = [], 0, 0
+    for relative_path in find_submissions(root):
+        record = {'path': relative_path.as_posix(), 'version': _version_text(file_version(root / relative_path))}
+        if (record['path'], record['version']) in done:
+            skipped += 1
+            continue
+        name, reason = (competition, None) if competition else matcher.match(root, relative_path)
+        if name is None:
+            results.write({**record, 'competition': None, 'status': 'error', 'error': reason, 'seconds': 0.0})
+            print(f"{record['path']}: {reason}", file=log)
+            failures += 1
+            continue
+        tasks.append(({**record, 'competition': name}, root / relative_path))
+    print(f"{len(tasks)} file(s) to score, {skipped} already recorded in {output}", file=log)
+
+    def record_outcome(record, outcome, position):
+        nonlocal failures
+        status, value, seconds = outcome
+        record = {**record, 'status': status, 'seconds': round(seconds, 4)}
+        record['scores' if status == 'ok' else 'error'] = value
+        results.write(record)
+        failures += status != 'ok'
+        print(f"[{position}/{len(tasks)}] {record['path']} ({record['competition']}): {status} in {seconds:.2f}s", file=log)
+
+    try:
+        jobs = min(jobs or os.cpu_count() or 1, max(len(tasks), 1))
+        if jobs == 1:
+            for position, (record, path) in enumerate(tasks, 1):
+                record_outcome(record, _score_file(competitions_dir, evaluators_package, record['competition'], path), position)
+        else:
+            batch_competitions = sorted({record['competition'] for record, _ in tasks})
+            # Build the ground truth sidecars here rather than racing to build them in every worker.
+            EvaluatorRegistry(evaluators_package, competitions_dir).load(
+                batch_competitions, warm_ground_truth=True, check_unused=False
+            )
+            with ProcessPoolExecutor(
+                max_workers=jobs, mp_context=multiprocessing.get_context('spawn'),
+                initializer=_init_worker, initargs=(evaluators_package, competitions_dir, batch_competitions),
+            ) as pool:
+                pending = {
+                    pool.submit(_score_file, competitions_dir, evaluators_package, record['competition'], path): record
+                    for record, path in tasks
+                }
+                position = 0
+                try:
+                    while pending:
+                        finished, _ = wait(pending, return_when=FIRST_COMPLETED)
+                        for future in finished:
+                            position += 1
+                            record_outcome(pending.pop(future), future.result(), position)
+                except KeyboardInterrupt:
+                    for future in pending:
+                        future.cancel()
+                    raise
+    finally:
+        results.close()
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('root', help="Directory searched recursively for submissions.")
+    parser.add_argument('--output', required=True, help="Results file: .jsonl, or .csv for one row per score.")
+    parser.add_argument('--competition', help="Score every file for this competition instead of discovering it.")
+    parser.add_argument('--jobs', type=int, help="Worker processes (default: one per CPU).")
+    parser.add_argument('--competitions-dir', default='competitions')
+    parser.add_argument('--retry-errors', action='store_true', help="Re-score files whose recorded result is an error.")
+    args = parser.parse_args(argv)
+
+    try:
+        failures = score_tree(
+            args.root, args.output, args.competitions_dir, competition=args.competition,
+            jobs=args.jobs, retry_errors=args.retry_errors,
+        )
+    except KeyboardInterrupt:
+        print("Interrupted; run again with the same --output to resume.", file=sys.stderr)
+        return 130
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,302 @@
+"""
+Bootstrap confidence intervals for the engine's metrics.
+
+Resamples are drawn as one (b, n) matrix of row indices per batch and each
+metric is computed for every row of that matrix at once: gathers and
+bincounts over the index matrix, or products with the matching (b, n)
+resample-count matrix for sums over several columns. Batches are sized to
+bound memory, and drawing stops early once the time budget is spent, so
+large test sets get fewer resamples rather than slow responses.
+
+paired_resamples() applies the same resamples to several submissions'
+predictions of one ground truth, for paired comparisons. Metrics that are
+sums over rows are then computed for every submission in one product with
+the resample-count matrix.
+"""
+import time
+
+import numpy as np
+
+from core import kernels, multilabel, regression
+
+# Upper bound on the entries of one batch's index matrix.
+MAX_BATCH_ELEMENTS = 1 << 22
+
+
+def confidence_intervals(data, metrics, config):
+    """
+    Percentile intervals for a Prepared evaluation. metrics maps score keys
+    to metric names; names without a resampler are left out.
+    Returns {'confidence', 'n_resamples', 'intervals': {key: [low, high] | {column: [low, high]}}}.
+    """
+    metrics = {key: name for key, name in metrics.items() if name in RESAMPLERS}
+    n = len(data.y_true)
+    rng = np.random.default_rng(config.seed)
+    batch_size = max(1, min(config.n_resamples, MAX_BATCH_ELEMENTS // max(n, 1)))
+    deadline = None if config.time_budget is None else time.perf_counter() + config.time_budget
+
+    samples = {key: [] for key in metrics}
+    drawn = 0
+    while drawn < config.n_resamples:
+        b = min(batch_size, config.n_resamples - drawn)
+        idx = rng.integers(0, n, size=(b, n))
+        batch = _Batch(idx, n)
+        for key, name in metrics.items():
+            samples[key].append(RESAMPLERS[name](data, batch))
+        drawn += b
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+
+    tail = (1 - config.confidence) / 2 * 100
+    percentiles = (tail, 100 - tail)
+    intervals = {key: _interval(batches, percentiles) for key, batches in samples.items()}
+    return {'confidence': config.confidence, 'n_resamples': drawn, 'intervals': intervals}
+
+
+def paired_resamples(datas, metrics, config):
+    """
+    The metrics of every Prepared in datas, all aligned to the same ground
+    truth, over the same resamples. Returns ({key: (len(datas), drawn) array
+    | {column: array}}, drawn); metrics without a resampler are left out.
+    """
+    metrics = {key: name for key, name in metrics.items() if name in RESAMPLERS}
+    n = len(datas[0].y_true)
+    rng = np.random.default_rng(config.seed)
+    batch_size = max(1, min(config.n_resamples, MAX_BATCH_ELEMENTS // max(n, 1)))
+    deadline = None if config.time_budget is None else time.perf_counter() + config.time_budget
+
+    samples = {key: [] for key in metrics}
+    drawn = 0
+    while drawn < config.n_resamples:
+        b = min(batch_size, config.n_resamples - drawn)
+        batch = _Batch(rng.integers(0, n, size=(b, n)), n)
+        for key, name in metrics.items():
+            samples[key].append(_resample_all(name, datas, batch))
+        drawn += b
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return {key: _join(batches) for key, batches in samples.items()}, drawn
+
+
+def _resample_all(name, datas, batch):
+    if name in STACKED_RESAMPLERS:
+        return STACKED_RESAMPLERS[name](datas, batch)
+    values = [RESAMPLERS[name](data, batch) for data in datas]
+    if isinstance(values[0], dict):
+        return {column: np.stack([value[column] for value in values]) for column in values[0]}
+    return np.stack(values)
+
+
+def _join(batches):
+    if isinstance(batches[0], dict):
+        return {column: _join([batch[column] for batch in batches]) for column in batches[0]}
+    return np.concatenate(batches, axis=1)
+
+
+class _Batch:
+    """One batch of resamples: the index matrix and, when needed, its per-row counts."""
+
+    def __init__(self, idx, n):
+        self.idx = idx
+        self.n = n
+        self._weights = None
+
+    @property
+    def size(self):
+        return len(self.idx)
+
+    def weights(self):
+        """(b, n) matrix of how often each row was drawn in each resample."""
+        if self._weights is None:
+            offsets = np.arange(self.size)[:, None] * self.n
+            counts = np.bincount((offsets + self.idx).ravel(), minlength=self.size * self.n)
+            self._weights = counts.reshape(self.size, self.n).astype(np.float64)
+        return self._weights
+
+
+def _interval(batches, percentiles):
+    if isinstance(batches[0], dict):
+        return {
+            column: _interval([batch[column] for batch in batches], percentiles)
+            for column in batches[0]
+        }
+    values = np.concatenate(batches)
+    values = values[np.isfinite(values)]
+    if not len(values):
+        return None
+    low, high = np.percentile(values, percentiles)
+    return [float(low), float(high)]
+
+
+# --- Resamplers: metric name -> f(Prepared, _Batch) -> (b,) array or {column: (b,) array}
+
+def _log_loss(data, batch):
+    return data.row_log_loss()[batch.idx].mean(axis=1)
+
+
+def _accuracy(data, batch):
+    return data.correct_rows()[batch.idx].mean(axis=1)
+
+
+def _f1_macro(data, batch):
+    if data.multilabel:
+        return _multilabel_f1_macro(data, batch)
+    # Per resample class counts, with each resample's classes offset into its own bincount block.
+    k = data.n_classes
+    offsets = np.arange(batch.size)[:, None] * k
+    true_codes = offsets + data.true_codes[batch.idx]
+    pred_codes = offsets + data.pred_codes[batch.idx]
+    hits = true_codes[true_codes == pred_codes]
+    shape = (batch.size, k)
+    true_positives = np.bincount(hits, minlength=batch.size * k).reshape(shape)
+    denominator = (
+        np.bincount(true_codes.ravel(), minlength=batch.size * k)
+        + np.bincount(pred_codes.ravel(), minlength=batch.size * k)
+    ).reshape(shape)
+    # Classes absent from both sides of a resample do not count towards its mean.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = np.where(denominator > 0, 2 * true_positives / denominator, np.nan)
+    return np.nanmean(f1, axis=1)
+
+
+def _multilabel_f1_macro(data, batch):
+    n_labels = len(data.y_pred.vocabulary)
+    weights = batch.weights()
+
+    def label_sums(rows, labels):
+        # Each (row, label) pair adds its row's resample count to that label, per resample.
+        offsets = np.arange(batch.size)[:, None] * n_labels
+        return np.bincount(
+            (offsets + labels).ravel(), weights=weights[:, rows].ravel(), minlength=batch.size * n_labels
+        ).reshape(batch.size, n_labels)
+
+    true_positives = label_sums(*multilabel.matching_pairs(data.y_true, data.y_pred))
+    denominator = (
+        label_sums(data.y_true.rows, data.y_true.indices)
+        + label_sums(data.y_pred.rows, data.y_pred.indices)
+    )
+    # Labels absent from both sides of a resample score 0, as in multilabel.macro_f1.
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = np.where(denominator > 0, 2 * true_positives / denominator, 0.0)
+    return f1.mean(axis=1)
+
+
+def _f1_micro(data, batch):
+    c = data.class_counts()
+    true_positives = c.row_tp[batch.idx].sum(axis=1)
+    denominator = (c.row_true + c.row_pred)[batch.idx].sum(axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, 2 * true_positives / denominator, 0.0)
+
+
+def _hamming_loss(data, batch):
+    c = data.class_counts()
+    wrong = (c.row_true + c.row_pred - 2 * c.row_tp)[batch.idx].sum(axis=1)
+    return wrong / max(batch.n * c.n_labels, 1)
+
+
+def _roc_auc(data, batch):
+    tps, fps = data.binary_curve().resampled_counts(batch.weights())
+    return kernels.roc_auc_from_counts(tps, fps)
+
+
+def _pr_auc(data, batch):
+    tps, fps = data.binary_curve().resampled_counts(batch.weights())
+    return kernels.average_precision_from_counts(tps, fps)
+
+
+def _regression_sums(moments, y_pred, batch):
+    """Per resample and column: squared error sum and the centred truth's sum of squares."""
+    # Centring on the full-sample mean keeps the variance below free of cancellation.
+    centred = moments.values - moments.mean
+    weights = batch.weights()
+    squared_error = weights @ (moments.values - y_pred) ** 2
+    total = weights @ centred
+    total_squares = weights @ centred ** 2 - total ** 2 / batch.n
+    return squared_error, total_squares
+
+
+def _per_column(columns, values):
+    return {column: values[:, i] for i, column in enumerate(columns)}
+
+
+def _r2_per_column(data, batch):
+    squared_error, total_squares = _regression_sums(data.truth_moments, data.y_pred, batch)
+    return _per_column(data.columns, regression.r2_from_sums(squared_error, total_squares))
+
+
+def _rmse_per_column(data, batch):
+    squared_error, _ = _regression_sums(data.truth_moments, data.y_pred, batch)
+    return _per_column(data.columns, np.sqrt(squared_error / batch.n))
+
+
+def _mae_per_column(data, batch):
+    absolute_error = batch.weights() @ np.abs(data.y_pred - data.y_true)
+    return _per_column(data.columns, absolute_error / batch.n)
+
+
+def _rmsle_per_column(data, batch):
+    columns, _ = data.log_regression_scores()
+    mask, log_moments = data.log_truth()
+    squared_error, _ = _regression_sums(log_moments, np.log1p(data.y_pred[:, mask]), batch)
+    return _per_column(columns, np.sqrt(squared_error / batch.n))
+
+
+def _mean_of(per_column):
+    return lambda data, batch: np.mean(list(per_column(data, batch).values()), axis=0)
+
+
+RESAMPLERS = {
+    'log_loss': _log_loss,
+    'accuracy': _accuracy,
+    'f1_macro': _f1_macro,
+    'f1_micro': _f1_micro,
+    'hamming_loss': _hamming_loss,
+    'roc_auc': _roc_auc,
+    'pr_auc': _pr_auc,
+    'r2_per_column': _r2_per_column,
+    'rmse_per_column': _rmse_per_column,
+    'mae_per_column': _mae_per_column,
+    'rmsle_per_column': _rmsle_per_column,
+    'mean_r2': _mean_of(_r2_per_column),
+    'mean_rmse': _mean_of(_rmse_per_column),
+    'mean_mae': _mean_of(_mae_per_column),
+    'mean_rmsle': _mean_of(_rmsle_per_column),
+}
+
+
+# --- Stacked resamplers: metric name -> f([Prepared], _Batch) -> (len(datas), b) array
+
+def _row_sums(rows, batch):
+    """Each resample's sum of per-row values, for each submission's rows: (len(rows), b)."""
+    return np.stack(rows).astype(np.float64) @ batch.weights().T
+
+
+def _stacked_log_loss(datas, batch):
+    return _row_sums([data.row_log_loss() for data in datas], batch) / batch.n
+
+
+def _stacked_accuracy(datas, batch):
+    return _row_sums([data.correct_rows() for data in datas], batch) / batch.n
+
+
+def _stacked_f1_micro(datas, batch):
+    counts = [data.class_counts() for data in datas]
+    true_positives = _row_sums([c.row_tp for c in counts], batch)
+    denominator = _row_sums([c.row_true + c.row_pred for c in counts], batch)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return np.where(denominator > 0, 2 * true_positives / denominator, 0.0)
+
+
+def _stacked_hamming_loss(datas, batch):
+    counts = [data.class_counts() for data in datas]
+    wrong = _row_sums([c.row_true + c.row_pred - 2 * c.row_tp for c in counts], batch)
+    return wrong / max(batch.n * counts[0].n_labels, 1)
+
+
+STACKED_RESAMPLERS = {
+    'log_loss': _stacked_log_loss,
+    'accuracy': _stacked_accuracy,
+    'f1_micro': _stacked_f1_micro,
+    'hamming_loss': _stacked_hamming_loss,
+}
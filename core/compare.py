@@ -0,0 +1,132 @@
+"""
+Paired comparison of several submissions to one competition.
+
+Every prediction is aligned to the same cached ground truth and prepared
+with one shared ground truth memo, so the truth-side arrays are built
+once. The bootstrap resamples are drawn once and applied to every
+submission (bootstrap.paired_resamples), which pairs the differences: for
+each pair of submissions and each ranked metric, the delta's percentile
+interval and a two-sided p-value for "no difference" come from the same
+resampled rows. Accuracy also gets McNemar's test on the rows exactly one
+of the two submissions gets right.
+
+Results are matrices indexed [i][j] over the submissions, comparing j
+with i: delta is score_j - score_i. The diagonal is None.
+"""
+import math
+
+import numpy as np
+
+from core import bootstrap, engine
+from core.alignment import align_frames
+
+# Discordant row counts up to this use McNemar's exact binomial test; above it the
+# continuity-corrected chi-squared approximation.
+MCNEMAR_EXACT_MAX = 1000
+
+
+def compare_predictions(spec, df_truth, predictions, config):
+    """
+    predictions maps submission names to prediction frames, already
+    validated like engine.validate_and_read_inputs does; config is a
+    config.BootstrapConfig. Returns
+    {'submissions', 'scores': {name: scores}, 'confidence', 'n_resamples',
+     'metrics': {key: {'direction', 'delta', 'interval', 'p_value'}},
+     'mcnemar': {key: {'only_row_correct', 'only_column_correct', 'p_value'}}},
+    with {column: {...}} in place of the matrices for per-column metrics.
+    """
+    if len(predictions) < 2:
+        raise ValueError("Comparing needs at least two submissions.")
+    names = list(predictions)
+    columns = spec.labels_for(df_truth)
+    with engine.evaluation_errors():
+        memo = engine.ground_truth_memo(df_truth)
+        datas = []
+        for df_pred in predictions.values():
+            aligned_truth, aligned_pred = align_frames(df_truth, df_pred, spec.id_column)
+            datas.append(engine.PREPARERS[spec.task](aligned_truth, aligned_pred, columns, memo))
+        scores = [engine.compute_metrics(spec, data) for data in datas]
+
+        ranked = {key: name for key, name in spec.metrics.items() if engine.METRICS[name].direction is not None}
+        resampled, drawn = bootstrap.paired_resamples(datas, ranked, config)
+        tail = (1 - config.confidence) / 2 * 100
+        metrics = {
+            key: _compare(
+                [score[key] for score in scores], samples, (tail, 100 - tail), engine.METRICS[ranked[key]].direction
+            )
+            for key, samples in resampled.items()
+        }
+        mcnemar = {
+            key: mcnemar_matrix([data.correct_rows() for data in datas])
+            for key, name in spec.metrics.items() if name == 'accuracy'
+        }
+    return {
+        'submissions': names,
+        'scores': dict(zip(names, scores)),
+        'confidence': config.confidence,
+        'n_resamples': drawn,
+        'metrics': metrics,
+        'mcnemar': mcnemar,
+    }
+
+
+def _compare(observed, samples, percentiles, direction):
+    if isinstance(samples, dict):
+        return {
+            column: _compare([score[column] for score in observed], samples[column], percentiles, direction)
+            for column in samples
+        }
+    s = len(observed)
+    observed = np.asarray(observed, dtype=np.float64)
+    delta = [[None] * s for _ in range(s)]
+    interval = [[None] * s for _ in range(s)]
+    p_value = [[None] * s for _ in range(s)]
+    for i in range(s):
+        for j in range(s):
+            if i == j or not np.isfinite(observed[j] - observed[i]):
+                continue
+            observed_delta = observed[j] - observed[i]
+            deltas = samples[j] - samples[i]
+            deltas = deltas[np.isfinite(deltas)]
+            delta[i][j] = float(observed_delta)
+            if not len(deltas):
+                continue
+            low, high = np.percentile(deltas, percentiles)
+            interval[i][j] = [float(low), float(high)]
+            p_value[i][j] = bootstrap_p_value(observed_delta, deltas)
+    return {'direction': direction, 'delta': delta, 'interval': interval, 'p_value': p_value}
+
+
+def bootstrap_p_value(observed_delta, deltas):
+    """
+    Two-sided p-value of a zero difference: the share of resampled deltas,
+    shifted to be centred on zero, at least as far from zero as the observed one.
+    """
+    extreme = np.count_nonzero(np.abs(deltas - observed_delta) >= abs(observed_delta))
+    return float(min(1.0, (extreme + 1) / (len(deltas) + 1)))
+
+
+def mcnemar_matrix(correct_rows):
+    """
+    McNemar's test between every pair of per-row correctness vectors.
+    Returns {'only_row_correct', 'only_column_correct', 'p_value'} matrices.
+    """
+    correct = np.stack(correct_rows).astype(np.float64)
+    # [i][j]: rows submission i gets right and submission j gets wrong.
+    only_first = (correct @ (1 - correct).T).round().astype(np.int64)
+    s = len(correct)
+    p_value = [[None if i == j else mcnemar_p_value(int(only_first[i, j]), int(only_first[j, i])) for j in range(s)]
+               for i in range(s)]
+    return {'only_row_correct': only_first.tolist(), 'only_column_correct': only_first.T.tolist(), 'p_value': p_value}
+
+
+def mcnemar_p_value(b, c):
+    """Two-sided p-value of McNemar's test for b and c discordant rows."""
+    m = b + c
+    if m == 0:
+        return 1.0
+    if m <= MCNEMAR_EXACT_MAX:
+        tail = sum(math.comb(m, k) for k in range(min(b, c) + 1))
+        return min(1.0, 2 * tail / 2 ** m)
+    statistic = (abs(b - c) - 1) ** 2 / m
+    return math.erfc(math.sqrt(statistic / 2))
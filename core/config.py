@@ -0,0 +1,36 @@
+"""
+Scoring settings the web app builds at import time. They live apart from
+the modules that use them so that importing the app does not import pandas,
+NumPy or the evaluators.
+"""
+from dataclasses import dataclass
+
+from core.uploads import source_size
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Scores key holding the bootstrap confidence intervals, when they were asked for.
+CI_KEY = 'confidence_intervals'
+
+
+@dataclass(frozen=True)
+class BootstrapConfig:
+    """
+    n_resamples is the most resamples drawn; time_budget (seconds, None for
+    no limit) may stop drawing earlier. The same seed gives the same intervals.
+    """
+    n_resamples: int = 1000
+    seed: int = 0
+    time_budget: float = None
+    confidence: float = 0.95
+
+
+@dataclass(frozen=True)
+class StreamingConfig:
+    """Predictions of at least min_bytes are scored chunk_rows rows at a time."""
+    chunk_rows: int = DEFAULT_CHUNK_ROWS
+    min_bytes: int = 0
+
+    def applies_to(self, prediction_source):
+        size = source_size(prediction_source)
+        return size is not None and size >= self.min_bytes
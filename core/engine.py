@@ -0,0 +1,542 @@
+"""
+Shared evaluation pipeline driven by declarative competition specs.
+
+A competition module only declares a CompetitionSpec (id column, task type,
+label columns, metrics) and gets its functions from module_api(). This
+module does the rest for every competition:
+parsing the prediction file with the spec's schema.Schema, staged checks, id
+alignment against the cached ground truth and metric computation.
+"""
+import contextlib
+import functools
+import logging
+from dataclasses import dataclass, field
+
+import numpy as np
+import pandas as pd
+
+from core import bootstrap, kernels, multilabel, regression, schema, telemetry, validation
+from core.alignment import align_frames
+from core.config import CI_KEY
+from core.ground_truth import GT_CACHE, load_ground_truth
+from core.uploads import read_prediction_csv
+
+logger = logging.getLogger(__name__)
+
+# Task types. Each one has a _prepare_* function below.
+ONEHOT = 'onehot'                        # one probability column per class, one class per row
+LABEL = 'label'                          # a single column holding the class label
+BINARY = 'binary'                        # a single probability column for the positive class
+MULTILABEL_ONEHOT = 'multilabel_onehot'  # one probability column per label, any number per row
+MULTILABEL_LABELS = 'multilabel_labels'  # a single column of space-separated labels
+REGRESSION = 'regression'                # one numeric column per target
+
+PROBABILISTIC_TASKS = (ONEHOT, BINARY, MULTILABEL_ONEHOT)
+
+# Prediction dtype of the label columns, per task. Probabilities only need
+# single precision, which halves the matrix wide tasks hold, and class
+# labels are categorical, so each distinct label is stored and encoded once.
+LABEL_DTYPES = {
+    ONEHOT: 'float32',
+    LABEL: 'category',
+    BINARY: 'float32',
+    MULTILABEL_ONEHOT: 'float32',
+    MULTILABEL_LABELS: 'str',
+    REGRESSION: 'float64',
+}
+
+# Binary probabilities at or above this count as a positive prediction.
+BINARY_THRESHOLD = 0.5
+
+
+@dataclass(frozen=True)
+class CompetitionSpec:
+    """
+    Declares how a competition is scored.
+
+    metrics maps each key of the returned scores dict to a name in METRICS,
+    e.g. {'f1_score_macro': 'f1_macro'}. label_columns defaults to every
+    ground truth column except the id. With strict_columns the prediction must
+    have exactly the ground truth's columns; otherwise it must contain at least
+    the id and label columns.
+
+    id_dtype is the id column's dtype in both files. label_dtype overrides
+    the task's prediction dtype in LABEL_DTYPES, e.g. 'int64' for integer
+    class labels, and dtype overrides ground truth column dtypes.
+    """
+    id_column: str
+    task: str
+    metrics: dict
+    label_columns: tuple = None
+    strict_columns: bool = True
+    dtype: dict = field(default=None)
+    id_dtype: str = 'str'
+    label_dtype: str = None
+
+    def labels_for(self, df_truth):
+        if self.label_columns is not None:
+            return list(self.label_columns)
+        return [column for column in df_truth.columns if column != self.id_column]
+
+    def prediction_schema(self, label_columns):
+        """The schema.Schema of a prediction for the given label columns."""
+        label_dtype = self.label_dtype or LABEL_DTYPES[self.task]
+        return schema.Schema({self.id_column: self.id_dtype, **{column: label_dtype for column in label_columns}})
+
+    def truth_dtype(self):
+        return {self.id_column: self.id_dtype, **(self.dtype or {})}
+
+    def directions(self):
+        """{score key: 'min' | 'max'} for every rankable metric the spec reports."""
+        return {
+            key: METRICS[name].direction
+            for key, name in self.metrics.items()
+            if METRICS[name].direction is not None
+        }
+
+
+@dataclass
+class Prepared:
+    """
+    Aligned ground truth and predictions in the array form the metrics consume.
+    Single-label tasks also carry integer class codes, which the metrics
+    score with the kernels in core.kernels instead of sklearn. Multilabel
+    tasks hold y_true and y_pred as core.multilabel.LabelMatrix. Regression
+    tasks carry the ground truth's cached core.regression.TruthMoments.
+    """
+    y_true: np.ndarray
+    y_pred: np.ndarray = None
+    y_prob: np.ndarray = None
+    y_true_matrix: np.ndarray = None
+    columns: list = None
+    true_codes: np.ndarray = None
+    pred_codes: np.ndarray = None
+    n_classes: int = None
+    classes: list = None
+    multilabel: bool = False
+    truth_moments: regression.TruthMoments = None
+    # () -> (column mask, TruthMoments) of the log1p truth; only built when a log-space metric asks.
+    log_truth: object = field(default=None, repr=False)
+    _counts: tuple = field(default=None, repr=False)
+    _curve: kernels.BinaryCurve = field(default=None, repr=False)
+    _row_log_loss: np.ndarray = field(default=None, repr=False)
+    _regression: dict = field(default=None, repr=False)
+    _log_regression: tuple = field(default=None, repr=False)
+
+    def is_binary(self):
+        return self.y_prob is not None and self.y_prob.ndim == 1
+
+    def binary_curve(self):
+        """The single-sort threshold sweep of a binary task, computed once per evaluation."""
+        if self._curve is None:
+            self._curve = kernels.BinaryCurve(self.true_codes, self.y_prob)
+        return self._curve
+
+    def class_counts(self):
+        """
+        Per-class (true positives, true count, predicted count), or a
+        multilabel.Counts for multilabel tasks. Computed once per evaluation.
+        """
+        if self._counts is None:
+            if self.multilabel:
+                self._counts = multilabel.counts(self.y_true, self.y_pred)
+            elif self.is_binary():
+                self._counts = self.binary_curve().class_counts_at(BINARY_THRESHOLD)
+            else:
+                self._counts = kernels.class_counts(self.true_codes, self.pred_codes, self.n_classes)
+        return self._counts
+
+    def row_log_loss(self):
+        """Each row's log loss; the log loss is their mean."""
+        if self._row_log_loss is None:
+            if self.y_true_matrix is not None:
+                self._row_log_loss = kernels.row_log_loss_indicator(self.y_true_matrix, self.y_prob)
+            elif self.is_binary():
+                self._row_log_loss = kernels.row_log_loss_binary(self.true_codes, self.y_prob)
+            else:
+                self._row_log_loss = kernels.row_log_loss_codes(self.true_codes, self.y_prob)
+        return self._row_log_loss
+
+    def log_loss(self):
+        return float(self.row_log_loss().mean())
+
+    def correct_rows(self):
+        """Whether each row is predicted exactly right (every label, for multilabel tasks)."""
+        if self.multilabel:
+            c = self.class_counts()
+            return (c.row_tp == c.row_true) & (c.row_tp == c.row_pred)
+        return self.true_codes == self.pred_codes
+
+    def regression_scores(self):
+        """{'r2', 'rmse', 'mae'} arrays over all target columns, computed once per evaluation."""
+        if self._regression is None:
+            self._regression = regression.scores(self.truth_moments, self.y_pred)
+        return self._regression
+
+    def log_regression_scores(self):
+        """(log columns, {'rmsle', 'r2'}) for the targets whose truth is above -1, computed once per evaluation."""
+        if self._log_regression is None:
+            mask, log_moments = self.log_truth()
+            columns = [column for column, keep in zip(self.columns, mask) if keep]
+            self._log_regression = columns, regression.log_scores(mask, log_moments, self.y_pred)
+        return self._log_regression
+
+
+@dataclass(frozen=True)
+class Metric:
+    """func(Prepared) -> score. direction is 'min', 'max', or None for values that are reported but not ranked."""
+    func: object
+    direction: str
+
+
+def read_ground_truth(spec, ground_truth_path):
+    """Loads the cached, id-sorted ground truth for a competition."""
+    return load_ground_truth(ground_truth_path, spec.id_column, dtype=spec.truth_dtype())
+
+
+def validate_and_read_inputs(spec, ground_truth_path, prediction_source):
+    """
+    Reads the ground truth and the prediction. The prediction is checked in
+    stages that fail as early as they can: its header, a sample of its first
+    rows and a newline count of its rows come before the body is parsed
+    with the spec's exact dtypes and only the needed columns.
+    """
+    with telemetry.span('read_ground_truth'):
+        df_gt = read_ground_truth(spec, ground_truth_path)
+    with telemetry.span('check_header'):
+        required = check_prediction_header(spec, df_gt, prediction_source)
+    prediction_schema, constraint = spec.prediction_schema(required[1:]), value_constraint(spec)
+    with telemetry.span('check_sample'):
+        validation.check_sample(prediction_source, prediction_schema, constraint)
+    with telemetry.span('count_rows'):
+        validation.check_row_count(prediction_source, len(df_gt))
+    with telemetry.span('parse'):
+        df_pred = validation.read_checked(prediction_source, prediction_schema, constraint)
+    telemetry.note(rows=len(df_pred))
+
+    if len(df_gt) != len(df_pred):
+        raise ValueError(f"Row count mismatch: Ground Truth has {len(df_gt)} rows, Prediction has {len(df_pred)} rows.")
+
+    return df_gt, df_pred
+
+
+def check_prediction_header(spec, df_gt, prediction_source):
+    """Checks the prediction's header against the spec and returns the columns to read, id first."""
+    required = [spec.id_column] + spec.labels_for(df_gt)
+    header = list(read_prediction_csv(prediction_source, nrows=0).columns)
+    if spec.strict_columns:
+        if set(df_gt.columns) != set(header):
+            raise ValueError(f"Column names do not match. GT: {list(df_gt.columns)}, Pred: {header}")
+    elif not set(required).issubset(header):
+        raise ValueError(f"Prediction file is missing required columns. Required: {required}")
+    return required
+
+
+def evaluate_predictions(spec, df_truth, df_pred, bootstrap_config=None):
+    """
+    Aligns the prediction to the ground truth by id and computes the spec's metrics.
+    With a config.BootstrapConfig the scores also carry confidence
+    intervals for every ranked metric under CI_KEY.
+    """
+    with evaluation_errors():
+        memo = ground_truth_memo(df_truth)
+        with telemetry.span('align'):
+            df_truth, df_pred = align_frames(df_truth, df_pred, spec.id_column)
+        with telemetry.span('prepare'):
+            data = PREPARERS[spec.task](df_truth, df_pred, spec.labels_for(df_truth), memo)
+        with telemetry.span('metrics'):
+            scores = compute_metrics(spec, data)
+        if bootstrap_config is not None:
+            ranked = {key: name for key, name in spec.metrics.items() if METRICS[name].direction is not None}
+            with telemetry.span('bootstrap'):
+                scores[CI_KEY] = bootstrap.confidence_intervals(data, ranked, bootstrap_config)
+    logger.debug("Scores: %s", scores)
+    return scores
+
+
+def compute_metrics(spec, data):
+    """The spec's scores dict for a Prepared, or anything with the same metric-facing methods."""
+    return {key: METRICS[name].func(data) for key, name in spec.metrics.items()}
+
+
+@contextlib.contextmanager
+def evaluation_errors():
+    """Reports any failure while scoring as a ValueError with the evaluation error prefix."""
+    try:
+        yield
+    except Exception as e:
+        raise ValueError(f"An unexpected error occurred during evaluation: {e}")
+
+
+def ground_truth_memo(df_truth):
+    """
+    memo(key, build) for values derived from the ground truth alone. They are
+    kept on the cached GroundTruth, so they are built once per file version;
+    frames that did not come from the cache are simply rebuilt each time.
+    """
+    ground_truth = GT_CACHE.owner(df_truth)
+    if ground_truth is not None:
+        return ground_truth.derived
+    return lambda key, build: build(df_truth)
+
+
+def value_constraint(spec):
+    """The validation constraint every prediction value must meet, if any."""
+    if spec.task in PROBABILISTIC_TASKS:
+        return validation.PROBABILITY
+    if spec.task == REGRESSION:
+        return validation.NUMBER
+    return None
+
+
+def module_api(spec):
+    """
+    A module-level __getattr__ for an evaluator module that declares only
+    SPEC. It provides the functions scoring calls on the module, bound to spec:
+    read_ground_truth(ground_truth_path),
+    validate_and_read_inputs(ground_truth_path, prediction_source),
+    evaluate_predictions(df_truth, df_pred, bootstrap_config=None) and
+    evaluate_stream(ground_truth_path, prediction_source, chunk_rows=DEFAULT_CHUNK_ROWS).
+    """
+    # core.streaming imports this module.
+    from core import streaming
+
+    functions = {
+        'read_ground_truth': functools.partial(read_ground_truth, spec),
+        'validate_and_read_inputs': functools.partial(validate_and_read_inputs, spec),
+        'evaluate_predictions': functools.partial(evaluate_predictions, spec),
+        'evaluate_stream': functools.partial(streaming.evaluate_stream, spec),
+    }
+
+    def __getattr__(name):
+        try:
+            return functions[name]
+        except KeyError:
+            raise AttributeError(f"Evaluator module has no attribute '{name}'") from None
+    return __getattr__
+
+
+# --- Task preparation ------------------------------------------------------
+# Each preparer takes (df_truth, df_pred, columns, memo); memo(key, build)
+# caches build(ground truth frame) for as long as the ground truth is unchanged.
+
+def _onehot_truth(columns):
+    def build(frame):
+        y_true_matrix = frame[list(columns)].to_numpy()
+        # argmax picks the first maximum, like idxmax over the class columns.
+        true_codes = kernels.argmax_codes(y_true_matrix)
+        strictly_onehot = (y_true_matrix.sum(axis=1) == 1).all() and (
+            y_true_matrix[np.arange(len(true_codes)), true_codes] == 1
+        ).all()
+        return true_codes, bool(strictly_onehot)
+    return build
+
+
+def _prepare_onehot(df_truth, df_pred, columns, memo):
+    true_codes, strictly_onehot = memo(('onehot', tuple(columns)), _onehot_truth(columns))
+    y_prob = df_pred[columns].to_numpy(dtype=np.float32)
+    pred_codes = kernels.argmax_codes(y_prob)
+    return Prepared(
+        y_true=true_codes,
+        y_pred=pred_codes,
+        y_prob=y_prob,
+        # Soft or multi-hot truth rows need the full matrix for the log loss.
+        y_true_matrix=None if strictly_onehot else df_truth[columns].to_numpy(),
+        columns=columns,
+        true_codes=true_codes,
+        pred_codes=pred_codes,
+        n_classes=len(columns),
+        classes=columns,
+    )
+
+
+def _prepare_label(df_truth, df_pred, columns, memo):
+    (column,) = columns
+    y_true = df_truth[column].to_numpy()
+    y_pred = df_pred[column].array
+    if isinstance(y_pred, pd.Categorical):
+        true_codes, classes = memo(('label_codes', column), lambda frame: kernels.factorize(frame[column].to_numpy()))
+        pred_codes, classes = kernels.encode_categorical(classes, y_pred)
+    else:
+        true_codes, pred_codes, classes = kernels.encode_labels(y_true, y_pred.to_numpy())
+    return Prepared(
+        y_true=y_true,
+        y_pred=y_pred,
+        columns=columns,
+        true_codes=true_codes,
+        pred_codes=pred_codes,
+        n_classes=len(classes),
+        classes=list(classes),
+    )
+
+
+def _prepare_binary(df_truth, df_pred, columns, memo):
+    (column,) = columns
+    y_true = df_truth[column].to_numpy()
+    if not np.isin(y_true, (0, 1)).all():
+        raise ValueError(f"Binary ground truth must be 0 or 1 in column '{column}'.")
+    y_prob = df_pred[column].to_numpy(dtype=np.float32)
+    pred_codes = (y_prob >= BINARY_THRESHOLD).astype(np.int64)
+    return Prepared(
+        y_true=y_true,
+        y_pred=pred_codes,
+        y_prob=y_prob,
+        columns=columns,
+        true_codes=y_true.astype(np.int64),
+        pred_codes=pred_codes,
+        n_classes=2,
+    )
+
+
+def _prepare_multilabel_onehot(df_truth, df_pred, columns, memo):
+    y_true_matrix = df_truth[columns].to_numpy()
+    y_prob = df_pred[columns].to_numpy(dtype=np.float32)
+    y_true = memo(('label_matrix', tuple(columns)), lambda frame: multilabel.from_dense(frame[columns].to_numpy(), columns))
+    return Prepared(
+        y_true=y_true,
+        y_pred=multilabel.from_dense(y_prob.round(), columns),
+        y_prob=y_prob,
+        y_true_matrix=y_true_matrix,
+        columns=columns,
+        multilabel=True,
+    )
+
+
+def _prepare_multilabel_labels(df_truth, df_pred, columns, memo):
+    (column,) = columns
+    y_true = memo(('label_matrix', column), lambda frame: multilabel.parse_label_strings(frame[column]))
+    # Predicted labels the truth never uses extend the vocabulary instead of being dropped.
+    y_pred = multilabel.parse_label_strings(df_pred[column], y_true.vocabulary)
+    return Prepared(y_true=y_true, y_pred=y_pred, columns=list(y_pred.vocabulary), multilabel=True)
+
+
+def regression_truth(memo, columns):
+    """The ground truth's TruthMoments over the target columns."""
+    build = lambda frame: regression.truth_moments(frame[columns].to_numpy(dtype=np.float64))
+    return memo(('regression', tuple(columns)), build)
+
+
+def log_regression_truth(memo, columns):
+    """(column mask, TruthMoments) of the log1p ground truth, see regression.log_truth_moments."""
+    build = lambda frame: regression.log_truth_moments(regression_truth(memo, columns))
+    return memo(('regression', tuple(columns), 'log1p'), build)
+
+
+def _prepare_regression(df_truth, df_pred, columns, memo):
+    moments = regression_truth(memo, columns)
+    return Prepared(
+        y_true=moments.values,
+        y_pred=df_pred[columns].to_numpy(dtype=np.float64),
+        columns=columns,
+        truth_moments=moments,
+        log_truth=lambda: log_regression_truth(memo, columns),
+    )
+
+
+PREPARERS = {
+    ONEHOT: _prepare_onehot,
+    LABEL: _prepare_label,
+    BINARY: _prepare_binary,
+    MULTILABEL_ONEHOT: _prepare_multilabel_onehot,
+    MULTILABEL_LABELS: _prepare_multilabel_labels,
+    REGRESSION: _prepare_regression,
+}
+
+
+# --- Metrics ---------------------------------------------------------------
+
+def _log_loss(data):
+    return data.log_loss()
+
+
+def _accuracy(data):
+    if data.multilabel:
+        return multilabel.subset_accuracy(data.class_counts())
+    return kernels.accuracy(data.class_counts())
+
+
+def _f1_macro(data):
+    if data.multilabel:
+        return multilabel.macro_f1(data.class_counts())
+    return kernels.macro_f1(data.class_counts())
+
+
+def _f1_micro(data):
+    return multilabel.micro_f1(data.class_counts())
+
+
+def _hamming_loss(data):
+    return multilabel.hamming_loss(data.class_counts())
+
+
+def _roc_auc(data):
+    return data.binary_curve().roc_auc()
+
+
+def _pr_auc(data):
+    return data.binary_curve().average_precision()
+
+
+def _best_f1_threshold(data):
+    return data.binary_curve().best_f1()
+
+
+def _per_column(columns, values):
+    return {column: float(value) for column, value in zip(columns, values)}
+
+
+def _r2_per_column(data):
+    return _per_column(data.columns, data.regression_scores()['r2'])
+
+
+def _rmse_per_column(data):
+    return _per_column(data.columns, data.regression_scores()['rmse'])
+
+
+def _mae_per_column(data):
+    return _per_column(data.columns, data.regression_scores()['mae'])
+
+
+def _rmsle_per_column(data):
+    columns, scores = data.log_regression_scores()
+    return _per_column(columns, scores['rmsle'])
+
+
+def _mean_r2(data):
+    return float(data.regression_scores()['r2'].mean())
+
+
+def _mean_rmse(data):
+    return float(data.regression_scores()['rmse'].mean())
+
+
+def _mean_mae(data):
+    return float(data.regression_scores()['mae'].mean())
+
+
+def _mean_rmsle(data):
+    _, scores = data.log_regression_scores()
+    return float(scores['rmsle'].mean())
+
+
+METRICS = {
+    'log_loss': Metric(_log_loss, 'min'),
+    'accuracy': Metric(_accuracy, 'max'),
+    'f1_macro': Metric(_f1_macro, 'max'),
+    # Multilabel tasks only.
+    'f1_micro': Metric(_f1_micro, 'max'),
+    'hamming_loss': Metric(_hamming_loss, 'min'),
+    'roc_auc': Metric(_roc_auc, 'max'),
+    'pr_auc': Metric(_pr_auc, 'max'),
+    # A decision threshold with its scores; reported, not ranked.
+    'best_f1_threshold': Metric(_best_f1_threshold, None),
+    'r2_per_column': Metric(_r2_per_column, 'max'),
+    'rmse_per_column': Metric(_rmse_per_column, 'min'),
+    'mean_r2': Metric(_mean_r2, 'max'),
+    'mean_rmse': Metric(_mean_rmse, 'min'),
+    'mae_per_column': Metric(_mae_per_column, 'min'),
+    'mean_mae': Metric(_mean_mae, 'min'),
+    # Root mean squared error of log1p values, over the targets whose truth is above -1.
+    'rmsle_per_column': Metric(_rmsle_per_column, 'min'),
+    'mean_rmsle': Metric(_mean_rmsle, 'min'),
+}
@@ -0,0 +1,195 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+
+# pandas and core.sidecar are imported where a ground truth is first loaded
+# or viewed, so that the web app can import the cache without them.
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Name of the index on cached ground truth frames. It holds the ids, so
+# core.alignment can reuse its hash table instead of rebuilding one per request.
+ID_INDEX_NAME = '_gt_id'
+
+
+class GroundTruth:
+    """
+    An immutable, id-sorted ground truth table held as compact typed NumPy arrays.
+    Every array is flagged read-only so evaluators cannot mutate the shared copy.
+    """
+
+    def __init__(self, competition, path, version, id_column, columns):
+        self.competition = competition
+        self.path = path
+        self.version = version
+        self.id_column = id_column
+        self.columns = columns
+        for values in columns.values():
+            values.setflags(write=False)
+        self._frame = None
+        self._id_index = None
+        self._derived = {}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self.columns[self.id_column])
+
+    @property
+    def ids(self):
+        return self.columns[self.id_column]
+
+    @property
+    def id_index(self):
+        """Unique pd.Index over the ids, mapping each id to its row position."""
+        if self._id_index is None:
+            import pandas as pd
+            with self._lock:
+                if self._id_index is None:
+                    self._id_index = pd.Index(self.ids, name=ID_INDEX_NAME)
+        return self._id_index
+
+    @property
+    def nbytes(self):
+        """Approximate memory held by the arrays plus the materialised frame."""
+        total = sum(_array_nbytes(values) for values in self.columns.values())
+        if self._frame is not None:
+            total += int(self._frame.memory_usage(deep=True).sum())
+        total += sum(_derived_nbytes(value) for value in self._derived.values())
+        return total
+
+    def derived(self, key, build):
+        """
+        Memoizes build(frame) under key, e.g. a parsed label matrix, so values
+        computed from the ground truth are built once per version of the file.
+        """
+        value = self._derived.get(key)
+        if value is None:
+            value = build(self.frame)
+            with self._lock:
+                value = self._derived.setdefault(key, value)
+        return value
+
+    @property
+    def frame(self):
+        """
+        A DataFrame view of the ground truth, built once and shared between requests.
+        Rows are sorted by the id column and the index holds the ids.
+        """
+        if self._frame is None:
+            import pandas as pd
+            id_index = self.id_index
+            with self._lock:
+                if self._frame is None:
+                    self._frame = pd.DataFrame(self.columns, index=id_index, copy=False)
+        return self._frame
+
+
+class GroundTruthCache:
+    """
+    Process-wide LRU cache of GroundTruth objects keyed by competition.
+    An entry is reloaded when the CSV's mtime or size changes on disk, and the
+    least recently used entries are evicted once max_bytes is exceeded.
+    """
+
+    def __init__(self, max_bytes=DEFAULT_MAX_BYTES):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def get(self, path, id_column, dtype=None):
+        path = Path(path)
+        if not path.is_file():
+            raise ValueError(f"Ground truth file does not exist at '{path}'")
+
+        competition = path.parent.name
+        version = file_version(path)
+
+        with self._lock:
+            entry = self._entries.get(competition)
+            if entry is not None and entry.version == version and entry.id_column == id_column:
+                self._entries.move_to_end(competition)
+                self.hits += 1
+                return entry
+            self.misses += 1
+
+        # Parse outside the lock so a slow load does not block other competitions.
+        entry = _load(competition, path, version, id_column, dtype)
+
+        with self._lock:
+            self._entries[competition] = entry
+            self._entries.move_to_end(competition)
+            self._evict()
+        return entry
+
+    def owner(self, frame):
+        """The cached GroundTruth whose frame this is, or None for any other DataFrame."""
+        with self._lock:
+            for entry in self._entries.values():
+                if entry._frame is frame:
+                    return entry
+        return None
+
+    def invalidate(self, competition=None):
+        """Drops one competition, or every entry when no competition is given."""
+        with self._lock:
+            if competition is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(competition, None)
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries),
+                'bytes': sum(entry.nbytes for entry in self._entries.values()),
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+                'evictions': self.evictions,
+            }
+
+    def _evict(self):
+        # Always keep the most recent entry, even if it alone exceeds the budget.
+        total = sum(entry.nbytes for entry in self._entries.values())
+        while total > self.max_bytes and len(self._entries) > 1:
+            _, evicted = self._entries.popitem(last=False)
+            total -= evicted.nbytes
+            self.evictions += 1
+
+
+def file_version(path):
+    """Identifies a specific revision of a file on disk."""
+    stat = os.stat(path)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def _array_nbytes(values):
+    if values.dtype == object:
+        import pandas as pd
+        return int(pd.Series(values, copy=False).memory_usage(deep=True, index=False))
+    return int(values.nbytes)
+
+
+def _derived_nbytes(value):
+    if isinstance(value, tuple):
+        return sum(_derived_nbytes(item) for item in value)
+    return int(getattr(value, 'nbytes', 0))
+
+
+def _load(competition, path, version, id_column, dtype):
+    from core.sidecar import load_columns
+    columns = load_columns(path, id_column, dtype)
+    return GroundTruth(competition, path, version, id_column, columns)
+
+
+GT_CACHE = GroundTruthCache()
+
+
+def load_ground_truth(path, id_column, dtype=None):
+    """Returns the cached, id-sorted ground truth DataFrame for a competition."""
+    return GT_CACHE.get(path, id_column, dtype).frame
+
@@ -0,0 +1,242 @@
+"""
+NumPy metric kernels for classification tasks.
+
+Labels come in as integer class codes and probabilities as float matrices
+already aligned to the ground truth, so every metric is a few array
+operations over data that is encoded once, instead of a call into sklearn
+that re-validates and re-encodes the labels each time. The results match
+sklearn's log_loss, accuracy_score and f1_score(average='macro') up to
+floating point rounding.
+"""
+import numpy as np
+import pandas as pd
+
+# The prediction columns used to be parsed as float64 and sklearn clips with
+# the epsilon of the input dtype, so float64's is kept even for float32 input.
+EPS = np.finfo(np.float64).eps
+
+
+def encode_labels(y_true, y_pred):
+    """
+    Integer codes for two label arrays over their shared class vocabulary.
+    Returns (true_codes, pred_codes, classes), where codes index into classes.
+    """
+    if _is_numeric(y_true) != _is_numeric(y_pred):
+        raise ValueError("Labels in y_true and y_pred should be of the same type.")
+    codes, classes = pd.factorize(np.concatenate([y_true, y_pred]), use_na_sentinel=False)
+    return codes[:len(y_true)], codes[len(y_true):], classes
+
+
+def factorize(values):
+    """(codes, classes) of a label array; missing labels are a class of their own."""
+    return pd.factorize(values, use_na_sentinel=False)
+
+
+def encode_categorical(classes, y_pred):
+    """
+    Codes of a pd.Categorical prediction over the truth's classes (from
+    factorize), extended by the classes only the prediction has. Only the
+    categories are looked up, not every row. Returns (pred_codes, classes).
+    """
+    categories = y_pred.categories
+    if _is_numeric(classes) != _is_numeric(categories):
+        raise ValueError("Labels in y_true and y_pred should be of the same type.")
+    classes = pd.Index(classes)
+    lookup = classes.get_indexer(categories)
+    unknown = lookup < 0
+    lookup[unknown] = len(classes) + np.arange(unknown.sum())
+    classes = classes.append(categories[unknown])
+    codes = y_pred.codes
+    if (codes < 0).any():
+        # Missing labels have code -1, which reads the entry appended last.
+        missing = classes.get_indexer([np.nan])[0] if classes.hasnans else -1
+        if missing < 0:
+            missing = len(classes)
+            classes = classes.append(pd.Index([np.nan]))
+        lookup = np.append(lookup, missing)
+    return lookup[codes].astype(np.int64), classes.to_numpy()
+
+
+def argmax_codes(matrix):
+    """Column index of each row's first maximum, as int64 codes."""
+    return matrix.argmax(axis=1).astype(np.int64, copy=False)
+
+
+def check_probabilities(y_prob):
+    highest, lowest = y_prob.max(), y_prob.min()
+    if np.isnan(highest):
+        raise ValueError("Input contains NaN.")
+    if highest > 1:
+        raise ValueError(f"y_prob contains values greater than 1: {highest}")
+    if lowest < 0:
+        raise ValueError(f"y_prob contains values lower than 0: {lowest}")
+
+
+# The row_log_loss_* kernels return each row's loss; the log loss is their mean.
+
+def row_log_loss_codes(true_codes, y_prob):
+    """Per-row log loss for one-hot truth given as class codes. Only the true class's probability is read."""
+    check_probabilities(y_prob)
+    p = y_prob[np.arange(len(true_codes)), true_codes].astype(np.float64)
+    return -np.log(np.clip(p, EPS, 1 - EPS))
+
+
+def row_log_loss_binary(true_codes, p_positive):
+    """Per-row log loss for 0/1 codes and the positive class probability."""
+    check_probabilities(p_positive)
+    p_positive = p_positive.astype(np.float64)
+    p = np.where(true_codes == 1, p_positive, 1 - p_positive)
+    return -np.log(np.clip(p, EPS, 1 - EPS))
+
+
+def row_log_loss_indicator(y_true, y_prob):
+    """Per-row log loss for an indicator (or soft label) truth matrix, e.g. rows with several positives."""
+    check_probabilities(y_prob)
+    p = np.clip(y_prob.astype(np.float64), EPS, 1 - EPS)
+    return -(y_true * np.log(p)).sum(axis=1)
+
+
+def class_counts(true_codes, pred_codes, n_classes):
+    """
+    The confusion matrix's diagonal and margins: (true positives, true
+    count, predicted count) per class. These are all macro F1 and accuracy
+    need, without materialising the n_classes x n_classes matrix.
+    """
+    hits = true_codes[true_codes == pred_codes]
+    return (
+        np.bincount(hits, minlength=n_classes),
+        np.bincount(true_codes, minlength=n_classes),
+        np.bincount(pred_codes, minlength=n_classes),
+    )
+
+
+def accuracy(counts):
+    true_positives, true_count, _ = counts
+    return float(true_positives.sum() / true_count.sum())
+
+
+def macro_f1(counts):
+    """Unweighted mean F1 over the classes seen in either the truth or the prediction."""
+    true_positives, true_count, pred_count = counts
+    denominator = true_count + pred_count
+    present = denominator > 0
+    return float(np.mean(2 * true_positives[present] / denominator[present]))
+
+
+class BinaryCurve:
+    """
+    Confusion counts of a binary prediction at every distinct score, from a
+    single sort. thresholds descend, and tps[i] / fps[i] count the positive
+    and negative rows scored >= thresholds[i]. ROC-AUC, average precision
+    and accuracy/F1 at any threshold are then cumulative-sum lookups.
+    """
+
+    def __init__(self, true_codes, scores):
+        check_probabilities(scores)
+        # Ties are grouped below, so an unstable (faster) sort is fine.
+        self.order = np.argsort(scores)[::-1]
+        sorted_scores = scores[self.order]
+        # The last row of each run of equal scores closes that threshold.
+        self.distinct = np.r_[np.flatnonzero(np.diff(sorted_scores)), len(sorted_scores) - 1]
+        self.sorted_truth = true_codes[self.order]
+        self.thresholds = sorted_scores[self.distinct]
+        self.tps = np.cumsum(self.sorted_truth, dtype=np.int64)[self.distinct]
+        self.fps = self.distinct + 1 - self.tps
+        self.positives = int(self.tps[-1])
+        self.negatives = int(self.fps[-1])
+
+    @classmethod
+    def from_histogram(cls, negative, positive):
+        """
+        Curve of scores counted into equal-width bins over [0, 1], e.g. when
+        they were streamed rather than kept. Each bin's lower edge is its
+        threshold, so scores sharing a bin count as ties; a threshold on a
+        bin edge, like 0.5, still gives exact counts.
+        """
+        occupied = np.flatnonzero(negative + positive)[::-1]
+        curve = cls.__new__(cls)
+        curve.order = curve.distinct = curve.sorted_truth = None
+        curve.thresholds = occupied / len(positive)
+        curve.tps = np.cumsum(positive[occupied])
+        curve.fps = np.cumsum(negative[occupied])
+        curve.positives = int(curve.tps[-1])
+        curve.negatives = int(curve.fps[-1])
+        return curve
+
+    def _check_both_classes(self):
+        if not self.positives or not self.negatives:
+            raise ValueError("Only one class is present in y_true. ROC AUC score is not defined in that case.")
+
+    def roc_auc(self):
+        self._check_both_classes()
+        return float(roc_auc_from_counts(self.tps, self.fps))
+
+    def average_precision(self):
+        """Area under the precision-recall curve as a step function, like sklearn's average_precision_score."""
+        self._check_both_classes()
+        return float(average_precision_from_counts(self.tps, self.fps))
+
+    def resampled_counts(self, weights):
+        """
+        (tps, fps) of shape (b, thresholds) for b weightings of the rows, e.g.
+        bootstrap resample counts, reusing this curve's sort order.
+        """
+        weights = weights[:, self.order]
+        positive = np.cumsum(weights * self.sorted_truth, axis=1)
+        total = np.cumsum(weights, axis=1)
+        return positive[:, self.distinct], (total - positive)[:, self.distinct]
+
+    def f1(self):
+        """F1 of the positive class at every threshold."""
+        return 2 * self.tps / (self.positives + self.tps + self.fps)
+
+    def accuracy(self):
+        """Accuracy at every threshold."""
+        return (self.tps + self.negatives - self.fps) / (self.positives + self.negatives)
+
+    def best_f1(self):
+        """{'threshold', 'f1', 'accuracy'} where the positive class F1 peaks; rows scored >= threshold are positive."""
+        f1 = self.f1()
+        best = int(np.argmax(f1))
+        return {
+            'threshold': float(self.thresholds[best]),
+            'f1': float(f1[best]),
+            'accuracy': float(self.accuracy()[best]),
+        }
+
+    def class_counts_at(self, threshold):
+        """class_counts() for classes (0, 1) when rows scored >= threshold are predicted positive."""
+        above = np.searchsorted(-self.thresholds, -threshold, side='right')
+        tp = int(self.tps[above - 1]) if above else 0
+        fp = int(self.fps[above - 1]) if above else 0
+        n = self.positives + self.negatives
+        return (
+            np.array([self.negatives - fp, tp]),
+            np.array([self.negatives, self.positives]),
+            np.array([n - tp - fp, tp + fp]),
+        )
+
+
+def roc_auc_from_counts(tps, fps):
+    """ROC-AUC along the last axis of cumulative counts; NaN where a class is absent."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tpr = _prepend_zero(tps) / tps[..., -1:]
+        fpr = _prepend_zero(fps) / fps[..., -1:]
+    return np.trapezoid(tpr, fpr, axis=-1)
+
+
+def average_precision_from_counts(tps, fps):
+    """Average precision along the last axis of cumulative counts; NaN without positives."""
+    with np.errstate(divide='ignore', invalid='ignore'):
+        predicted = tps + fps
+        precision = np.where(predicted > 0, tps / predicted, 0.0)
+        recall_gain = np.diff(_prepend_zero(tps), axis=-1) / tps[..., -1:]
+    return np.sum(recall_gain * precision, axis=-1)
+
+
+def _prepend_zero(counts):
+    return np.concatenate([np.zeros(counts.shape[:-1] + (1,), dtype=counts.dtype), counts], axis=-1)
+
+
+def _is_numeric(values):
+    return np.asarray(values).dtype.kind in 'biuf'
@@ -0,0 +1,201 @@
+"""
+Sparse multi-label sets and the metrics computed on them.
+
+Space-separated label strings are parsed in one vectorized pass into a CSR
+layout (row pointers plus label codes), so memory and time grow with the
+number of (row, label) pairs rather than rows x vocabulary. Metrics work on
+per-label and per-row counts of true, predicted and matching pairs.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+import pandas as pd
+
+# Separates rows when all label strings are split in one go; never a real label.
+ROW_BREAK = '\x01'
+
+
+@dataclass(frozen=True, eq=False)
+class LabelMatrix:
+    """
+    CSR-style label sets: the codes of row i are indices[indptr[i]:indptr[i + 1]],
+    sorted and unique. Codes index into vocabulary.
+    """
+    indptr: np.ndarray
+    indices: np.ndarray
+    vocabulary: pd.Index
+
+    def __len__(self):
+        return len(self.indptr) - 1
+
+    @property
+    def rows(self):
+        """Row number of every stored (row, label) pair."""
+        return np.repeat(np.arange(len(self)), np.diff(self.indptr))
+
+    @property
+    def nbytes(self):
+        return int(self.indptr.nbytes + self.indices.nbytes + self.vocabulary.memory_usage(deep=True))
+
+    def keys(self, n_labels):
+        """Sorted int64 keys row * n_labels + label, one per pair."""
+        return self.rows * np.int64(n_labels) + self.indices
+
+
+def from_dense(matrix, vocabulary):
+    """LabelMatrix of the nonzero cells of a dense rows x labels indicator matrix."""
+    rows, labels = np.nonzero(matrix)
+    counts = np.bincount(rows, minlength=len(matrix))
+    return LabelMatrix(
+        indptr=np.r_[0, np.cumsum(counts)].astype(np.int64),
+        indices=labels.astype(np.int64),
+        vocabulary=pd.Index(vocabulary),
+    )
+
+
+def parse_label_strings(values, vocabulary=None):
+    """
+    Parses space-separated label strings into a LabelMatrix. Labels missing
+    from the given vocabulary are appended to it, so the result's vocabulary
+    is the union of both sides when parsing a prediction against the truth's.
+    Empty or missing strings are rows without labels.
+    """
+    strings = pd.Series(values, copy=False).fillna('').astype(str).tolist()
+    rows, tokens = _tokenize(strings)
+
+    if vocabulary is None:
+        codes, labels = pd.factorize(tokens)
+        vocabulary = pd.Index(labels)
+    else:
+        codes = vocabulary.get_indexer(tokens)
+        unknown = codes < 0
+        if unknown.any():
+            new_codes, new_labels = pd.factorize(tokens[unknown])
+            codes[unknown] = len(vocabulary) + new_codes
+            vocabulary = vocabulary.append(pd.Index(new_labels))
+
+    # One sort orders the pairs by row then label and drops labels repeated within a row.
+    n_labels = max(len(vocabulary), 1)
+    keys = np.sort(rows * n_labels + codes)
+    first = np.ones(len(keys), dtype=bool)
+    first[1:] = keys[1:] != keys[:-1]
+    keys = keys[first]
+    counts = np.bincount(keys // n_labels, minlength=len(strings))
+    return LabelMatrix(
+        indptr=np.r_[0, np.cumsum(counts)].astype(np.int64),
+        indices=(keys % n_labels).astype(np.int64),
+        vocabulary=vocabulary,
+    )
+
+
+def _tokenize(strings):
+    """
+    (row of each token, tokens) for whitespace-separated strings. The rows
+    are joined around a marker token and split in a single str.split call,
+    which is far cheaper than splitting row by row.
+    """
+    if not strings:
+        return np.empty(0, dtype=np.int64), np.empty(0, dtype=object)
+    tokens = np.array(f" {ROW_BREAK} ".join(strings).split(), dtype=object)
+    breaks = tokens == ROW_BREAK
+    if breaks.sum() != len(strings) - 1:
+        # A label that is itself the marker; split row by row instead.
+        exploded = pd.Series(strings).str.split().explode().dropna()
+        return exploded.index.to_numpy(dtype=np.int64), exploded.to_numpy(dtype=object)
+    return np.cumsum(breaks)[~breaks], tokens[~breaks]
+
+
+@dataclass(frozen=True, eq=False)
+class Counts:
+    """Matching, true and predicted pair counts, per label and per row."""
+    label_tp: np.ndarray
+    label_true: np.ndarray
+    label_pred: np.ndarray
+    row_tp: np.ndarray
+    row_true: np.ndarray
+    row_pred: np.ndarray
+
+    @property
+    def n_labels(self):
+        return len(self.label_tp)
+
+    @property
+    def n_rows(self):
+        return len(self.row_tp)
+
+    @property
+    def exact_rows(self):
+        """Rows whose predicted label set equals the true one."""
+        return int(((self.row_tp == self.row_true) & (self.row_tp == self.row_pred)).sum())
+
+
+@dataclass(frozen=True)
+class Totals:
+    """
+    The row-summed part of Counts, which is all the metrics below read.
+    Totals of separate row chunks add up, given a shared label order.
+    """
+    label_tp: np.ndarray
+    label_true: np.ndarray
+    label_pred: np.ndarray
+    n_rows: int
+    exact_rows: int
+
+    @property
+    def n_labels(self):
+        return len(self.label_tp)
+
+
+def matching_pairs(y_true, y_pred):
+    """Returns (rows, labels) of the pairs present in both label matrices."""
+    n_labels = len(y_pred.vocabulary)
+    true_keys = y_true.keys(n_labels)
+    pred_keys = y_pred.keys(n_labels)
+    # Both key arrays are sorted, so membership is a binary search rather than a set intersection.
+    positions = np.searchsorted(true_keys, pred_keys)
+    positions[positions == len(true_keys)] = 0
+    hits = pred_keys[true_keys[positions] == pred_keys] if len(true_keys) else pred_keys[:0]
+    return hits // n_labels, hits % n_labels
+
+
+def counts(y_true, y_pred):
+    """Counts for a truth matrix and a prediction parsed against its vocabulary."""
+    n_rows, n_labels = len(y_true), len(y_pred.vocabulary)
+    hit_rows, hit_labels = matching_pairs(y_true, y_pred)
+    return Counts(
+        label_tp=np.bincount(hit_labels, minlength=n_labels),
+        label_true=np.bincount(y_true.indices, minlength=n_labels),
+        label_pred=np.bincount(y_pred.indices, minlength=n_labels),
+        row_tp=np.bincount(hit_rows, minlength=n_rows),
+        row_true=np.diff(y_true.indptr),
+        row_pred=np.diff(y_pred.indptr),
+    )
+
+
+# The metrics take either Counts or Totals.
+
+def subset_accuracy(c):
+    """Share of rows whose predicted label set equals the true one."""
+    return c.exact_rows / c.n_rows
+
+
+def macro_f1(c):
+    """Unweighted mean F1 over the union vocabulary."""
+    denominator = c.label_true + c.label_pred
+    with np.errstate(divide='ignore', invalid='ignore'):
+        f1 = np.where(denominator > 0, 2 * c.label_tp / denominator, 0.0)
+    return float(f1.mean()) if len(f1) else 0.0
+
+
+def micro_f1(c):
+    denominator = c.label_true.sum() + c.label_pred.sum()
+    return float(2 * c.label_tp.sum() / denominator) if denominator else 0.0
+
+
+def hamming_loss(c):
+    """Share of (row, label) cells, over the union vocabulary, that are predicted wrongly."""
+    cells = c.n_rows * c.n_labels
+    if not cells:
+        return 0.0
+    wrong = c.label_true.sum() + c.label_pred.sum() - 2 * c.label_tp.sum()
+    return float(wrong / cells)
@@ -0,0 +1,83 @@
+"""
+Process-pool fan-out for scoring several submissions to one competition.
+
+Only the prediction bytes travel to the workers. Each worker loads the
+ground truth through its own GroundTruthCache, which memory-maps the
+columnar sidecar, so the truth arrays are shared page-cache pages rather
+than a pickled copy per task. Each worker's telemetry records come back
+with its outcome and are added to the web process's metrics.
+"""
+import io
+import multiprocessing
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+
+from core import telemetry
+from core.scoring import evaluator_for, ground_truth_path, score_submission
+from core.uploads import DEFAULT_MAX_DECOMPRESSED_BYTES
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool(max_workers):
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            # 'spawn' keeps workers independent of the threads running in the web process.
+            _pool = ProcessPoolExecutor(max_workers=max_workers, mp_context=multiprocessing.get_context('spawn'))
+        return _pool
+
+
+def _reset_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+def _score_payload(
+    competitions_dir, evaluators_package, competition_name, payload, bootstrap_config, streaming_config, max_decompressed_bytes,
+):
+    """Worker entry point. Returns ('scores', dict) or ('error', message), then the telemetry records."""
+    with telemetry.capture() as records:
+        try:
+            return 'scores', score_submission(
+                competitions_dir, evaluators_package, competition_name, io.BytesIO(payload), bootstrap_config,
+                streaming_config, max_decompressed_bytes,
+            ), records
+        except Exception as e:
+            return 'error', str(e), records
+
+
+def score_in_pool(
+    competitions_dir, evaluators_package, competition_name, payloads, max_workers, bootstrap_config=None, streaming_config=None,
+    max_decompressed_bytes=DEFAULT_MAX_DECOMPRESSED_BYTES,
+):
+    """
+    Scores each payload (the raw bytes of a prediction CSV, possibly compressed) on the process pool
+    and returns the ('scores' | 'error', value) outcomes in the order given.
+    """
+    # Build the sidecar once here rather than racing to build it in every worker.
+    evaluator_for(evaluators_package, competition_name).read_ground_truth(
+        ground_truth_path(competitions_dir, competition_name)
+    )
+
+    pool = _get_pool(max_workers)
+    n = len(payloads)
+    try:
+        results = list(pool.map(
+            _score_payload,
+            [competitions_dir] * n, [evaluators_package] * n, [competition_name] * n, payloads,
+            [bootstrap_config] * n, [streaming_config] * n, [max_decompressed_bytes] * n,
+        ))
+    except BrokenProcessPool:
+        _reset_pool()
+        return [('error', "The evaluation worker process crashed.")] * n
+    outcomes = []
+    for status, value, records in results:
+        telemetry.record_evaluations(records)
+        outcomes.append((status, value))
+    return outcomes
@@ -0,0 +1,130 @@
+"""
+Opt-in profiling of one request or job.
+
+profile(mode) runs a block under a stack sampler, which records the
+profiled thread's stack every SAMPLE_INTERVAL seconds as collapsed stacks
+(the input of flamegraph.pl and speedscope). In 'cprofile' mode cProfile
+also traces every call, for exact call counts and a pstats file, at the
+cost of slowing the block down. Nothing in this module runs unless a
+request asks for it.
+"""
+import cProfile
+import collections
+import contextlib
+import contextvars
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+
+MODES = ('sample', 'cprofile')
+SAMPLE_INTERVAL = 0.005
+
+# Set while a profile is being taken in this context.
+_active = contextvars.ContextVar('profiling', default=False)
+
+
+def active():
+    """Whether the calling code is being profiled; work is then kept in this thread."""
+    return _active.get()
+
+
+class StackSampler:
+    """Counts the stacks seen in one thread, root first, on a background thread."""
+
+    def __init__(self, thread_id, interval=SAMPLE_INTERVAL):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.counts = collections.Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name='stack-sampler', daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is not None:
+                self.counts[_stack(frame)] += 1
+
+
+def _stack(frame):
+    labels = []
+    while frame is not None:
+        code = frame.f_code
+        module = frame.f_globals.get('__name__') or os.path.basename(code.co_filename)
+        labels.append(f"{code.co_name} ({module}:{code.co_firstlineno})")
+        frame = frame.f_back
+    return tuple(reversed(labels))
+
+
+class Profile:
+    """The outcome of profile(): samples, and a cProfile.Profile in 'cprofile' mode."""
+
+    def __init__(self, mode):
+        self.mode = mode
+        self.seconds = None
+        self.samples = collections.Counter()
+        self.profiler = None
+
+    def collapsed(self):
+        """One 'frame;frame;frame count' line per distinct stack."""
+        return ''.join(f"{';'.join(stack)} {count}\n" for stack, count in sorted(self.samples.items()))
+
+    def dump_stats(self, path):
+        """Writes the pstats file; False when there is none."""
+        if self.profiler is None:
+            return False
+        self.profiler.dump_stats(path)
+        return True
+
+    def top(self, limit=20):
+        """The functions with the most cumulative time, as pstats prints them, or from the samples."""
+        if self.profiler is not None:
+            out = io.StringIO()
+            pstats.Stats(self.profiler, stream=out).sort_stats('cumulative').print_stats(limit)
+            return out.getvalue()
+        inclusive = collections.Counter()
+        for stack, count in self.samples.items():
+            for label in set(stack):
+                inclusive[label] += count
+        total = sum(self.samples.values()) or 1
+        return ''.join(
+            f"{count / total:7.1%}  {count:6d}  {label}\n" for label, count in inclusive.most_common(limit)
+        )
+
+
+@contextlib.contextmanager
+def profile(mode):
+    """Profiles the block in the calling thread; yields the Profile, filled in on exit."""
+    if mode not in MODES:
+        raise ValueError(f"Unknown profiling mode '{mode}'. Use one of: {', '.join(MODES)}")
+    result = Profile(mode)
+    sampler = StackSampler(threading.get_ident())
+    if mode == 'cprofile':
+        result.profiler = cProfile.Profile()
+    token = _active.set(True)
+    started = time.perf_counter()
+    sampler.start()
+    if result.profiler is not None:
+        try:
+            result.profiler.enable()
+        except ValueError:
+            # Python 3.12+ allows one deterministic profiler at a time; the samples remain.
+            result.profiler = None
+    try:
+        yield result
+    finally:
+        if result.profiler is not None:
+            result.profiler.disable()
+        sampler.stop()
+        result.seconds = time.perf_counter() - started
+        result.samples = sampler.counts
+        _active.reset(token)
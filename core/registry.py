@@ -0,0 +1,163 @@
+"""
+Registry of the evaluator modules, built once when a web worker starts.
+
+load() imports the shared scoring stack and then every competition's
+evaluator, timing each import, checks that each module provides what
+scoring needs and can also load each ground truth into the cache, so the
+first request to a competition no longer pays for any of it. The timings
+and any problems are logged and kept for /healthz.
+
+Cold import times in a fresh interpreter are printed with:
+
+    python -m core.registry [competitions_dir] [--warm]
+"""
+import importlib
+import logging
+import pkgutil
+import sys
+import threading
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+
+from core.scoring import GROUND_TRUTH_FILENAME, evaluator_for, ground_truth_path
+
+logger = logging.getLogger(__name__)
+
+# What every evaluator module must provide.
+REQUIRED_ATTRIBUTES = ('SPEC', 'read_ground_truth', 'validate_and_read_inputs', 'evaluate_predictions', 'evaluate_stream')
+
+# Imported, and timed, before any evaluator, so per-module times leave out pandas and NumPy.
+SHARED_MODULES = ('core.engine', 'core.streaming')
+
+
+@dataclass
+class EvaluatorStatus:
+    import_seconds: float = None
+    warm_seconds: float = None
+    error: str = None
+
+
+class EvaluatorRegistry:
+    """
+    Tracks the preload of a set of competitions' evaluators. state is
+    'idle', 'loading' or 'ready'. Scoring still goes through
+    core.scoring.evaluator_for, whose cache load() fills.
+    """
+
+    def __init__(self, evaluators_package, competitions_dir):
+        self.evaluators_package = evaluators_package
+        self.competitions_dir = competitions_dir
+        self.state = 'idle'
+        self.shared_import_seconds = None
+        self.load_seconds = None
+        self.statuses = {}
+        self.unused_modules = []
+
+    def load(self, competitions, warm_ground_truth=False, check_unused=True):
+        """
+        Imports the evaluators of competitions. With check_unused, evaluator
+        modules outside competitions are reported as having no competition
+        directory; pass False when loading only a subset.
+        """
+        self.state = 'loading'
+        started = time.perf_counter()
+        for name in SHARED_MODULES:
+            importlib.import_module(name)
+        self.shared_import_seconds = time.perf_counter() - started
+        logger.info("Shared scoring modules imported in %.3fs", self.shared_import_seconds)
+
+        for name in competitions:
+            self.statuses[name] = self._load_one(name, warm_ground_truth)
+        if check_unused:
+            self.unused_modules = sorted(set(self.available_modules()) - set(competitions))
+            for name in self.unused_modules:
+                logger.warning("Evaluator module '%s' has no competition directory", name)
+
+        self.load_seconds = time.perf_counter() - started
+        self.state = 'ready'
+        return self
+
+    def start(self, competitions, warm_ground_truth=False):
+        """Runs load() on a daemon thread, so the app serves requests meanwhile."""
+        self.state = 'loading'
+        thread = threading.Thread(
+            target=self.load, args=(competitions, warm_ground_truth), name='evaluator-preload', daemon=True
+        )
+        thread.start()
+        return thread
+
+    def _load_one(self, name, warm_ground_truth):
+        status = EvaluatorStatus()
+        started = time.perf_counter()
+        try:
+            module = evaluator_for(self.evaluators_package, name)
+        except Exception as e:
+            status.error = f"Import failed: {e}"
+            logger.error("Evaluator '%s' failed to import: %s", name, e)
+            return status
+        status.import_seconds = time.perf_counter() - started
+
+        missing = [attribute for attribute in REQUIRED_ATTRIBUTES if not hasattr(module, attribute)]
+        if missing:
+            status.error = f"Evaluator is missing {', '.join(missing)}"
+            logger.error("Evaluator '%s' is missing %s", name, ', '.join(missing))
+            return status
+
+        if warm_ground_truth:
+            started = time.perf_counter()
+            try:
+                module.read_ground_truth(ground_truth_path(self.competitions_dir, name))
+            except ValueError as e:
+                status.error = str(e)
+                logger.error("Ground truth of '%s' failed to load: %s", name, e)
+            status.warm_seconds = time.perf_counter() - started
+
+        logger.info(
+            "Evaluator '%s' imported in %.3fs%s", name, status.import_seconds,
+            '' if status.warm_seconds is None else f", ground truth loaded in {status.warm_seconds:.3f}s",
+        )
+        return status
+
+    def available_modules(self):
+        package = importlib.import_module(self.evaluators_package)
+        return [info.name for info in pkgutil.iter_modules(package.__path__) if not info.name.startswith('_')]
+
+    def ready(self):
+        """Loaded, with every evaluator usable."""
+        return self.state == 'ready' and not any(status.error for status in self.statuses.values())
+
+    def report(self):
+        return {
+            'state': self.state,
+            'shared_import_seconds': self.shared_import_seconds,
+            'load_seconds': self.load_seconds,
+            'evaluators': {name: asdict(status) for name, status in self.statuses.items()},
+            'unused_modules': self.unused_modules,
+        }
+
+
+def main():
+    args = [arg for arg in sys.argv[1:] if arg != '--warm']
+    competitions_dir = Path(args[0]) if args else Path('competitions')
+    competitions = sorted(
+        p.name for p in competitions_dir.iterdir() if (p / GROUND_TRUTH_FILENAME).is_file()
+    )
+    registry = EvaluatorRegistry('evaluators', competitions_dir)
+    registry.load(competitions, warm_ground_truth='--warm' in sys.argv[1:])
+
+    print(f"shared modules: {registry.shared_import_seconds * 1000:.1f}ms")
+    for name, status in registry.statuses.items():
+        line = f"{name}: "
+        line += "-" if status.import_seconds is None else f"{status.import_seconds * 1000:.1f}ms"
+        if status.warm_seconds is not None:
+            line += f", ground truth {status.warm_seconds * 1000:.1f}ms"
+        if status.error:
+            line += f" ({status.error})"
+        print(line)
+    for name in registry.unused_modules:
+        print(f"{name}: no competition directory")
+
+
+if __name__ == '__main__':
+    main()
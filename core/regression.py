@@ -0,0 +1,84 @@
+"""
+Vectorized regression metrics over every target column at once.
+
+Everything that depends on the ground truth alone (the float matrix, column
+means and centred sums of squares, and their log1p counterparts) is
+computed once per ground truth version as TruthMoments. Scoring a
+prediction is then one pass over its (rows, targets) error matrix, which
+yields R2, RMSE and MAE for all columns together.
+"""
+from dataclasses import dataclass
+
+import numpy as np
+
+
+@dataclass(frozen=True, eq=False)
+class TruthMoments:
+    """Ground truth matrix with its per-column mean and centred sum of squares."""
+    values: np.ndarray
+    mean: np.ndarray
+    total_squares: np.ndarray
+
+    @property
+    def nbytes(self):
+        return int(self.values.nbytes + self.mean.nbytes + self.total_squares.nbytes)
+
+
+def truth_moments(values):
+    values = np.asarray(values, dtype=np.float64)
+    mean = values.mean(axis=0)
+    total_squares = ((values - mean) ** 2).sum(axis=0)
+    values.setflags(write=False)
+    return TruthMoments(values=values, mean=mean, total_squares=total_squares)
+
+
+def log_truth_moments(moments):
+    """
+    TruthMoments of log1p(truth) for the columns where it is defined, i.e.
+    every truth value is above -1. Returns (column mask, moments).
+    """
+    columns = (moments.values > -1).all(axis=0)
+    return columns, truth_moments(np.log1p(moments.values[:, columns]))
+
+
+def scores(moments, y_pred):
+    """{'r2', 'rmse', 'mae'}: one value per target column, from a single error matrix."""
+    errors = y_pred - moments.values
+    return scores_from_sums(moments, *error_sums(errors), len(errors))
+
+
+def error_sums(errors):
+    """Per-column (squared, absolute) error sums; the sums of separate row chunks add up."""
+    return np.einsum('ij,ij->j', errors, errors), np.abs(errors).sum(axis=0)
+
+
+def scores_from_sums(moments, squared_errors, absolute_errors, n):
+    return {
+        'r2': r2_from_sums(squared_errors, moments.total_squares),
+        'rmse': np.sqrt(squared_errors / n),
+        'mae': absolute_errors / n,
+    }
+
+
+def log_predictions(log_columns, y_pred):
+    """log1p of the prediction columns selected by log_truth_moments()."""
+    y_pred = y_pred[:, log_columns]
+    if (y_pred <= -1).any():
+        raise ValueError("Log-space metrics cannot be used when predictions contain values less than or equal to -1.")
+    return np.log1p(y_pred)
+
+
+def log_scores(log_columns, log_moments, y_pred):
+    """{'rmsle', 'r2'} in log1p space for the columns selected by log_truth_moments()."""
+    result = scores(log_moments, log_predictions(log_columns, y_pred))
+    return {'rmsle': result['rmse'], 'r2': result['r2']}
+
+
+def r2_from_sums(squared_errors, total_squares):
+    """
+    1 - SSE / SST, scoring a constant truth column as 1 when it is matched
+    exactly and 0 otherwise, like sklearn's r2_score.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        r2 = 1 - squared_errors / total_squares
+    return np.where(total_squares > 0, r2, np.where(squared_errors > 0, 0.0, 1.0))
@@ -0,0 +1,62 @@
+"""
+Exact column dtypes for prediction files.
+
+Every competition's schema comes from its spec: the id column's declared
+dtype, then one dtype per label column fixed by the task (float32
+probabilities, float64 regression targets, categorical class labels, ...).
+Predictions are parsed with it, so no column is type-inferred and only the
+needed columns are read. Whole files are parsed by pyarrow's
+multi-threaded CSV reader (pyarrow is in requirements.txt); chunked reads,
+any file it rejects, and installs without it go through pandas' C parser,
+which the validation module uses to locate the offending value.
+"""
+import importlib.util
+from dataclasses import dataclass
+
+import pandas as pd
+
+from core.uploads import read_prediction_csv
+
+HAS_PYARROW = importlib.util.find_spec('pyarrow') is not None
+
+
+@dataclass(frozen=True)
+class Schema:
+    """{column: dtype} of the prediction columns to read, id column first."""
+    dtypes: dict
+
+    @property
+    def columns(self):
+        return list(self.dtypes)
+
+    @property
+    def id_column(self):
+        return self.columns[0]
+
+    @property
+    def label_columns(self):
+        return self.columns[1:]
+
+    def numeric_columns(self):
+        return [
+            column for column, dtype in self.dtypes.items()
+            if pd.api.types.is_numeric_dtype(pd.api.types.pandas_dtype(dtype))
+        ]
+
+    def describe(self):
+        """JSON-ready [{'name', 'dtype'}] in column order."""
+        return [{'name': column, 'dtype': str(dtype)} for column, dtype in self.dtypes.items()]
+
+
+def read_fast(source, schema):
+    """
+    The whole prediction parsed by pyarrow with the schema's dtypes, or None
+    when pyarrow is not installed or cannot parse it; the caller then falls
+    back to the C parser, which reports exactly what is wrong.
+    """
+    if not HAS_PYARROW:
+        return None
+    try:
+        return read_prediction_csv(source, engine='pyarrow', usecols=schema.columns, dtype=schema.dtypes)
+    except ValueError:
+        return None
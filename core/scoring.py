@@ -0,0 +1,86 @@
+import functools
+import importlib
+from pathlib import Path
+
+from core import telemetry
+from core.uploads import DEFAULT_MAX_DECOMPRESSED_BYTES, open_prediction, source_size
+
+GROUND_TRUTH_FILENAME = 'test_ground_truth.csv'
+
+
+def ground_truth_path(competitions_dir, competition_name):
+    return Path(competitions_dir) / competition_name / GROUND_TRUTH_FILENAME
+
+
+@functools.lru_cache(maxsize=None)
+def evaluator_for(evaluators_package, competition_name):
+    """Imports a competition's evaluator module once per process."""
+    return importlib.import_module(f"{evaluators_package}.{competition_name}")
+
+
+def prediction_schema(competitions_dir, evaluators_package, competition_name):
+    """The schema.Schema that predictions for a competition are parsed with."""
+    evaluator = evaluator_for(evaluators_package, competition_name)
+    df_truth = evaluator.read_ground_truth(ground_truth_path(competitions_dir, competition_name))
+    return evaluator.SPEC.prediction_schema(evaluator.SPEC.labels_for(df_truth))
+
+
+def score_submission(
+    competitions_dir, evaluators_package, competition_name, prediction_source, bootstrap_config=None, streaming_config=None,
+    max_decompressed_bytes=DEFAULT_MAX_DECOMPRESSED_BYTES,
+):
+    """
+    Runs a competition's evaluator against one prediction source (a path or a
+    binary file-like object) and returns its scores dict, with confidence
+    intervals when a bootstrap_config is given. Sources large enough for the
+    streaming_config are scored chunk by chunk instead of being read whole,
+    unless intervals were asked for, since those need every row at once.
+    gzip, zstd and zip sources are decompressed on the fly, up to
+    max_decompressed_bytes. Stage timings go to core.telemetry.
+    """
+    evaluator_module = evaluator_for(evaluators_package, competition_name)
+    uploaded_bytes = source_size(prediction_source)
+    prediction_source = open_prediction(prediction_source, max_decompressed_bytes)
+    mode = scoring_mode(prediction_source, bootstrap_config, streaming_config)
+    with telemetry.evaluation(competition_name, mode=mode, bytes=uploaded_bytes, bootstrap=bootstrap_config is not None):
+        if mode == 'stream':
+            return evaluator_module.evaluate_stream(
+                ground_truth_path(competitions_dir, competition_name), prediction_source, streaming_config.chunk_rows
+            )
+        df_gt, df_pred = evaluator_module.validate_and_read_inputs(
+            ground_truth_path(competitions_dir, competition_name), prediction_source
+        )
+        return evaluator_module.evaluate_predictions(df_gt, df_pred, bootstrap_config)
+
+
+def scoring_mode(prediction_source, bootstrap_config=None, streaming_config=None):
+    """'stream' if score_submission scores the opened prediction_source chunk by chunk, else 'full'."""
+    if streaming_config is not None and bootstrap_config is None and streaming_config.applies_to(prediction_source):
+        return 'stream'
+    return 'full'
+
+
+def compare_submissions(
+    competitions_dir, evaluators_package, competition_name, prediction_sources, bootstrap_config,
+    max_decompressed_bytes=DEFAULT_MAX_DECOMPRESSED_BYTES,
+):
+    """
+    Validates each of prediction_sources ({submission name: path or binary
+    file-like object}) like score_submission and compares them pairwise
+    with core.compare. A file that fails validation raises its ValueError,
+    prefixed with the submission's name.
+    """
+    from core import compare
+
+    evaluator_module = evaluator_for(evaluators_package, competition_name)
+    path = ground_truth_path(competitions_dir, competition_name)
+    with telemetry.evaluation(competition_name, mode='compare', submissions=len(prediction_sources)):
+        predictions = {}
+        for name, source in prediction_sources.items():
+            try:
+                df_gt, predictions[name] = evaluator_module.validate_and_read_inputs(
+                    path, open_prediction(source, max_decompressed_bytes)
+                )
+            except ValueError as e:
+                raise ValueError(f"{name}: {e}")
+        return compare.compare_predictions(evaluator_module.SPEC, df_gt, predictions, bootstrap_config)
@@ -0,0 +1,212 @@
+"""
+Binary columnar sidecars for ground truth CSVs.
+
+Each competition's test_ground_truth.csv is compiled into a directory of
+.npy files (one per column, already sorted by the id column) plus a small
+manifest.json. Loading memory-maps the .npy files, so several gunicorn
+workers share the same page-cache pages instead of each parsing the CSV.
+
+Build every sidecar ahead of time with:
+
+    python -m core.sidecar [competitions_dir]
+"""
+import importlib
+import json
+import os
+import sys
+import tempfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+FORMAT_VERSION = 1
+MANIFEST_NAME = 'manifest.json'
+
+
+def sidecar_dir(csv_path):
+    csv_path = Path(csv_path)
+    return csv_path.with_name(f"{csv_path.stem}.columnar")
+
+
+def load_columns(csv_path, id_column, dtype=None):
+    """
+    Returns the id-sorted columns of a ground truth CSV as read-only arrays.
+    The sidecar is (re)built first if it is missing or older than the CSV.
+    """
+    csv_path = Path(csv_path)
+    manifest = _read_manifest(csv_path)
+    if not _is_fresh(manifest, csv_path, id_column, dtype):
+        try:
+            manifest = build(csv_path, id_column, dtype)
+        except OSError:
+            # Read-only deployments fall back to parsing the CSV in memory.
+            return parse_csv_columns(csv_path, id_column, dtype)
+    return _map_columns(sidecar_dir(csv_path), manifest)
+
+
+def build(csv_path, id_column, dtype=None):
+    """Compiles a ground truth CSV into its columnar sidecar and returns the manifest."""
+    csv_path = Path(csv_path)
+    stat = os.stat(csv_path)
+    columns = parse_csv_columns(csv_path, id_column, dtype)
+
+    out_dir = sidecar_dir(csv_path)
+    out_dir.mkdir(exist_ok=True)
+    # Column files are tagged with the source version so a rebuild never
+    # overwrites pages that another worker may still have mapped.
+    tag = f"{stat.st_mtime_ns}-{stat.st_size}"
+
+    entries = []
+    for i, (name, values) in enumerate(columns.items()):
+        entry = {'name': name, 'file': f"{tag}.{i}.npy", 'nulls': None}
+        if values.dtype == object:
+            nulls = pd.isna(values)
+            if nulls.any():
+                entry['nulls'] = f"{tag}.{i}.nulls.npy"
+                _atomic_save(out_dir / entry['nulls'], nulls)
+            values = np.where(nulls, '', values).astype(str)
+            entry['kind'] = 'str'
+        else:
+            entry['kind'] = 'num'
+        _atomic_save(out_dir / entry['file'], values)
+        entries.append(entry)
+
+    manifest = {
+        'format_version': FORMAT_VERSION,
+        'source': csv_path.name,
+        'source_mtime_ns': stat.st_mtime_ns,
+        'source_size': stat.st_size,
+        'id_column': id_column,
+        'dtype': _dtype_key(dtype),
+        'rows': len(columns[id_column]),
+        'columns': entries,
+    }
+    _atomic_write_text(out_dir / MANIFEST_NAME, json.dumps(manifest, indent=2))
+    _remove_stale_files(out_dir, manifest)
+    return manifest
+
+
+def parse_csv_columns(csv_path, id_column, dtype=None):
+    """Parses a ground truth CSV into compact, id-sorted NumPy columns."""
+    try:
+        df = pd.read_csv(csv_path, dtype=dtype)
+    except Exception as e:
+        raise ValueError(f"Could not read the ground truth file '{csv_path}'. Error: {e}")
+
+    if id_column not in df.columns:
+        raise ValueError(f"Ground truth file is missing the id column '{id_column}'.")
+
+    df = df.sort_values(id_column, kind='stable').reset_index(drop=True)
+    return {name: _compact(df[name]) for name in df.columns}
+
+
+def _compact(series):
+    """Downcasts a column to the smallest dtype that represents it losslessly."""
+    if pd.api.types.is_bool_dtype(series):
+        return series.to_numpy(dtype=np.int8)
+    if pd.api.types.is_integer_dtype(series):
+        return pd.to_numeric(series, downcast='integer').to_numpy()
+    if pd.api.types.is_float_dtype(series):
+        values = series.to_numpy()
+        if series.notna().all() and np.array_equal(values, np.round(values)):
+            as_int = pd.to_numeric(series, downcast='integer')
+            if pd.api.types.is_integer_dtype(as_int) and as_int.dtype.itemsize == 1:
+                return as_int.to_numpy()
+        as_float32 = values.astype(np.float32)
+        if np.array_equal(as_float32, values, equal_nan=True):
+            return as_float32
+        return values
+    return series.to_numpy(dtype=object)
+
+
+def _map_columns(out_dir, manifest):
+    columns = {}
+    for entry in manifest['columns']:
+        values = np.load(out_dir / entry['file'], mmap_mode='r')
+        if entry['nulls']:
+            # Columns with missing strings are rare and small; materialise them.
+            nulls = np.load(out_dir / entry['nulls'])
+            values = values.astype(object)
+            values[nulls] = np.nan
+        columns[entry['name']] = values
+    return columns
+
+
+def _read_manifest(csv_path):
+    try:
+        return json.loads((sidecar_dir(csv_path) / MANIFEST_NAME).read_text())
+    except (OSError, ValueError):
+        return None
+
+
+def _is_fresh(manifest, csv_path, id_column, dtype):
+    if manifest is None or manifest.get('format_version') != FORMAT_VERSION:
+        return False
+    stat = os.stat(csv_path)
+    return (
+        manifest['source_mtime_ns'] == stat.st_mtime_ns
+        and manifest['source_size'] == stat.st_size
+        and manifest['id_column'] == id_column
+        and manifest['dtype'] == _dtype_key(dtype)
+        and all((sidecar_dir(csv_path) / entry['file']).is_file() for entry in manifest['columns'])
+    )
+
+
+def _dtype_key(dtype):
+    if dtype is None:
+        return None
+    return {str(name): getattr(value, '__name__', str(value)) for name, value in sorted(dtype.items())}
+
+
+def _atomic_save(path, values):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            np.save(f, values, allow_pickle=False)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _atomic_write_text(path, text):
+    fd, tmp = tempfile.mkstemp(dir=path.parent, suffix='.tmp')
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except BaseException:
+        os.unlink(tmp)
+        raise
+
+
+def _remove_stale_files(out_dir, manifest):
+    keep = {MANIFEST_NAME}
+    for entry in manifest['columns']:
+        keep.add(entry['file'])
+        if entry['nulls']:
+            keep.add(entry['nulls'])
+    for path in out_dir.iterdir():
+        if path.name not in keep and not path.name.endswith('.tmp'):
+            try:
+                path.unlink()
+            except OSError:
+                pass
+
+
+def main():
+    competitions_dir = Path(sys.argv[1]) if len(sys.argv) > 1 else Path('competitions')
+    for competition_dir in sorted(p for p in competitions_dir.iterdir() if p.is_dir()):
+        ground_truth_path = competition_dir / 'test_ground_truth.csv'
+        if not ground_truth_path.is_file():
+            continue
+        # Each evaluator knows its id column and dtypes, so build through it.
+        evaluator_module = importlib.import_module(f"evaluators.{competition_dir.name}")
+        evaluator_module.read_ground_truth(ground_truth_path)
+        manifest = _read_manifest(ground_truth_path)
+        print(f"{competition_dir.name}: {manifest['rows']} rows, {len(manifest['columns'])} columns")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,272 @@
+"""
+Streaming evaluation for prediction files too large to load in one piece.
+
+The prediction is read chunk_rows rows at a time. Each chunk is matched
+against the cached ground truth's id index, prepared exactly like a whole
+file, and folded into mergeable accumulators: log loss sums, per-class
+confusion counts, score histograms for the ranking metrics and error sums
+for regression. Memory then grows with the chunk size and the ground truth
+rather than with the prediction file. StreamTotals answers the same calls
+the metrics make on an engine.Prepared, so engine.METRICS score it as is.
+
+Every metric is exact except roc_auc, pr_auc and best_f1_threshold, which
+are computed from HISTOGRAM_BINS equal-width score bins, so scores that
+close together count as ties. Bootstrap intervals need every row at once
+and are not available when streaming.
+"""
+import numpy as np
+import pandas as pd
+
+from core import engine, kernels, multilabel, regression, telemetry, validation
+from core.alignment import match_chunk, truth_index
+from core.config import DEFAULT_CHUNK_ROWS
+
+# Score bins of the binary ranking metrics; a power of two keeps 0.5 on a bin edge.
+HISTOGRAM_BINS = 1 << 18
+
+
+def evaluate_stream(spec, ground_truth_path, prediction_source, chunk_rows=DEFAULT_CHUNK_ROWS):
+    """
+    Validates and scores a prediction chunk by chunk, after the same staged
+    checks as engine.validate_and_read_inputs. Returns the same scores dict
+    and raises the same errors as reading the whole file, except that
+    unknown or repeated ids are reported as soon as their chunk is read.
+    """
+    with telemetry.span('read_ground_truth'):
+        df_truth = engine.read_ground_truth(spec, ground_truth_path)
+    columns = spec.labels_for(df_truth)
+    with telemetry.span('check_header'):
+        engine.check_prediction_header(spec, df_truth, prediction_source)
+    prediction_schema, constraint = spec.prediction_schema(columns), engine.value_constraint(spec)
+    with telemetry.span('check_sample'):
+        validation.check_sample(prediction_source, prediction_schema, constraint)
+    with telemetry.span('count_rows'):
+        validation.check_row_count(prediction_source, len(df_truth))
+    chunks = telemetry.timed(
+        'parse', validation.read_checked_chunks(prediction_source, chunk_rows, prediction_schema, constraint)
+    )
+
+    index = truth_index(df_truth, spec.id_column)
+    seen = np.zeros(len(index), dtype=bool)
+    totals = StreamTotals(spec, columns, engine.ground_truth_memo(df_truth))
+    rows = 0
+    for chunk in chunks:
+        rows += len(chunk)
+        with engine.evaluation_errors():
+            with telemetry.span('align'):
+                positions = match_chunk(index, chunk[spec.id_column].to_numpy(), seen)
+                truth = df_truth.iloc[positions].reset_index(drop=True)
+            with telemetry.span('prepare'):
+                # The memo caches whole-file values, so a chunk's truth is prepared from scratch.
+                data = engine.PREPARERS[spec.task](
+                    truth, chunk.reset_index(drop=True), columns, lambda key, build: build(truth)
+                )
+            with telemetry.span('accumulate'):
+                totals.add(data)
+    telemetry.note(rows=rows)
+
+    if rows != len(df_truth):
+        raise ValueError(f"Row count mismatch: Ground Truth has {len(df_truth)} rows, Prediction has {rows} rows.")
+    with engine.evaluation_errors(), telemetry.span('metrics'):
+        return engine.compute_metrics(spec, totals)
+
+
+class StreamTotals:
+    """
+    Accumulated sums over the chunks of one prediction. add() folds in a
+    chunk's Prepared and merge() the totals of other rows of the same ground
+    truth. Only the accumulators the spec's metrics read are kept.
+    """
+
+    def __init__(self, spec, columns, memo):
+        self.task = spec.task
+        self.columns = columns
+        self.multilabel = spec.task in (engine.MULTILABEL_ONEHOT, engine.MULTILABEL_LABELS)
+        self._memo = memo
+        self._accumulators = {}
+        for name in spec.metrics.values():
+            kind = ACCUMULATOR_KINDS.get(name)
+            if kind is None:
+                raise ValueError(f"Metric '{name}' cannot be computed on a streamed prediction.")
+            if kind == 'counts' and self.task == engine.BINARY:
+                # Binary counts are read off the score curve, as for a Prepared.
+                kind = 'histogram'
+            if kind not in self._accumulators:
+                self._accumulators[kind] = self._new_accumulator(kind)
+
+    def _new_accumulator(self, kind):
+        if kind == 'log_errors':
+            log_columns, _ = engine.log_regression_truth(self._memo, self.columns)
+            return ErrorSums(log_columns)
+        return ACCUMULATORS[kind]()
+
+    def add(self, data):
+        for accumulator in self._accumulators.values():
+            accumulator.add(data)
+
+    def merge(self, other):
+        for kind, accumulator in self._accumulators.items():
+            accumulator.merge(other._accumulators[kind])
+
+    # The methods below mirror engine.Prepared's.
+
+    def log_loss(self):
+        return self._accumulators['log_loss'].mean()
+
+    def binary_curve(self):
+        return self._accumulators['histogram'].curve()
+
+    def class_counts(self):
+        if self.task == engine.BINARY:
+            return self.binary_curve().class_counts_at(engine.BINARY_THRESHOLD)
+        return self._accumulators['counts'].totals(self.multilabel)
+
+    def regression_scores(self):
+        errors = self._accumulators['errors']
+        moments = engine.regression_truth(self._memo, self.columns)
+        return regression.scores_from_sums(moments, errors.squared, errors.absolute, errors.rows)
+
+    def log_regression_scores(self):
+        errors = self._accumulators['log_errors']
+        log_columns, log_moments = engine.log_regression_truth(self._memo, self.columns)
+        result = regression.scores_from_sums(log_moments, errors.squared, errors.absolute, errors.rows)
+        columns = [column for column, keep in zip(self.columns, log_columns) if keep]
+        return columns, {'rmsle': result['rmse'], 'r2': result['r2']}
+
+
+# --- Accumulators: add(Prepared chunk) and merge(accumulator of the same kind)
+
+class LogLossSum:
+    def __init__(self):
+        self.total = 0.0
+        self.rows = 0
+
+    def add(self, data):
+        losses = data.row_log_loss()
+        self.total += float(losses.sum())
+        self.rows += len(losses)
+
+    def merge(self, other):
+        self.total += other.total
+        self.rows += other.rows
+
+    def mean(self):
+        return self.total / self.rows
+
+
+class ClassCounts:
+    """
+    Per-class true positive, true and predicted counts, indexed by class so
+    that chunks which saw different classes or labels still line up. For
+    multilabel tasks it also counts rows and exactly matched rows.
+    """
+
+    def __init__(self):
+        self.counts = None
+        self.rows = 0
+        self.exact_rows = 0
+
+    def add(self, data):
+        if data.multilabel:
+            c = data.class_counts()
+            counts, classes = (c.label_tp, c.label_true, c.label_pred), data.columns
+            self.rows += c.n_rows
+            self.exact_rows += c.exact_rows
+        else:
+            counts, classes = data.class_counts(), data.classes
+        self._add(pd.DataFrame(dict(zip(('tp', 'true', 'pred'), counts)), index=pd.Index(classes)))
+
+    def merge(self, other):
+        if other.counts is not None:
+            self._add(other.counts)
+        self.rows += other.rows
+        self.exact_rows += other.exact_rows
+
+    def _add(self, counts):
+        if self.counts is None:
+            self.counts = counts
+        else:
+            self.counts = self.counts.add(counts, fill_value=0).astype(np.int64)
+
+    def totals(self, multilabel_task):
+        """kernels.class_counts()-style arrays, or a multilabel.Totals."""
+        tp, true, pred = (self.counts[column].to_numpy() for column in ('tp', 'true', 'pred'))
+        if multilabel_task:
+            return multilabel.Totals(tp, true, pred, self.rows, self.exact_rows)
+        return tp, true, pred
+
+
+class ScoreHistogram:
+    """Negative and positive row counts per score bin of a binary task."""
+
+    def __init__(self, bins=HISTOGRAM_BINS):
+        self.counts = np.zeros((2, bins), dtype=np.int64)
+
+    def add(self, data):
+        kernels.check_probabilities(data.y_prob)
+        bins = self.counts.shape[1]
+        cells = np.minimum((data.y_prob.astype(np.float64) * bins).astype(np.int64), bins - 1)
+        self.counts += np.bincount(data.true_codes * bins + cells, minlength=2 * bins).reshape(2, bins)
+
+    def merge(self, other):
+        self.counts += other.counts
+
+    def curve(self):
+        return kernels.BinaryCurve.from_histogram(*self.counts)
+
+
+class ErrorSums:
+    """
+    Per-column squared and absolute error sums of a regression, or with
+    log_columns, of the log1p values of those columns.
+    """
+
+    def __init__(self, log_columns=None):
+        self.log_columns = log_columns
+        self.squared = 0.0
+        self.absolute = 0.0
+        self.rows = 0
+
+    def add(self, data):
+        if self.log_columns is None:
+            errors = data.y_pred - data.y_true
+        else:
+            log_truth = np.log1p(data.y_true[:, self.log_columns])
+            errors = regression.log_predictions(self.log_columns, data.y_pred) - log_truth
+        squared, absolute = regression.error_sums(errors)
+        self.squared = self.squared + squared
+        self.absolute = self.absolute + absolute
+        self.rows += len(errors)
+
+    def merge(self, other):
+        self.squared = self.squared + other.squared
+        self.absolute = self.absolute + other.absolute
+        self.rows += other.rows
+
+
+ACCUMULATORS = {
+    'log_loss': LogLossSum,
+    'counts': ClassCounts,
+    'histogram': ScoreHistogram,
+    'errors': ErrorSums,
+}
+
+# Which accumulator each metric in engine.METRICS reads.
+ACCUMULATOR_KINDS = {
+    'log_loss': 'log_loss',
+    'accuracy': 'counts',
+    'f1_macro': 'counts',
+    'f1_micro': 'counts',
+    'hamming_loss': 'counts',
+    'roc_auc': 'histogram',
+    'pr_auc': 'histogram',
+    'best_f1_threshold': 'histogram',
+    'r2_per_column': 'errors',
+    'rmse_per_column': 'errors',
+    'mae_per_column': 'errors',
+    'mean_r2': 'errors',
+    'mean_rmse': 'errors',
+    'mean_mae': 'errors',
+    'rmsle_per_column': 'log_errors',
+    'mean_rmsle': 'log_errors',
+}
@@ -0,0 +1,266 @@
+"""
+Timing spans, process metrics and structured logs for scoring.
+
+evaluation() wraps the scoring of one file and span() each stage inside it
+(ground truth load, header and sample checks, parsing, alignment, metric
+computation, ...). When an evaluation ends, its stage times, rows, bytes
+and the process's peak memory go into the process-wide REGISTRY and one
+JSON log line. Pool workers capture() their evaluations and ship them
+back to the web process, which adds them with record_evaluations().
+REGISTRY.render() returns everything, plus collected values such as cache
+statistics, in the Prometheus text format.
+"""
+import contextlib
+import contextvars
+import json
+import logging
+import math
+import os
+import resource
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds, in seconds, of the latency histogram buckets.
+LATENCY_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+COUNTER, GAUGE, HISTOGRAM = 'counter', 'gauge', 'histogram'
+
+# The evaluation being scored in this context, and the list capture() collects finished ones into.
+_current = contextvars.ContextVar('evaluation', default=None)
+_captured = contextvars.ContextVar('captured', default=None)
+
+
+class MetricsRegistry:
+    """
+    Thread-safe counters, gauges and histograms keyed by name and labels.
+    Collectors are called at render time for values owned elsewhere and
+    return (name, kind, help, labels, value) samples.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._kinds = {}
+        self._help = {}
+        self._values = {}
+        self._collectors = []
+
+    def describe(self, name, kind, help):
+        self._kinds[name] = kind
+        self._help[name] = help
+
+    def inc(self, name, amount=1, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = series.get(key, 0) + amount
+
+    def set(self, name, value, **labels):
+        with self._lock:
+            self._values.setdefault(name, {})[_key(labels)] = value
+
+    def set_max(self, name, value, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            series[key] = max(series.get(key, value), value)
+
+    def observe(self, name, value, **labels):
+        key = _key(labels)
+        with self._lock:
+            series = self._values.setdefault(name, {})
+            buckets = series.get(key)
+            if buckets is None:
+                # One count per bucket, then the sum and the count of observations.
+                buckets = series[key] = [0] * len(LATENCY_BUCKETS) + [0.0, 0]
+            for i, bound in enumerate(LATENCY_BUCKETS):
+                if value <= bound:
+                    buckets[i] += 1
+            buckets[-2] += value
+            buckets[-1] += 1
+
+    def add_collector(self, collect):
+        self._collectors.append(collect)
+
+    def render(self):
+        with self._lock:
+            values = {name: dict(series) for name, series in self._values.items()}
+        kinds, helps = dict(self._kinds), dict(self._help)
+        for collect in self._collectors:
+            for name, kind, help, labels, value in collect():
+                kinds[name], helps[name] = kind, help
+                values.setdefault(name, {})[_key(labels)] = value
+
+        lines = []
+        for name in sorted(values):
+            kind = kinds.get(name, GAUGE)
+            lines.append(f"# HELP {name} {helps.get(name, name)}")
+            lines.append(f"# TYPE {name} {kind}")
+            for key, value in sorted(values[name].items()):
+                if kind != HISTOGRAM:
+                    lines.append(f"{name}{_labels(key)} {_number(value)}")
+                    continue
+                for bound, count in zip(LATENCY_BUCKETS, value):
+                    lines.append(f"{name}_bucket{_labels(key + (('le', _number(bound)),))} {count}")
+                lines.append(f"{name}_bucket{_labels(key + (('le', '+Inf'),))} {value[-1]}")
+                lines.append(f"{name}_sum{_labels(key)} {_number(value[-2])}")
+                lines.append(f"{name}_count{_labels(key)} {value[-1]}")
+        return '\n'.join(lines) + '\n'
+
+
+def _key(labels):
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _labels(key):
+    if not key:
+        return ''
+    escaped = (
+        (name, value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')) for name, value in key
+    )
+    return '{' + ','.join(f'{name}="{value}"' for name, value in escaped) + '}'
+
+
+def _number(value):
+    if isinstance(value, float) and not math.isfinite(value):
+        return '+Inf' if value > 0 else ('-Inf' if value < 0 else 'NaN')
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+REGISTRY = MetricsRegistry()
+REGISTRY.describe('evaluator_stage_seconds', HISTOGRAM, "Time spent in each stage of scoring a file.")
+REGISTRY.describe('evaluator_evaluation_seconds', HISTOGRAM, "Time to score one prediction file.")
+REGISTRY.describe('evaluator_evaluations_total', COUNTER, "Prediction files scored, by outcome.")
+REGISTRY.describe('evaluator_rows_total', COUNTER, "Prediction rows scored.")
+REGISTRY.describe('evaluator_prediction_bytes_total', COUNTER, "Prediction bytes scored, as uploaded.")
+REGISTRY.describe(
+    'evaluator_peak_rss_bytes', GAUGE, "Highest process peak RSS seen at the end of scoring a file, per competition."
+)
+REGISTRY.describe('http_request_seconds', HISTOGRAM, "Latency of HTTP requests by endpoint.")
+
+
+@contextlib.contextmanager
+def evaluation(competition, **fields):
+    """
+    Scope of scoring one prediction file. Yields the evaluation's record;
+    fields (and note()) add to it, and span()s inside add their times.
+    """
+    record = {'competition': competition, 'status': 'ok', 'rows': None, 'stages': {}, **fields}
+    token = _current.set(record)
+    started = time.perf_counter()
+    try:
+        yield record
+    except Exception as e:
+        record['status'] = 'error'
+        record['error'] = str(e)
+        raise
+    finally:
+        _current.reset(token)
+        record['seconds'] = time.perf_counter() - started
+        record['peak_rss_bytes'] = peak_rss_bytes()
+        _record(record)
+        logger.info(json.dumps({'event': 'evaluation', **record}, default=str))
+        captured = _captured.get()
+        if captured is not None:
+            captured.append(record)
+
+
+@contextlib.contextmanager
+def span(stage, competition=None):
+    """
+    Times a block as a stage. Inside an evaluation it counts towards that
+    evaluation; elsewhere it is recorded on its own, under competition.
+    """
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        seconds = time.perf_counter() - started
+        current = _current.get()
+        if current is None:
+            REGISTRY.observe('evaluator_stage_seconds', seconds, competition=competition or '', stage=stage)
+        else:
+            current['stages'][stage] = current['stages'].get(stage, 0.0) + seconds
+
+
+def timed(stage, iterable):
+    """Yields from iterable, timing each step (e.g. parsing the next chunk) as stage."""
+    iterator = iter(iterable)
+    while True:
+        with span(stage):
+            try:
+                item = next(iterator)
+            except StopIteration:
+                return
+        yield item
+
+
+def note(**fields):
+    """Adds fields such as rows to the current evaluation's record, if any."""
+    current = _current.get()
+    if current is not None:
+        current.update(fields)
+
+
+@contextlib.contextmanager
+def capture():
+    """Collects the records of the evaluations that end inside the block."""
+    records = []
+    token = _captured.set(records)
+    try:
+        yield records
+    finally:
+        _captured.reset(token)
+
+
+def record_evaluations(records):
+    """Adds evaluations captured elsewhere, e.g. in a pool worker, to this process's metrics."""
+    for record in records:
+        _record(record)
+
+
+def _record(record):
+    competition = record['competition']
+    for stage, seconds in record['stages'].items():
+        REGISTRY.observe('evaluator_stage_seconds', seconds, competition=competition, stage=stage)
+    REGISTRY.observe('evaluator_evaluation_seconds', record['seconds'], competition=competition)
+    REGISTRY.inc('evaluator_evaluations_total', competition=competition, status=record['status'])
+    if record.get('rows'):
+        REGISTRY.inc('evaluator_rows_total', record['rows'], competition=competition)
+    if record.get('bytes'):
+        REGISTRY.inc('evaluator_prediction_bytes_total', record['bytes'], competition=competition)
+    REGISTRY.set_max('evaluator_peak_rss_bytes', record['peak_rss_bytes'], competition=competition)
+
+
+def peak_rss_bytes():
+    # ru_maxrss is in kilobytes on Linux.
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+def _process_samples():
+    samples = [('process_peak_rss_bytes', GAUGE, "Peak resident memory of this process.", {}, peak_rss_bytes())]
+    try:
+        with open('/proc/self/statm') as f:
+            resident_pages = int(f.read().split()[1])
+        samples.append((
+            'process_resident_memory_bytes', GAUGE, "Resident memory of this process.", {},
+            resident_pages * os.sysconf('SC_PAGE_SIZE'),
+        ))
+    except (OSError, ValueError):
+        pass
+    return samples
+
+
+REGISTRY.add_collector(_process_samples)
+
+
+def cache_samples(prefix, stats):
+    """Samples for a cache's stats() dict: *_total counters for hits, misses and evictions, gauges for the rest."""
+    samples = []
+    for key, value in stats.items():
+        if key in ('hits', 'misses', 'evictions'):
+            samples.append((f"{prefix}_{key}_total", COUNTER, f"{prefix.replace('_', ' ')} {key}", {}, value))
+        else:
+            samples.append((f"{prefix}_{key}", GAUGE, f"{prefix.replace('_', ' ')} {key.replace('_', ' ')}", {}, value))
+    return samples
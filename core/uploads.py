@@ -0,0 +1,244 @@
+import contextlib
+import gzip
+import hashlib
+import io
+import os
+import zipfile
+import zlib
+from pathlib import Path
+from tempfile import SpooledTemporaryFile
+
+try:
+    import zstandard
+except ImportError:  # zstd uploads need the optional zstandard package
+    zstandard = None
+
+DEFAULT_SPOOL_MAX_BYTES = 32 * 1024 * 1024
+
+# Compressed uploads stop decompressing past this many bytes.
+DEFAULT_MAX_DECOMPRESSED_BYTES = 1024 * 1024 * 1024
+
+GZIP, ZSTD, ZIP = 'gzip', 'zstd', 'zip'
+_MAGIC = {b'\x1f\x8b': GZIP, b'\x28\xb5\x2f\xfd': ZSTD, b'PK\x03\x04': ZIP}
+_DECOMPRESSION_ERRORS = (OSError, EOFError, zlib.error, zipfile.BadZipFile) + (
+    (zstandard.ZstdError,) if zstandard is not None else ()
+)
+
+
+class HashingSpooledFile(SpooledTemporaryFile):
+    """
+    Buffer for an incoming upload. It stays in memory until it grows past
+    max_size and only then spills to an anonymous temporary file. The bytes
+    are hashed as they are written, so the content hash is ready as soon
+    as the upload has been received.
+    """
+
+    def __init__(self, max_size):
+        super().__init__(max_size=max_size, mode='w+b')
+        self._digest = hashlib.sha256()
+
+    def write(self, data):
+        self._digest.update(data)
+        return super().write(data)
+
+    def hexdigest(self):
+        return self._digest.hexdigest()
+
+
+def spooled_upload_stream(max_size=DEFAULT_SPOOL_MAX_BYTES):
+    return HashingSpooledFile(max_size)
+
+
+def content_hash(stream):
+    """SHA-256 of an upload buffer's bytes, or None if it was not hashed on the way in."""
+    hexdigest = getattr(stream, 'hexdigest', None)
+    return hexdigest() if hexdigest is not None else None
+
+
+class CompressedPrediction:
+    """
+    A gzip, zstd or zip compressed prediction, from a path or a seekable
+    upload buffer. Every read decompresses it afresh as a stream straight
+    into the reader, so no plain copy is written to disk or held in memory,
+    and a read fails with a ValueError once more than max_bytes come out.
+    """
+
+    def __init__(self, source, kind, max_bytes=DEFAULT_MAX_DECOMPRESSED_BYTES):
+        if kind == ZSTD and zstandard is None:
+            raise ValueError("zstd-compressed uploads are not supported on this server; please upload gzip or zip.")
+        self.source = source
+        self.kind = kind
+        self.max_bytes = max_bytes
+
+    @contextlib.contextmanager
+    def open(self):
+        """A binary stream of the decompressed CSV."""
+        with contextlib.ExitStack() as stack:
+            if isinstance(self.source, (str, os.PathLike)):
+                raw = stack.enter_context(open(self.source, 'rb'))
+            else:
+                raw = self.source
+                raw.seek(0)
+            if self.kind == GZIP:
+                stream = stack.enter_context(gzip.GzipFile(fileobj=raw, mode='rb'))
+            elif self.kind == ZSTD:
+                stream = stack.enter_context(zstandard.ZstdDecompressor().stream_reader(raw, closefd=False))
+            else:
+                archive = stack.enter_context(_open_zip(raw))
+                stream = stack.enter_context(archive.open(_zip_member(archive)))
+            yield io.BufferedReader(_LimitedReader(stream, self.max_bytes), buffer_size=1 << 20)
+
+    def size(self):
+        """
+        The decompressed size the archive records, else the compressed size.
+        Only a hint for choosing the streaming path; max_bytes is what is enforced.
+        """
+        compressed = source_size(self.source)
+        with contextlib.ExitStack() as stack:
+            if isinstance(self.source, (str, os.PathLike)):
+                raw = stack.enter_context(open(self.source, 'rb'))
+            else:
+                raw = self.source
+            if self.kind == GZIP and compressed >= 4:
+                # The trailer holds the (last member's) size modulo 2**32.
+                raw.seek(-4, os.SEEK_END)
+                return max(int.from_bytes(raw.read(4), 'little'), compressed)
+            if self.kind == ZSTD:
+                raw.seek(0)
+                recorded = zstandard.frame_content_size(raw.read(18))
+                return recorded if recorded >= 0 else compressed
+            if self.kind == ZIP:
+                with _open_zip(raw) as archive:
+                    return archive.getinfo(_zip_member(archive)).file_size
+        return compressed
+
+
+class _LimitedReader(io.RawIOBase):
+    """Reads a decompressing stream, failing cleanly on corrupt data or once past max_bytes."""
+
+    def __init__(self, stream, max_bytes):
+        self._stream = stream
+        self._max_bytes = max_bytes
+        self._total = 0
+
+    def readable(self):
+        return True
+
+    def readinto(self, buffer):
+        try:
+            data = self._stream.read(len(buffer))
+        except _DECOMPRESSION_ERRORS as e:
+            raise ValueError(f"Could not decompress the uploaded file: {e}")
+        self._total += len(data)
+        if self._total > self._max_bytes:
+            raise ValueError(f"The uploaded file decompresses to more than {self._max_bytes} bytes.")
+        buffer[:len(data)] = data
+        return len(data)
+
+
+def _open_zip(raw):
+    try:
+        return zipfile.ZipFile(raw)
+    except zipfile.BadZipFile as e:
+        raise ValueError(f"Could not decompress the uploaded file: {e}")
+
+
+def _zip_member(archive):
+    """The single file a zip upload must hold; folders and macOS metadata do not count."""
+    members = [
+        info.filename for info in archive.infolist()
+        if not info.is_dir() and not info.filename.startswith('__MACOSX/')
+    ]
+    if len(members) != 1:
+        raise ValueError(f"A zip upload must contain exactly one CSV file, found {len(members)}.")
+    return members[0]
+
+
+def open_prediction(source, max_bytes=DEFAULT_MAX_DECOMPRESSED_BYTES):
+    """
+    The source itself for a plain CSV, or a CompressedPrediction if its
+    first bytes are a gzip, zstd or zip signature.
+    """
+    if isinstance(source, (str, os.PathLike)):
+        if not Path(source).is_file():
+            return source
+        with open(source, 'rb') as f:
+            head = f.read(4)
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+        head = source.read(4)
+    else:
+        return source
+    for magic, kind in _MAGIC.items():
+        if head.startswith(magic):
+            return CompressedPrediction(source, kind, max_bytes)
+    return source
+
+
+def source_size(source):
+    """Size in bytes of a prediction path or seekable upload buffer, or None if it cannot be told."""
+    if isinstance(source, CompressedPrediction):
+        return source.size()
+    if isinstance(source, (str, os.PathLike)):
+        return os.path.getsize(source) if Path(source).is_file() else None
+    if hasattr(source, 'seek') and hasattr(source, 'tell'):
+        return source.seek(0, os.SEEK_END)
+    return None
+
+
+def iter_bytes(source, block_size=1 << 20):
+    """Yields the CSV bytes of a prediction path or upload buffer in blocks."""
+    with _opened(source) as stream:
+        yield from iter(lambda: stream.read(block_size), b'')
+
+
+def read_prediction_csv(source, **kwargs):
+    """
+    Reads a prediction CSV from a filesystem path, from an open binary
+    file-like object such as werkzeug's FileStorage stream, or from a
+    CompressedPrediction.
+    """
+    # pandas is imported on first use so that the web app can import this module cheaply.
+    import pandas as pd
+    try:
+        with _opened(source) as stream:
+            return pd.read_csv(stream, **kwargs)
+    except Exception as e:
+        raise _read_error(e)
+
+
+def read_prediction_chunks(source, chunk_rows, **kwargs):
+    """Like read_prediction_csv, but yields DataFrames of at most chunk_rows rows."""
+    import pandas as pd
+    try:
+        with _opened(source) as stream, pd.read_csv(stream, chunksize=chunk_rows, **kwargs) as reader:
+            yield from reader
+    except Exception as e:
+        raise _read_error(e)
+
+
+@contextlib.contextmanager
+def _opened(source):
+    """A binary stream positioned at the start of the prediction's CSV bytes."""
+    if isinstance(source, CompressedPrediction):
+        with source.open() as stream:
+            yield stream
+    elif isinstance(source, (str, os.PathLike)):
+        _rewind(source)
+        with open(source, 'rb') as stream:
+            yield stream
+    else:
+        _rewind(source)
+        yield source
+
+
+def _rewind(source):
+    if isinstance(source, (str, os.PathLike)):
+        if not Path(source).is_file():
+            raise ValueError(f"Prediction file does not exist at '{source}'")
+    elif hasattr(source, 'seek'):
+        source.seek(0)
+
+
+def _read_error(e):
+    return ValueError(f"Could not read one of the CSV files. Please check the file format. Error: {e}")
@@ -0,0 +1,197 @@
+"""
+Staged checks that reject a bad prediction file as early as possible.
+
+The cheap stages run first: the header (engine.check_prediction_header),
+then a parsed sample of the first rows, then a newline scan that counts the
+rows without parsing them. Only then is the body parsed with the
+competition's schema.Schema, chunk by chunk, and each chunk's values are
+checked before the next one is read. Value errors, and values the schema's
+dtype cannot hold, name the file line, the row's id and the column.
+"""
+import numpy as np
+import pandas as pd
+from pandas.api.types import union_categoricals
+
+from core.schema import read_fast
+from core.uploads import iter_bytes, read_prediction_chunks, read_prediction_csv
+
+SAMPLE_ROWS = 1000
+CHUNK_ROWS = 100_000
+
+# Value constraints on the label columns.
+PROBABILITY = 'probability'  # a float in [0, 1]
+NUMBER = 'number'            # a finite float
+
+_NEWLINE, _CARRIAGE_RETURN, _QUOTE = ord('\n'), ord('\r'), ord('"')
+
+
+def check_sample(source, schema, constraint):
+    """Parses and checks the first SAMPLE_ROWS rows."""
+    sample = _read_rows(source, 0, SAMPLE_ROWS, schema)
+    check_values(sample, schema.columns, constraint, first_row=0)
+
+
+def check_row_count(source, expected):
+    """Compares a newline count of the rows with the ground truth's, without parsing."""
+    rows, exact = count_rows(source)
+    if rows is None or rows == expected:
+        return
+    if exact:
+        raise ValueError(f"Row count mismatch: Ground Truth has {expected} rows, Prediction has {rows} rows.")
+    if rows < expected:
+        raise ValueError(f"Row count mismatch: Ground Truth has {expected} rows, Prediction has at most {rows} rows.")
+
+
+def count_rows(source):
+    """
+    (rows, exact) from a newline scan, not counting the header or blank
+    lines, which pandas skips as well. A quoted field may span lines, so when
+    the file has any quote character the count is only an upper bound and
+    exact is False. Files with bare carriage-return line endings are not
+    counted: (None, False).
+    """
+    newlines = carriage_returns = crlf = quotes = blank = 0
+    first = tail = b''
+    for block in iter_bytes(source):
+        first = first or block[:1]
+        # The previous block's last two bytes catch line endings split across blocks;
+        # each sequence is counted in the block holding its last byte.
+        codes = np.frombuffer(tail + block, dtype=np.uint8)
+        k = len(tail)
+        newline = codes == _NEWLINE
+        newlines += np.count_nonzero(newline[k:])
+        quotes += np.count_nonzero(codes[k:] == _QUOTE)
+        blank += np.count_nonzero((newline[:-1] & newline[1:])[max(k - 1, 0):])
+        carriage_return = codes == _CARRIAGE_RETURN
+        if carriage_return.any():
+            carriage_returns += np.count_nonzero(carriage_return[k:])
+            crlf += np.count_nonzero((carriage_return[:-1] & newline[1:])[max(k - 1, 0):])
+            blank += np.count_nonzero((newline[:-2] & carriage_return[1:-1] & newline[2:])[max(k - 2, 0):])
+        tail = (tail + block)[-2:]
+
+    if carriage_returns != crlf:
+        return None, False
+    if not first:
+        return 0, True
+    lines = newlines + (not tail.endswith(b'\n'))
+    # Blank lines before the header would be miscounted; treat them like quotes.
+    exact = not quotes and first not in (b'\n', b'\r')
+    return int(max(lines - 1 - blank, 0)), exact
+
+
+def read_checked(source, schema, constraint):
+    """
+    The whole prediction, parsed with the schema and value-checked. pyarrow
+    parses it in one pass when it can; otherwise it is read chunk by chunk.
+    """
+    frame = read_fast(source, schema)
+    if frame is not None:
+        check_values(frame, schema.columns, constraint, first_row=0)
+        return frame
+    return concat_chunks(list(read_checked_chunks(source, CHUNK_ROWS, schema, constraint)))
+
+
+def read_checked_chunks(source, chunk_rows, schema, constraint):
+    """
+    Yields the prediction in chunks of chunk_rows rows, each parsed with the
+    schema and value-checked before the next one is read.
+    """
+    first_row = 0
+    chunks = read_prediction_chunks(source, chunk_rows, usecols=schema.columns, dtype=schema.dtypes)
+    while True:
+        try:
+            chunk = next(chunks)
+        except StopIteration:
+            return
+        except ValueError as e:
+            raise _locate_parse_error(source, first_row, chunk_rows, schema) or e
+        check_values(chunk, schema.columns, constraint, first_row)
+        yield chunk
+        first_row += len(chunk)
+
+
+def concat_chunks(chunks):
+    """
+    One frame from parsed chunks. Each chunk has its own categories, which
+    pd.concat would turn into plain objects, so categorical columns are
+    joined with union_categoricals instead.
+    """
+    frame = pd.concat(chunks, ignore_index=True)
+    for column, dtype in chunks[0].dtypes.items():
+        if isinstance(dtype, pd.CategoricalDtype) and not isinstance(frame[column].dtype, pd.CategoricalDtype):
+            frame[column] = union_categoricals([chunk[column] for chunk in chunks])
+    return frame
+
+
+def check_values(chunk, columns, constraint, first_row):
+    """Raises a ValueError locating the first value in the chunk that breaks the constraint."""
+    if constraint is None or not len(chunk):
+        return
+    label_columns = columns[1:]
+    values = chunk[label_columns].to_numpy()
+    if constraint == PROBABILITY:
+        bad = ~((values >= 0) & (values <= 1))
+    else:
+        bad = ~np.isfinite(values)
+    rows = np.flatnonzero(bad.any(axis=1))
+    if not len(rows):
+        return
+
+    row = rows[0]
+    column = int(np.argmax(bad[row]))
+    value = values[row, column]
+    if np.isnan(value):
+        problem = "has no value"
+    elif constraint == PROBABILITY:
+        problem = f"has probability {value!s}, outside [0, 1]"
+    else:
+        problem = f"has {value!s}, which is not a finite number"
+    raise ValueError(f"{_where(chunk, columns[0], row, first_row)}: column '{label_columns[column]}' {problem}.")
+
+
+def _read_rows(source, first_row, n_rows, schema):
+    try:
+        return read_prediction_csv(
+            source, skiprows=range(1, first_row + 1), nrows=n_rows, usecols=schema.columns, dtype=schema.dtypes
+        )
+    except ValueError as e:
+        raise _locate_parse_error(source, first_row, n_rows, schema) or e
+
+
+def _locate_parse_error(source, first_row, n_rows, schema):
+    """
+    Re-reads rows that failed to parse as text and returns a ValueError for
+    the first value that does not fit its numeric column, or None if that
+    was not the problem.
+    """
+    numeric = schema.numeric_columns()
+    if not numeric:
+        return None
+    columns = schema.columns
+    try:
+        text = read_prediction_csv(source, skiprows=range(1, first_row + 1), nrows=n_rows, usecols=columns, dtype=str)
+    except ValueError:
+        return None
+
+    first_bad = None
+    for column in numeric:
+        values = text[column]
+        numbers = pd.to_numeric(values, errors='coerce')
+        bad = numbers.isna() & values.notna()
+        integer = pd.api.types.is_integer_dtype(pd.api.types.pandas_dtype(schema.dtypes[column]))
+        if integer:
+            # Integer columns have no missing values either.
+            bad |= values.isna() | (numbers % 1 != 0)
+        rows = np.flatnonzero(bad.to_numpy())
+        if len(rows) and (first_bad is None or rows[0] < first_bad[0]):
+            first_bad = rows[0], column, "an integer" if integer else "a number"
+    if first_bad is None:
+        return None
+    row, column, kind = first_bad
+    value = text[column].iloc[row]
+    return ValueError(f"{_where(text, columns[0], row, first_row)}: column '{column}' has {value!r}, which is not {kind}.")
+
+
+def _where(frame, id_column, row, first_row):
+    # Line 1 is the header.
+    return f"Line {first_row + row + 2} (id {frame[id_column].iloc[row]})"
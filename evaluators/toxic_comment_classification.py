@@ -1,56 +1,23 @@
-import sys
-from pathlib import Path
-import pandas as pd
-from sklearn.metrics import log_loss, accuracy_score, f1_score, roc_auc_score
-import json
-
-def validate_and_read_inputs(ground_truth_path, prediction_path):
-    if not ground_truth_path.is_file():
-        raise ValueError(f"Ground truth file does not exist at '{ground_truth_path}'")
-    
-    if not prediction_path.is_file():
-        raise ValueError(f"Prediction file does not exist at '{prediction_path}'")
-
-    try:
-        df_gt = pd.read_csv(ground_truth_path)
-        df_pred = pd.read_csv(prediction_path)
-    except Exception as e:
-        raise ValueError(f"Could not read one of the CSV files. Please check the file format. Error: {e}")
-
-    if len(df_gt) != len(df_pred):
-        raise ValueError(f"Row count mismatch: Ground Truth has {len(df_gt)} rows, Prediction has {len(df_pred)} rows.")
-
-    if set(df_gt.columns) != set(df_pred.columns):
-        raise ValueError(f"Column names do not match. GT: {list(df_gt.columns)}, Pred: {list(df_pred.columns)}")
-
-    return df_gt, df_pred
-
-def evaluate_predictions(df_truth, df_pred):
-    try:
-        df_truth = df_truth.sort_values('id').reset_index(drop=True)
-        df_pred = df_pred.sort_values('id').reset_index(drop=True)
-
-        y_true = df_truth['toxic'].values
-        y_pred_proba = df_pred['toxic'].values
-        y_pred_labels = (y_pred_proba >= 0.5).astype(int)
-
-        loss = log_loss(y_true, y_pred_proba)
-        accuracy = accuracy_score(y_true, y_pred_labels)
-        f1 = f1_score(y_true, y_pred_labels, average='macro')
-        roc_auc = roc_auc_score(y_true, y_pred_proba)
-
-        print("--- Toxic Comment Classification Results ---")
-        print(f"Log Loss: {loss:.4f}")
-        print(f"Accuracy: {accuracy:.4f}")
-        print(f"F1 Score (Macro): {f1:.4f}")
-        print(f"ROC AUC:  {roc_auc:.4f}") 
-        print("------------------------------------------")
-
-        return {
-            'log_loss': loss,
-            'accuracy': accuracy,
-            'f1_score_macro': f1,
-            'roc_auc': roc_auc
-        }
-    except Exception as e:
-        raise ValueError(f"An unexpected error occurred during evaluation: {e}")
\ No newline at end of file
+"""
+Evaluates binary toxicity predictions. Accuracy and F1 threshold the
+probabilities at 0.5; log loss, ROC-AUC and PR-AUC use them as they are,
+and best_f1_threshold reports the threshold that maximises F1.
+"""
+from core import engine
+
+SPEC = engine.CompetitionSpec(
+    id_column='id',
+    id_dtype='int64',
+    task=engine.BINARY,
+    label_columns=('toxic',),
+    metrics={
+        'log_loss': 'log_loss',
+        'accuracy': 'accuracy',
+        'f1_score_macro': 'f1_macro',
+        'roc_auc': 'roc_auc',
+        'pr_auc': 'pr_auc',
+        'best_f1_threshold': 'best_f1_threshold',
+    },
+)
+
+__getattr__ = engine.module_api(SPEC)
\ No newline at end of file
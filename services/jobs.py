@@ -0,0 +1,204 @@
+"""
+In-process evaluation job queue.
+
+Uploads are turned into jobs that a bounded pool of worker threads runs in
+the background while the client polls for status. The queue lives in the
+worker process that accepted the upload, so under gunicorn either run a
+single worker (with threads) or route status polls back to the same worker.
+
+A job that times out is cancelled rather than killed: the code it runs
+calls raise_if_cancelled() between steps and makes its visible writes
+inside side_effects(), which refuses them once the job has timed out.
+"""
+import contextlib
+import queue
+import threading
+import time
+import uuid
+from collections import OrderedDict
+
+QUEUED = 'queued'
+RUNNING = 'running'
+DONE = 'done'
+FAILED = 'failed'
+TIMEOUT = 'timeout'
+
+
+class JobQueueFull(Exception):
+    """Raised when a job is submitted while every queue slot is taken."""
+
+
+class JobCancelled(Exception):
+    """Raised inside a job that has timed out, to stop it early."""
+
+
+# The Job run by the current thread, if any.
+_local = threading.local()
+
+
+def raise_if_cancelled():
+    """Raises JobCancelled if the calling thread runs a job that has timed out."""
+    job = getattr(_local, 'job', None)
+    if job is not None and job.cancelled.is_set():
+        raise JobCancelled(job.error)
+
+
+@contextlib.contextmanager
+def side_effects():
+    """
+    Wraps a job's externally visible writes, such as storing its results.
+    Raises JobCancelled instead if the job has timed out; once the block
+    starts, the job can no longer time out. Outside a job it does nothing.
+    """
+    job = getattr(_local, 'job', None)
+    if job is None:
+        yield
+        return
+    with job.lock:
+        if job.cancelled.is_set():
+            raise JobCancelled(job.error)
+        job.committed = True
+        yield
+
+
+class Job:
+    def __init__(self, func, args, description):
+        self.id = uuid.uuid4().hex
+        self.func = func
+        self.args = args
+        self.description = description
+        self.status = QUEUED
+        self.result = None
+        self.error = None
+        self.created_at = time.time()
+        self.started_at = None
+        self.finished_at = None
+        self.lock = threading.Lock()
+        self.cancelled = threading.Event()
+        self.committed = False
+
+    def to_dict(self):
+        return {
+            'job_id': self.id,
+            'status': self.status,
+            **self.description,
+            'created_at': self.created_at,
+            'started_at': self.started_at,
+            'finished_at': self.finished_at,
+            'result': self.result,
+            'error': self.error,
+        }
+
+
+class JobQueue:
+    """
+    Runs submitted callables on `workers` background threads.
+
+    At most `max_pending` jobs wait in the queue; further submissions raise
+    JobQueueFull so the caller can apply backpressure. A job that runs longer
+    than `timeout` seconds is reported as timed out and cancelled. Python
+    threads cannot be killed, so its worker waits for the call to reach its
+    next raise_if_cancelled() or side_effects() before taking another job;
+    at most `workers` jobs ever run at once.
+    """
+
+    def __init__(self, workers=2, max_pending=16, timeout=120, max_retained=500):
+        self.workers = workers
+        self.timeout = timeout
+        self.max_retained = max_retained
+        self._pending = queue.Queue(maxsize=max_pending)
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+        self._threads = []
+
+    def submit(self, func, *args, **description):
+        """Enqueues func(*args) and returns the new job's id."""
+        self._ensure_started()
+        job = Job(func, args, description)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        try:
+            self._pending.put_nowait(job)
+        except queue.Full:
+            with self._lock:
+                self._jobs.pop(job.id, None)
+            raise JobQueueFull(f"The evaluation queue is full ({self._pending.maxsize} jobs waiting).")
+        return job.id
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job is not None else None
+
+    def stats(self):
+        with self._lock:
+            counts = {}
+            for job in self._jobs.values():
+                counts[job.status] = counts.get(job.status, 0) + 1
+        return {'workers': self.workers, 'pending': self._pending.qsize(), 'jobs': counts}
+
+    def _ensure_started(self):
+        # Threads start on first use so importing the app (e.g. in a
+        # pre-forking gunicorn master) does not spawn them.
+        with self._lock:
+            if self._threads:
+                return
+            for i in range(self.workers):
+                thread = threading.Thread(target=self._work, name=f"eval-worker-{i}", daemon=True)
+                thread.start()
+                self._threads.append(thread)
+
+    def _work(self):
+        while True:
+            job = self._pending.get()
+            try:
+                self._run(job)
+            finally:
+                self._pending.task_done()
+
+    def _run(self, job):
+        job.status = RUNNING
+        job.started_at = time.time()
+        outcome = {}
+
+        def target():
+            _local.job = job
+            try:
+                outcome['result'] = job.func(*job.args)
+            except JobCancelled:
+                pass
+            except Exception as e:
+                outcome['error'] = str(e)
+
+        runner = threading.Thread(target=target, name=f"eval-job-{job.id}", daemon=True)
+        runner.start()
+        runner.join(self.timeout)
+
+        with job.lock:
+            if runner.is_alive() and not job.committed:
+                job.error = f"Evaluation did not finish within {self.timeout} seconds."
+                job.cancelled.set()
+        if job.cancelled.is_set():
+            job.status = TIMEOUT
+            job.finished_at = time.time()
+            job.args = ()
+            # Report the timeout now, but keep this worker busy until the call stops.
+            runner.join()
+            return
+        # Past side_effects() the job has committed its results and only has to return.
+        runner.join()
+        if 'error' in outcome:
+            job.status = FAILED
+            job.error = outcome['error']
+        else:
+            job.status = DONE
+            job.result = outcome.get('result')
+        job.finished_at = time.time()
+        # Drop the upload payload as soon as the job is settled.
+        job.args = ()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at is not None]
+        for job_id in finished[:max(0, len(self._jobs) - self.max_retained)]:
+            del self._jobs[job_id]
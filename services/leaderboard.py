@@ -0,0 +1,245 @@
+"""
+Persistent per-competition leaderboard.
+
+Every scored submission is stored in SQLite. For each (competition, metric)
+an indexable skiplist keeps the scores in rank order, so inserting a score,
+looking up a submission's rank and reading the top k are O(log n) (plus k)
+instead of a re-sort of every stored score. The skiplists are rebuilt
+lazily from the database and then kept up to date incrementally; rows
+written by other worker processes are picked up by id on the next query.
+"""
+import json
+import math
+import random
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS submissions (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    competition TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    session_id TEXT,
+    created_at REAL NOT NULL,
+    scores TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_submissions_competition_id
+    ON submissions (competition, id);
+"""
+
+# Metric names containing any of these are ranked ascending.
+LOWER_IS_BETTER = ('loss', 'rmse', 'mse', 'mae', 'error', 'hamming')
+
+
+def metric_direction(metric):
+    """'min' when a lower value is better (e.g. log_loss), otherwise 'max' (e.g. accuracy)."""
+    return 'min' if any(token in metric for token in LOWER_IS_BETTER) else 'max'
+
+
+def rankable_metrics(scores):
+    """The top-level, finite numeric entries of a scores dict."""
+    return {
+        metric: float(value)
+        for metric, value in scores.items()
+        if isinstance(value, (int, float)) and not isinstance(value, bool) and math.isfinite(value)
+    }
+
+
+class _Node:
+    __slots__ = ('key', 'next', 'width')
+
+    def __init__(self, key, levels):
+        self.key = key
+        self.next = [None] * levels
+        self.width = [1] * levels
+
+
+class IndexableSkiplist:
+    """
+    Sorted sequence with O(log n) insert, rank and positional lookup.
+    Each link records how many elements it skips, which is what makes rank
+    queries logarithmic.
+    """
+
+    MAX_LEVELS = 32
+
+    def __init__(self):
+        self.size = 0
+        self.head = _Node(None, self.MAX_LEVELS)
+
+    def __len__(self):
+        return self.size
+
+    def insert(self, key):
+        chain = [None] * self.MAX_LEVELS
+        steps_at_level = [0] * self.MAX_LEVELS
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key <= key:
+                steps_at_level[level] += node.width[level]
+                node = node.next[level]
+            chain[level] = node
+
+        levels = min(self.MAX_LEVELS, 1 - int(math.log2(1.0 - random.random())))
+        new = _Node(key, levels)
+        steps = 0
+        for level in range(levels):
+            prev = chain[level]
+            new.next[level] = prev.next[level]
+            prev.next[level] = new
+            new.width[level] = prev.width[level] - steps
+            prev.width[level] = steps + 1
+            steps += steps_at_level[level]
+        for level in range(levels, self.MAX_LEVELS):
+            chain[level].width[level] += 1
+        self.size += 1
+
+    def rank(self, key):
+        """Number of elements strictly smaller than key."""
+        position = 0
+        node = self.head
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.next[level] is not None and node.next[level].key < key:
+                position += node.width[level]
+                node = node.next[level]
+        return position
+
+    def slice(self, start, count):
+        """Up to count keys starting at position start."""
+        if start >= self.size or count <= 0:
+            return []
+        node = self.head
+        remaining = start + 1
+        for level in reversed(range(self.MAX_LEVELS)):
+            while node.width[level] <= remaining and node.next[level] is not None:
+                remaining -= node.width[level]
+                node = node.next[level]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+class Leaderboard:
+    """
+    direction_for(competition, metric) may return 'min' or 'max' for metrics
+    whose direction is declared elsewhere; None falls back to metric_direction().
+    """
+
+    def __init__(self, path, direction_for=None):
+        self.path = str(path)
+        self.direction_for = direction_for
+        self._local = threading.local()
+        self._lock = threading.Lock()
+        # competition -> {'last_id': int, 'metrics': {metric: IndexableSkiplist}, 'values': {(metric, id): value}}
+        self._boards = {}
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            self._local.conn = conn
+        return conn
+
+    def record(self, competition, filename, scores, session_id=None):
+        """Stores a scored submission and returns its submission id."""
+        conn = self._connect()
+        with conn:
+            cursor = conn.execute(
+                'INSERT INTO submissions (competition, filename, session_id, created_at, scores) VALUES (?, ?, ?, ?, ?)',
+                (competition, filename, session_id, time.time(), json.dumps(scores)),
+            )
+        self._sync(competition)
+        return cursor.lastrowid
+
+    def metrics(self, competition):
+        """{metric: direction} for every metric seen in the competition."""
+        board = self._sync(competition)
+        return {metric: self._direction(competition, metric) for metric in sorted(board['metrics'])}
+
+    def top(self, competition, metric, k=10, offset=0):
+        """Returns (total, entries) for the ranks offset+1 .. offset+k on one metric."""
+        board = self._sync(competition)
+        with self._lock:
+            ranking = board['metrics'].get(metric)
+            if ranking is None:
+                return 0, []
+            keys = ranking.slice(offset, k)
+            total = len(ranking)
+
+        details = self._details([submission_id for _, submission_id in keys])
+        entries = []
+        for position, (_, submission_id) in enumerate(keys, start=offset + 1):
+            filename, created_at = details.get(submission_id, (None, None))
+            entries.append({
+                'rank': position,
+                'submission_id': submission_id,
+                'filename': filename,
+                'created_at': created_at,
+                'value': board['values'][(metric, submission_id)],
+            })
+        return total, entries
+
+    def rank(self, competition, submission_id):
+        """{metric: {'rank', 'total', 'value', 'direction'}} for one submission."""
+        board = self._sync(competition)
+        ranks = {}
+        with self._lock:
+            for metric, ranking in board['metrics'].items():
+                value = board['values'].get((metric, submission_id))
+                if value is None:
+                    continue
+                direction = self._direction(competition, metric)
+                key = (_sort_value(direction, value), submission_id)
+                ranks[metric] = {
+                    'rank': ranking.rank(key) + 1,
+                    'total': len(ranking),
+                    'value': value,
+                    'direction': direction,
+                }
+        return ranks
+
+    def _sync(self, competition):
+        """Folds submissions stored since the last sync (by any process) into the rankings."""
+        with self._lock:
+            board = self._boards.setdefault(competition, {'last_id': 0, 'metrics': {}, 'values': {}})
+            last_id = board['last_id']
+
+        rows = self._connect().execute(
+            'SELECT id, scores FROM submissions WHERE competition = ? AND id > ? ORDER BY id',
+            (competition, last_id),
+        ).fetchall()
+
+        with self._lock:
+            for submission_id, scores in rows:
+                if submission_id <= board['last_id']:
+                    continue
+                for metric, value in rankable_metrics(json.loads(scores)).items():
+                    ranking = board['metrics'].setdefault(metric, IndexableSkiplist())
+                    ranking.insert((_sort_value(self._direction(competition, metric), value), submission_id))
+                    board['values'][(metric, submission_id)] = value
+                board['last_id'] = submission_id
+        return board
+
+    def _direction(self, competition, metric):
+        direction = self.direction_for(competition, metric) if self.direction_for else None
+        return direction or metric_direction(metric)
+
+    def _details(self, submission_ids):
+        if not submission_ids:
+            return {}
+        placeholders = ','.join('?' * len(submission_ids))
+        rows = self._connect().execute(
+            f'SELECT id, filename, created_at FROM submissions WHERE id IN ({placeholders})',
+            submission_ids,
+        ).fetchall()
+        return {submission_id: (filename, created_at) for submission_id, filename, created_at in rows}
+
+
+def _sort_value(direction, value):
+    # Rankings are ascending, so higher-is-better metrics are stored negated.
+    return value if direction == 'min' else -value
@@ -0,0 +1,90 @@
+"""
+Directory of stored request profiles.
+
+Each profile is kept as <id>.json (what was profiled, and the top
+functions), <id>.collapsed (sampled stacks for a flamegraph) and, for
+cProfile runs, <id>.pstats. Only the newest max_profiles are kept.
+"""
+import json
+import os
+import re
+import threading
+import time
+from pathlib import Path
+
+from core import profiling
+
+KINDS = {'pstats': '.pstats', 'collapsed': '.collapsed'}
+
+_VALID_ID = re.compile(r'^[A-Za-z0-9_-]{1,64}$')
+
+
+def is_valid_id(profile_id):
+    """Whether profile_id can name a profile's files: letters, digits, '-' and '_'."""
+    return bool(profile_id) and _VALID_ID.match(profile_id) is not None
+
+
+class ProfileStore:
+    def __init__(self, directory, max_profiles=50):
+        self.directory = Path(directory)
+        self.max_profiles = max_profiles
+        self._lock = threading.Lock()
+        os.makedirs(self.directory, exist_ok=True)
+
+    def save(self, profile_id, profile, **details):
+        """Writes a profiling.Profile under profile_id along with details such as the path profiled."""
+        if not is_valid_id(profile_id):
+            raise ValueError(f"Invalid profile id '{profile_id}'.")
+        files = ['collapsed']
+        (self.directory / f"{profile_id}.collapsed").write_text(profile.collapsed(), encoding='utf-8')
+        if profile.dump_stats(self.directory / f"{profile_id}.pstats"):
+            files.append('pstats')
+        meta = {
+            'id': profile_id,
+            'created_at': time.time(),
+            'mode': profile.mode if profile.profiler is not None else 'sample',
+            'seconds': profile.seconds,
+            'samples': sum(profile.samples.values()),
+            'files': files,
+            'top': profile.top(),
+            **details,
+        }
+        # The metadata goes last, so recent() never lists a profile whose files are still being written.
+        (self.directory / f"{profile_id}.json").write_text(json.dumps(meta, default=str), encoding='utf-8')
+        with self._lock:
+            self._prune()
+        return meta
+
+    def run(self, profile_id, mode, func, *args, **details):
+        """Calls func(*args) under profiling.profile(mode) and saves the profile, even if func fails."""
+        result = None
+        try:
+            with profiling.profile(mode) as result:
+                return func(*args)
+        finally:
+            if result is not None:
+                self.save(profile_id, result, **details)
+
+    def recent(self, limit=50):
+        """Metadata of the newest profiles, newest first."""
+        profiles = []
+        for path in self.directory.glob('*.json'):
+            try:
+                profiles.append(json.loads(path.read_text(encoding='utf-8')))
+            except (OSError, ValueError):
+                continue
+        profiles.sort(key=lambda meta: meta['created_at'], reverse=True)
+        return profiles[:limit]
+
+    def path(self, profile_id, kind):
+        """The file of one kind stored for a profile, or None."""
+        if kind not in KINDS or not is_valid_id(profile_id):
+            return None
+        path = self.directory / f"{profile_id}{KINDS[kind]}"
+        return path if path.is_file() else None
+
+    def _prune(self):
+        metas = sorted(self.directory.glob('*.json'), key=lambda path: path.stat().st_mtime, reverse=True)
+        for stale in metas[self.max_profiles:]:
+            for suffix in ('.json', *KINDS.values()):
+                stale.with_suffix(suffix).unlink(missing_ok=True)
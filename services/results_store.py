@@ -0,0 +1,108 @@
+"""
+SQLite-backed store for evaluation results.
+
+The browser session only carries an opaque session id; the scores
+themselves live here, so the cookie stays small no matter how many files
+are evaluated.
+"""
+import json
+import sqlite3
+import threading
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS results (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    session_id TEXT NOT NULL,
+    competition TEXT NOT NULL,
+    filename TEXT NOT NULL,
+    created_at REAL NOT NULL,
+    scores TEXT,
+    error TEXT
+);
+CREATE INDEX IF NOT EXISTS idx_results_session_competition_created
+    ON results (session_id, competition, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_competition_created
+    ON results (competition, created_at);
+CREATE INDEX IF NOT EXISTS idx_results_created
+    ON results (created_at);
+"""
+
+
+class ResultsStore:
+    def __init__(self, path):
+        self.path = str(path)
+        self._local = threading.local()
+        self._connect().executescript(SCHEMA)
+
+    def _connect(self):
+        # sqlite3 connections must not be shared between threads.
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    def add(self, session_id, competition, results):
+        """Stores the result dicts returned for one upload."""
+        now = time.time()
+        rows = [
+            (
+                session_id,
+                competition,
+                result['filename'],
+                now,
+                json.dumps(result['scores']) if 'scores' in result else None,
+                result.get('error'),
+            )
+            for result in results
+        ]
+        conn = self._connect()
+        with conn:
+            conn.executemany(
+                'INSERT INTO results (session_id, competition, filename, created_at, scores, error) '
+                'VALUES (?, ?, ?, ?, ?, ?)',
+                rows,
+            )
+
+    def page(self, session_id, page=0, per_page=10):
+        """
+        Returns {competition: [result, ...]} holding, for every competition,
+        the page-th block of per_page most recent results in upload order,
+        plus whether older results exist beyond this page.
+        """
+        conn = self._connect()
+        rows = conn.execute(
+            """
+            SELECT competition, filename, scores, error FROM (
+                SELECT competition, filename, scores, error, created_at, id,
+                       ROW_NUMBER() OVER (PARTITION BY competition ORDER BY created_at DESC, id DESC) AS rn
+                FROM results WHERE session_id = ?
+            )
+            WHERE rn > ? AND rn <= ?
+            ORDER BY competition, created_at, id
+            """,
+            (session_id, page * per_page, (page + 1) * per_page),
+        ).fetchall()
+
+        results = {}
+        for competition, filename, scores, error in rows:
+            if scores is not None:
+                result = {'scores': json.loads(scores), 'filename': filename}
+            else:
+                result = {'error': error, 'filename': filename}
+            results.setdefault(competition, []).append(result)
+
+        (largest,) = conn.execute(
+            'SELECT COALESCE(MAX(n), 0) FROM '
+            '(SELECT COUNT(*) AS n FROM results WHERE session_id = ? GROUP BY competition)',
+            (session_id,),
+        ).fetchone()
+        return results, largest > (page + 1) * per_page
+
+    def clear(self, session_id):
+        conn = self._connect()
+        with conn:
+            conn.execute('DELETE FROM results WHERE session_id = ?', (session_id,))
@@ -0,0 +1,157 @@
+import collections
+import csv
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+from core import batch
+
+COMPETITIONS_DIR = Path('competitions')
+SCORE_FILE = batch._score_file
+
+
+def copy_truth(competition, path):
+    path.parent.mkdir(parents=True, exist_ok=True)
+    shutil.copy(COMPETITIONS_DIR / competition / 'test_ground_truth.csv', path)
+
+
+@pytest.fixture
+def submissions(tmp_path):
+    """A small tree of predictions, and the competition each belongs to."""
+    root = tmp_path / 'submissions'
+    expected = {
+        'pet_finder/first.csv': 'pet_finder',                                  # directory
+        'team/pet_finder-v2.csv': 'pet_finder',                                # file name and separator
+        'team/steel_plate_defect_prediction.csv': 'steel_plate_defect_prediction',
+        'misc/final.csv': 'paddy_disease_classification',                      # header only
+        'misc/plant.csv': 'plant_traits_2024',                                 # header only
+    }
+    for relative, competition in expected.items():
+        copy_truth(competition, root / relative)
+    return root, expected
+
+
+def read_records(output):
+    with open(output, encoding='utf-8', newline='') as f:
+        if output.suffix == '.csv':
+            return list(csv.DictReader(f))
+        return [json.loads(line) for line in f]
+
+
+def count_scoring(monkeypatch, interrupt_after=None):
+    """Counts _score_file calls per path; optionally interrupts the run like Ctrl-C."""
+    calls = collections.Counter()
+
+    def counted(competitions_dir, evaluators_package, competition, path):
+        if interrupt_after is not None and sum(calls.values()) == interrupt_after:
+            raise KeyboardInterrupt
+        calls[path.name] += 1
+        return SCORE_FILE(competitions_dir, evaluators_package, competition, path)
+    monkeypatch.setattr(batch, '_score_file', counted)
+    return calls
+
+
+@pytest.mark.parametrize('suffix', ['.jsonl', '.csv'])
+def test_interrupted_run_resumes_and_scores_each_file_once(submissions, tmp_path, monkeypatch, suffix):
+    root, expected = submissions
+    output = tmp_path / f'results{suffix}'
+
+    first = count_scoring(monkeypatch, interrupt_after=2)
+    with pytest.raises(KeyboardInterrupt):
+        batch.score_tree(root, output, jobs=1)
+    assert sum(first.values()) == 2
+    # The interruption also cut a line short while it was being written.
+    with open(output, 'a', encoding='utf-8') as f:
+        f.write('{"path": "team/pet_fin' if suffix == '.jsonl' else 'team/pet_finder-v2.csv,1:2,pet_fi')
+
+    second = count_scoring(monkeypatch)
+    assert batch.score_tree(root, output, jobs=1) == 0
+    assert not set(first) & set(second)
+    assert sum(first.values()) + sum(second.values()) == len(expected)
+
+    records = read_records(output)
+    if suffix == '.jsonl':
+        assert sorted(record['path'] for record in records) == sorted(expected)
+    else:
+        # One row per metric; no (path, metric) pair twice.
+        pairs = [(record['path'], record['metric']) for record in records]
+        assert len(pairs) == len(set(pairs))
+        assert {path for path, _ in pairs} == set(expected)
+    assert {record['path']: record['competition'] for record in records} == expected
+    assert all(record['status'] == 'ok' for record in records)
+
+    # A third run has nothing left to do.
+    third = count_scoring(monkeypatch)
+    assert batch.score_tree(root, output, jobs=1) == 0
+    assert not third
+    assert len(read_records(output)) == len(records)
+
+
+def test_changed_files_and_retried_errors_are_scored_again(submissions, tmp_path, monkeypatch):
+    root, expected = submissions
+    broken = root / 'pet_finder' / 'broken.csv'
+    broken.write_text('PetID,AdoptionSpeed\n1,2\n')
+    output = tmp_path / 'results.jsonl'
+    assert batch.score_tree(root, output, jobs=1) == 1
+
+    calls = count_scoring(monkeypatch)
+    assert batch.score_tree(root, output, jobs=1) == 0
+    assert not calls
+    # Errors are only retried when asked to.
+    assert batch.score_tree(root, output, jobs=1, retry_errors=True) == 1
+    assert calls == {'broken.csv': 1}
+
+    # A file whose size or mtime changed is a new version.
+    copy_truth('pet_finder', broken)
+    assert batch.score_tree(root, output, jobs=1) == 0
+    assert calls == {'broken.csv': 2}
+    statuses = [(record['path'], record['status']) for record in read_records(output)]
+    assert statuses.count(('pet_finder/broken.csv', 'ok')) == 1
+
+
+def test_partial_last_line_is_dropped(tmp_path):
+    output = tmp_path / 'results.jsonl'
+    output.write_text('{"path": "a.csv", "version": "1:2", "status": "ok"}\n{"path": "b.cs')
+    results = batch.ResultsFile(output)
+    results.close()
+    assert results.done() == {('a.csv', '1:2')}
+    assert output.read_text() == '{"path": "a.csv", "version": "1:2", "status": "ok"}\n'
+
+
+@pytest.fixture(scope='module')
+def matcher():
+    competitions = sorted(p.name for p in COMPETITIONS_DIR.iterdir() if (p / 'test_ground_truth.csv').is_file())
+    return batch.CompetitionMatcher(str(COMPETITIONS_DIR), 'evaluators', competitions)
+
+
+@pytest.mark.parametrize('relative, competition', [
+    ('pet_finder/anything.csv', 'pet_finder'),
+    ('runs/pet_finder/2024/out.csv.gz', 'pet_finder'),
+    ('pet_finder.csv', 'pet_finder'),
+    ('pet_finder_v2.csv', 'pet_finder'),
+    ('pet_finder+ensemble.csv', 'pet_finder'),
+    ('pet_finder v3.zip', 'pet_finder'),
+])
+def test_matcher_picks_the_competition_by_path(matcher, relative, competition):
+    # The file does not exist: a path match never reads it.
+    assert matcher.match(Path('/nonexistent'), Path(relative)) == (competition, None)
+
+
+def test_matcher_falls_back_to_the_header(matcher, tmp_path):
+    # The name only contains a competition's name, which does not count.
+    copy_truth('steel_plate_defect_prediction', tmp_path / 'my_pet_finderish.csv')
+    assert matcher.match(tmp_path, Path('my_pet_finderish.csv')) == ('steel_plate_defect_prediction', None)
+    copy_truth('pet_finder', tmp_path / 'exp_pet_finder.csv')
+    assert matcher.match(tmp_path, Path('exp_pet_finder.csv')) == ('pet_finder', None)
+
+    (tmp_path / 'unknown.csv').write_text('a,b\n1,2\n')
+    competition, reason = matcher.match(tmp_path, Path('unknown.csv'))
+    assert competition is None and 'no competition' in reason
+
+
+def test_matcher_rejects_paths_naming_several_competitions(matcher):
+    competition, reason = matcher.match(Path('/nonexistent'), Path('pet_finder/steel_plate_defect_prediction.csv'))
+    assert competition is None
+    assert reason == 'Path names several competitions: pet_finder, steel_plate_defect_prediction'
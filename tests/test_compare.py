@@ -0,0 +1,130 @@
+import numpy as np
+import pandas as pd
+import pytest
+from scipy import stats
+
+from core import bootstrap, compare
+from core.config import BootstrapConfig
+from core.scoring import compare_submissions
+
+CONFIG = BootstrapConfig(n_resamples=200, seed=0)
+
+
+def truth(competition):
+    return pd.read_csv(f'competitions/{competition}/test_ground_truth.csv', dtype={'PetID': str})
+
+
+def write(tmp_path, name, frame):
+    path = tmp_path / f'{name}.csv'
+    frame.to_csv(path, index=False)
+    return path
+
+
+@pytest.mark.parametrize('b, c', [(0, 1), (1, 0), (3, 5), (7, 7), (0, 12), (20, 4), (40, 61), (1, 200)])
+def test_mcnemar_exact_matches_binomial_test(b, c):
+    expected = stats.binomtest(min(b, c), b + c, 0.5).pvalue
+    assert compare.mcnemar_p_value(b, c) == pytest.approx(expected, rel=1e-9)
+
+
+def test_mcnemar_without_discordant_rows():
+    assert compare.mcnemar_p_value(0, 0) == 1.0
+
+
+def test_mcnemar_switches_to_chi_squared_above_the_exact_limit():
+    limit = compare.MCNEMAR_EXACT_MAX
+    b = limit // 2 - 30
+    # At the limit the exact test is used.
+    exact = stats.binomtest(b, limit, 0.5).pvalue
+    assert compare.mcnemar_p_value(b, limit - b) == pytest.approx(exact, rel=1e-9)
+    # One row past it, the continuity-corrected chi-squared approximation.
+    c = limit + 1 - b
+    chi_squared = stats.chi2.sf((abs(b - c) - 1) ** 2 / (b + c), df=1)
+    p_value = compare.mcnemar_p_value(b, c)
+    assert p_value == pytest.approx(chi_squared, rel=1e-9)
+    # Both sides of the switch agree closely.
+    assert p_value == pytest.approx(stats.binomtest(b, b + c, 0.5).pvalue, rel=0.05)
+
+
+def test_mcnemar_matrix_counts_discordant_rows():
+    first = np.array([1, 1, 0, 0, 1], dtype=bool)
+    second = np.array([1, 0, 1, 0, 0], dtype=bool)
+    result = compare.mcnemar_matrix([first, second])
+    assert result['only_row_correct'] == [[0, 2], [1, 0]]
+    assert result['only_column_correct'] == [[0, 1], [2, 0]]
+    assert result['p_value'][0][0] is None
+    assert result['p_value'][0][1] == result['p_value'][1][0] == compare.mcnemar_p_value(2, 1)
+
+
+def test_bootstrap_p_value_is_one_without_difference():
+    assert compare.bootstrap_p_value(0.0, np.zeros(100)) == 1.0
+    assert compare.bootstrap_p_value(0.0, np.random.default_rng(0).normal(size=100)) == 1.0
+
+
+def test_identical_submissions_do_not_differ(tmp_path):
+    df = truth('pet_finder')
+    rng = np.random.default_rng(0)
+    noisy = df.assign(AdoptionSpeed=np.where(rng.random(len(df)) < 0.3, rng.integers(0, 5, len(df)), df.AdoptionSpeed))
+    path = write(tmp_path, 'noisy', noisy)
+    result = compare_submissions('competitions', 'evaluators', 'pet_finder', {'a': path, 'b': path}, CONFIG)
+    for key in ('accuracy', 'f1_score_macro'):
+        assert result['metrics'][key]['delta'][0][1] == 0.0
+        assert result['metrics'][key]['p_value'][0][1] == 1.0
+        assert result['metrics'][key]['interval'][0][1] == [0.0, 0.0]
+    assert result['mcnemar']['accuracy']['p_value'][0][1] == 1.0
+
+
+def test_delta_sign_follows_submission_order(tmp_path):
+    df = truth('pet_finder')
+    rng = np.random.default_rng(1)
+    worse = df.assign(AdoptionSpeed=np.where(rng.random(len(df)) < 0.2, (df.AdoptionSpeed + 1) % 5, df.AdoptionSpeed))
+    sources = {'best': write(tmp_path, 'best', df), 'worse': write(tmp_path, 'worse', worse)}
+    result = compare_submissions('competitions', 'evaluators', 'pet_finder', sources, CONFIG)
+
+    accuracy = result['metrics']['accuracy']
+    observed = result['scores']['worse']['accuracy'] - result['scores']['best']['accuracy']
+    assert result['submissions'] == ['best', 'worse']
+    assert accuracy['delta'][0][1] == pytest.approx(observed) and observed < 0
+    assert accuracy['delta'][1][0] == pytest.approx(-observed)
+    low, high = accuracy['interval'][0][1]
+    assert low <= observed <= high < 0
+    assert accuracy['p_value'][0][1] < 0.01
+    assert result['mcnemar']['accuracy']['only_row_correct'][0][1] > 0
+    assert result['mcnemar']['accuracy']['only_row_correct'][1][0] == 0
+
+
+def test_delta_sign_for_a_lower_is_better_metric(tmp_path):
+    df = truth('steel_plate_defect_prediction')
+    labels = df.columns[1:]
+    sharp = df.copy()
+    sharp[labels] = df[labels] * 0.8 + 0.2 / len(labels)
+    blurred = df.copy()
+    blurred[labels] = df[labels] * 0.3 + 0.7 / len(labels)
+    sources = {'blurred': write(tmp_path, 'blurred', blurred), 'sharp': write(tmp_path, 'sharp', sharp)}
+    result = compare_submissions('competitions', 'evaluators', 'steel_plate_defect_prediction', sources, CONFIG)
+
+    log_loss = result['metrics']['log_loss']
+    assert log_loss['direction'] == 'min'
+    assert log_loss['delta'][0][1] < 0 < log_loss['delta'][1][0]
+    assert log_loss['p_value'][0][1] < 0.01
+
+
+def test_paired_resamples_share_rows_between_submissions(tmp_path):
+    from core import engine
+    from core.scoring import evaluator_for, ground_truth_path
+
+    evaluator = evaluator_for('evaluators', 'pet_finder')
+    path = write(tmp_path, 'truth', truth('pet_finder'))
+    df_truth, df_pred = evaluator.validate_and_read_inputs(ground_truth_path('competitions', 'pet_finder'), path)
+    data = engine.PREPARERS[evaluator.SPEC.task](df_truth, df_pred, ['AdoptionSpeed'], engine.ground_truth_memo(df_truth))
+    metrics = {'accuracy': 'accuracy', 'f1_score_macro': 'f1_macro'}
+
+    paired, drawn = bootstrap.paired_resamples([data, data], metrics, CONFIG)
+    single = bootstrap.confidence_intervals(data, metrics, CONFIG)
+    assert drawn == single['n_resamples'] == CONFIG.n_resamples
+    for key in metrics:
+        assert paired[key].shape == (2, drawn)
+        np.testing.assert_array_equal(paired[key][0], paired[key][1])
+    # The stacked accuracy resampler agrees with the single-submission one on the same draws.
+    tail = (1 - CONFIG.confidence) / 2 * 100
+    low, high = np.percentile(paired['accuracy'][0], (tail, 100 - tail))
+    assert [low, high] == pytest.approx(single['intervals']['accuracy'])
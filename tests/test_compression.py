@@ -0,0 +1,99 @@
+import gzip
+import io
+import zipfile
+
+import pytest
+
+from core import uploads
+
+CSV = b'id,label\n' + b''.join(b'%d,%d\n' % (i, i % 3) for i in range(5000))
+# Compresses to a tiny fraction of its size, like a decompression bomb.
+REPETITIVE = b'id,label\n' + b'0,0\n' * 250_000
+
+
+def gzipped(data):
+    return gzip.compress(data)
+
+
+def zipped(members):
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as archive:
+        for name, data in members.items():
+            archive.writestr(name, data)
+    return buffer.getvalue()
+
+
+def zstd_compressed(data):
+    zstandard = pytest.importorskip('zstandard')
+    return zstandard.ZstdCompressor().compress(data)
+
+
+COMPRESSORS = [gzipped, lambda data: zipped({'predictions.csv': data}), zstd_compressed]
+
+
+@pytest.mark.parametrize('compress', COMPRESSORS)
+def test_compressed_uploads_read_back(tmp_path, compress):
+    path = tmp_path / 'predictions.csv'
+    path.write_bytes(compress(CSV))
+    for source in (path, io.BytesIO(compress(CSV))):
+        prediction = uploads.open_prediction(source)
+        assert isinstance(prediction, uploads.CompressedPrediction)
+        assert b''.join(uploads.iter_bytes(prediction)) == CSV
+        assert len(uploads.read_prediction_csv(prediction)) == 5000
+
+
+@pytest.mark.parametrize('compress', COMPRESSORS)
+def test_decompressing_past_the_limit_is_an_error(compress):
+    data = REPETITIVE
+    source = io.BytesIO(compress(data))
+    # Far below the limit compressed, so only the decompressed size can trip it.
+    assert len(source.getvalue()) < len(data) // 100
+    prediction = uploads.open_prediction(source, max_bytes=len(data) // 2)
+    with pytest.raises(ValueError, match='decompresses to more than'):
+        b''.join(uploads.iter_bytes(prediction))
+    with pytest.raises(ValueError, match='decompresses to more than'):
+        uploads.read_prediction_csv(prediction)
+
+    # Exactly at the limit is allowed.
+    prediction = uploads.open_prediction(source, max_bytes=len(data))
+    assert b''.join(uploads.iter_bytes(prediction)) == data
+
+
+def test_gzip_bomb_is_stopped_despite_a_small_recorded_size():
+    # Several members: the trailer records only the last one's size.
+    source = io.BytesIO(gzipped(REPETITIVE) + gzipped(b''))
+    prediction = uploads.open_prediction(source, max_bytes=len(REPETITIVE) // 2)
+    assert prediction.size() < len(REPETITIVE) // 100
+    with pytest.raises(ValueError, match='decompresses to more than'):
+        b''.join(uploads.iter_bytes(prediction))
+
+
+def test_zip_with_several_members_is_rejected():
+    source = io.BytesIO(zipped({'a.csv': CSV, 'b.csv': CSV}))
+    with pytest.raises(ValueError, match='exactly one CSV file, found 2'):
+        uploads.read_prediction_csv(uploads.open_prediction(source))
+
+
+def test_zip_metadata_and_folders_do_not_count_as_members():
+    source = io.BytesIO(zipped({'out/': b'', 'out/predictions.csv': CSV, '__MACOSX/._predictions.csv': b'x'}))
+    assert b''.join(uploads.iter_bytes(uploads.open_prediction(source))) == CSV
+
+
+def test_corrupt_gzip_is_a_value_error():
+    data = bytearray(gzipped(CSV))
+    data[len(data) // 2:len(data) // 2 + 16] = b'\0' * 16
+    with pytest.raises(ValueError, match='Could not'):
+        uploads.read_prediction_csv(uploads.open_prediction(io.BytesIO(bytes(data))))
+
+
+def test_zstd_size_is_read_from_the_frame_header():
+    data = zstd_compressed(CSV)
+    assert uploads.open_prediction(io.BytesIO(data)).size() == len(CSV)
+
+
+def test_zstd_without_the_package_is_rejected():
+    if uploads.zstandard is not None:
+        pytest.skip('zstandard is installed')
+    source = io.BytesIO(b'\x28\xb5\x2f\xfd' + b'\0' * 16)
+    with pytest.raises(ValueError, match='zstd-compressed uploads are not supported'):
+        uploads.open_prediction(source)
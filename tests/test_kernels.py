@@ -0,0 +1,94 @@
+import numpy as np
+import pytest
+from sklearn.metrics import accuracy_score, average_precision_score, f1_score, roc_auc_score
+
+from core import kernels
+
+
+def tied_scores(n, levels, seed):
+    """Binary truth and scores drawn from only `levels` distinct values, so most scores tie."""
+    rng = np.random.default_rng(seed)
+    truth = (rng.random(n) < 0.3).astype(np.int64)
+    scores = np.round(np.clip(0.35 * truth + rng.random(n) * 0.65, 0, 1) * (levels - 1)) / (levels - 1)
+    return truth, scores
+
+
+@pytest.mark.parametrize('n, levels, seed', [(50, 3, 0), (500, 11, 1), (2000, 101, 2), (1000, 100_000, 3)])
+def test_curve_matches_sklearn_with_ties(n, levels, seed):
+    truth, scores = tied_scores(n, levels, seed)
+    curve = kernels.BinaryCurve(truth, scores)
+    assert curve.roc_auc() == pytest.approx(roc_auc_score(truth, scores), rel=1e-12)
+    assert curve.average_precision() == pytest.approx(average_precision_score(truth, scores), rel=1e-12)
+
+
+def test_constant_scores():
+    truth = np.array([0, 1, 0, 1, 1])
+    scores = np.full(5, 0.5)
+    curve = kernels.BinaryCurve(truth, scores)
+    assert curve.roc_auc() == roc_auc_score(truth, scores) == 0.5
+    assert curve.average_precision() == pytest.approx(average_precision_score(truth, scores))
+
+
+@pytest.mark.parametrize('label', [0, 1])
+def test_single_class_is_rejected(label):
+    truth = np.full(10, label)
+    scores = np.linspace(0, 1, 10)
+    curve = kernels.BinaryCurve(truth, scores)
+    with pytest.raises(ValueError, match="Only one class"):
+        curve.roc_auc()
+    with pytest.raises(ValueError, match="Only one class"):
+        curve.average_precision()
+    # The resampled form reports the undefined AUC as NaN rather than raising.
+    tps, fps = curve.resampled_counts(np.ones((1, 10)))
+    assert np.isnan(kernels.roc_auc_from_counts(tps, fps)).all()
+
+
+def test_best_f1_matches_a_threshold_sweep():
+    truth, scores = tied_scores(800, 21, 4)
+    best = kernels.BinaryCurve(truth, scores).best_f1()
+    sweep = {threshold: f1_score(truth, scores >= threshold) for threshold in np.unique(scores)}
+    assert best['f1'] == pytest.approx(max(sweep.values()))
+    assert sweep[best['threshold']] == pytest.approx(best['f1'])
+    assert best['accuracy'] == pytest.approx(accuracy_score(truth, scores >= best['threshold']))
+
+
+def test_class_counts_at_threshold():
+    truth, scores = tied_scores(300, 9, 5)
+    true_positives, true_count, pred_count = kernels.BinaryCurve(truth, scores).class_counts_at(0.5)
+    predicted = (scores >= 0.5).astype(int)
+    np.testing.assert_array_equal(true_count, np.bincount(truth, minlength=2))
+    np.testing.assert_array_equal(pred_count, np.bincount(predicted, minlength=2))
+    np.testing.assert_array_equal(true_positives, np.bincount(truth[truth == predicted], minlength=2))
+
+
+def test_resampled_counts_match_curves_of_the_resamples():
+    truth, scores = tied_scores(400, 17, 6)
+    curve = kernels.BinaryCurve(truth, scores)
+    rng = np.random.default_rng(7)
+    idx = rng.integers(0, len(truth), size=(5, len(truth)))
+    weights = np.stack([np.bincount(row, minlength=len(truth)) for row in idx]).astype(np.float64)
+
+    tps, fps = curve.resampled_counts(weights)
+    auc = kernels.roc_auc_from_counts(tps, fps)
+    precision = kernels.average_precision_from_counts(tps, fps)
+    for b, row in enumerate(idx):
+        assert auc[b] == pytest.approx(roc_auc_score(truth[row], scores[row]), rel=1e-12)
+        assert precision[b] == pytest.approx(average_precision_score(truth[row], scores[row]), rel=1e-12)
+
+    # Unit weights give back the full sample's curve.
+    tps, fps = curve.resampled_counts(np.ones((1, len(truth))))
+    np.testing.assert_array_equal(tps[0], curve.tps)
+    np.testing.assert_array_equal(fps[0], curve.fps)
+
+
+def test_histogram_curve_is_exact_for_scores_on_bin_edges():
+    bins = 64
+    truth, scores = tied_scores(1000, bins + 1, 8)
+    scores = np.minimum(scores, (bins - 1) / bins)
+    cells = (scores * bins).astype(np.int64)
+    negative = np.bincount(cells[truth == 0], minlength=bins)
+    positive = np.bincount(cells[truth == 1], minlength=bins)
+    curve = kernels.BinaryCurve.from_histogram(negative, positive)
+    exact = kernels.BinaryCurve(truth, scores)
+    assert curve.roc_auc() == pytest.approx(exact.roc_auc(), rel=1e-12)
+    assert curve.average_precision() == pytest.approx(exact.average_precision(), rel=1e-12)
@@ -0,0 +1,56 @@
+import bisect
+import random
+
+import pytest
+
+from services.leaderboard import IndexableSkiplist, _sort_value
+
+
+def assert_matches(skiplist, expected, probes):
+    assert len(skiplist) == len(expected)
+    assert skiplist.slice(0, len(expected) + 1) == expected
+    for key in probes:
+        assert skiplist.rank(key) == bisect.bisect_left(expected, key)
+    for start in {0, 1, len(expected) // 2, max(len(expected) - 1, 0), len(expected)}:
+        assert skiplist.slice(start, 5) == expected[start:start + 5]
+
+
+@pytest.mark.parametrize('seed', range(5))
+def test_random_inserts_match_a_sorted_list(seed):
+    rng = random.Random(seed)
+    random.seed(seed)
+    skiplist = IndexableSkiplist()
+    expected = []
+    assert_matches(skiplist, expected, [0])
+    # Few distinct values, so most keys tie.
+    for step in range(1, 1501):
+        key = rng.randint(0, 40)
+        skiplist.insert(key)
+        bisect.insort(expected, key)
+        if step % 100 == 0:
+            assert_matches(skiplist, expected, range(-1, 42))
+
+
+def test_slice_past_the_end():
+    skiplist = IndexableSkiplist()
+    for key in (3, 1, 2):
+        skiplist.insert(key)
+    assert skiplist.slice(2, 10) == [3]
+    assert skiplist.slice(3, 10) == []
+    assert skiplist.slice(0, 0) == []
+
+
+@pytest.mark.parametrize('direction', ['max', 'min'])
+def test_ranks_follow_the_metric_direction(direction):
+    rng = random.Random(direction)
+    random.seed(0)
+    skiplist = IndexableSkiplist()
+    values = {submission_id: rng.choice([0.25, 0.5, 0.75, 1.0]) for submission_id in range(1, 301)}
+    for submission_id, value in values.items():
+        skiplist.insert((_sort_value(direction, value), submission_id))
+
+    # Best value first; ties keep submission order.
+    ordered = sorted(values, key=lambda i: (-values[i] if direction == 'max' else values[i], i))
+    assert [submission_id for _, submission_id in skiplist.slice(0, len(values))] == ordered
+    for position, submission_id in enumerate(ordered):
+        assert skiplist.rank((_sort_value(direction, values[submission_id]), submission_id)) == position
@@ -0,0 +1,52 @@
+import pandas as pd
+import pytest
+
+from core import engine, schema, validation
+from core.scoring import evaluator_for, ground_truth_path
+
+COMPETITIONS = ['steel_plate_defect_prediction', 'paddy_disease_classification', 'pet_finder', 'plant_traits_2024']
+
+
+def prediction(competition, tmp_path):
+    """The competition's ground truth written out as a prediction, with its schema and constraint."""
+    spec = evaluator_for('evaluators', competition).SPEC
+    df_truth = engine.read_ground_truth(spec, ground_truth_path('competitions', competition))
+    path = tmp_path / f'{competition}.csv'
+    df_truth.to_csv(path, index=False)
+    return path, spec.prediction_schema(spec.labels_for(df_truth)), engine.value_constraint(spec)
+
+
+@pytest.mark.parametrize('competition', COMPETITIONS)
+def test_c_parser_reads_the_schema_dtypes(competition, tmp_path, monkeypatch):
+    monkeypatch.setattr(schema, 'HAS_PYARROW', False)
+    path, prediction_schema, constraint = prediction(competition, tmp_path)
+    assert schema.read_fast(path, prediction_schema) is None
+    frame = validation.read_checked(path, prediction_schema, constraint)
+    assert list(frame.columns) == prediction_schema.columns
+    for column, dtype in prediction_schema.dtypes.items():
+        assert str(frame[column].dtype) == str(pd.api.types.pandas_dtype(dtype)), column
+
+
+@pytest.mark.parametrize('competition', COMPETITIONS)
+def test_pyarrow_matches_the_c_parser(competition, tmp_path, monkeypatch):
+    pytest.importorskip('pyarrow')
+    path, prediction_schema, constraint = prediction(competition, tmp_path)
+    fast = schema.read_fast(path, prediction_schema)
+    assert fast is not None
+    monkeypatch.setattr(schema, 'HAS_PYARROW', False)
+    expected = validation.read_checked(path, prediction_schema, constraint)
+    pd.testing.assert_frame_equal(fast, expected, check_categorical=False)
+
+
+def test_pyarrow_rejects_fall_back_to_the_located_error(tmp_path):
+    pytest.importorskip('pyarrow')
+    path, prediction_schema, constraint = prediction('steel_plate_defect_prediction', tmp_path)
+    lines = path.read_text().splitlines()
+    cells = lines[5].split(',')
+    cells[1] = 'oops'
+    lines[5] = ','.join(cells)
+    path.write_text('\n'.join(lines) + '\n')
+
+    assert schema.read_fast(path, prediction_schema) is None
+    with pytest.raises(ValueError, match="Line 6 .*'oops'"):
+        validation.read_checked(path, prediction_schema, constraint)
@@ -0,0 +1,98 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from core import engine, streaming, validation
+from core.alignment import match_chunk, truth_index
+from core.scoring import evaluator_for, ground_truth_path, score_submission
+
+# Scores read off the binned score histogram are approximate when streamed.
+HISTOGRAM_KEYS = ('roc_auc', 'pr_auc', 'best_f1_threshold')
+
+# (competition, rows per chunk); small chunks leave some classes out of most chunks.
+CASES = [
+    ('predict_effective_arguments', 500),          # ONEHOT
+    ('dog_breed_classification', 64),              # ONEHOT, 120 classes
+    ('pet_finder', 37),                            # LABEL, integer labels
+    ('paddy_disease_classification', 50),          # LABEL, string labels
+    ('steel_plate_defect_prediction', 101),        # MULTILABEL_ONEHOT
+    ('multi_label_classification', 250),           # MULTILABEL_LABELS
+    ('plant_traits_2024', 1000),                   # REGRESSION
+    ('toxic_comment_classification', 60_000),      # BINARY
+]
+
+
+def noisy_prediction(competition, rng):
+    """The ground truth with part of each row's answer replaced, in shuffled row order."""
+    spec = evaluator_for('evaluators', competition).SPEC
+    df = pd.read_csv(ground_truth_path('competitions', competition), dtype={spec.id_column: str})
+    labels = spec.labels_for(df)
+    n = len(df)
+    wrong = rng.random(n) < 0.3
+    if spec.task in (engine.ONEHOT, engine.MULTILABEL_ONEHOT):
+        noise = rng.dirichlet(np.ones(len(labels)), size=n)
+        df[labels] = 0.6 * df[labels].to_numpy(dtype=float) + 0.4 * noise
+    elif spec.task == engine.BINARY:
+        df[labels[0]] = np.clip(0.5 * df[labels[0]] + 0.5 * rng.random(n), 0, 1)
+    elif spec.task in (engine.LABEL, engine.MULTILABEL_LABELS):
+        column = labels[0]
+        df.loc[wrong, column] = df[column].to_numpy()[rng.permutation(n)][wrong]
+    else:
+        df[labels] = df[labels] * (1 + 0.1 * rng.standard_normal((n, len(labels))))
+    return df.iloc[rng.permutation(n)]
+
+
+def assert_scores_equal(streamed, whole, key=''):
+    if isinstance(whole, dict):
+        assert streamed.keys() == whole.keys()
+        for name in whole:
+            assert_scores_equal(streamed[name], whole[name], name if key == '' else key)
+    elif key in HISTOGRAM_KEYS:
+        assert streamed == pytest.approx(whole, abs=1e-3), key
+    else:
+        assert streamed == pytest.approx(whole, rel=1e-9, abs=1e-12), key
+
+
+@pytest.fixture(scope='module')
+def predictions(tmp_path_factory):
+    directory = tmp_path_factory.mktemp('predictions')
+    rng = np.random.default_rng(0)
+    paths = {}
+    for competition, _ in CASES:
+        paths[competition] = directory / f'{competition}.csv'
+        noisy_prediction(competition, rng).to_csv(paths[competition], index=False)
+    return paths
+
+
+@pytest.mark.parametrize('competition, chunk_rows', CASES)
+def test_streamed_scores_match_whole_file(predictions, competition, chunk_rows):
+    path = predictions[competition]
+    whole = score_submission('competitions', 'evaluators', competition, path)
+    evaluator = evaluator_for('evaluators', competition)
+    streamed = evaluator.evaluate_stream(ground_truth_path('competitions', competition), path, chunk_rows)
+    assert_scores_equal(streamed, whole)
+
+
+@pytest.mark.parametrize('competition, chunk_rows', CASES)
+def test_merged_totals_match_a_single_pass(predictions, competition, chunk_rows):
+    spec = evaluator_for('evaluators', competition).SPEC
+    df_truth = engine.read_ground_truth(spec, ground_truth_path('competitions', competition))
+    columns = spec.labels_for(df_truth)
+    memo = engine.ground_truth_memo(df_truth)
+    index = truth_index(df_truth, spec.id_column)
+    seen = np.zeros(len(index), dtype=bool)
+
+    single = streaming.StreamTotals(spec, columns, memo)
+    halves = [streaming.StreamTotals(spec, columns, memo), streaming.StreamTotals(spec, columns, memo)]
+    chunks = validation.read_checked_chunks(
+        predictions[competition], chunk_rows, spec.prediction_schema(columns), engine.value_constraint(spec)
+    )
+    for i, chunk in enumerate(chunks):
+        truth = df_truth.iloc[match_chunk(index, chunk[spec.id_column].to_numpy(), seen)].reset_index(drop=True)
+        data = engine.PREPARERS[spec.task](truth, chunk.reset_index(drop=True), columns, lambda key, build: build(truth))
+        single.add(data)
+        # Alternate chunks, so each half misses rows and, for small chunks, classes of the other.
+        halves[i % 2].add(data)
+    halves[0].merge(halves[1])
+
+    assert_scores_equal(engine.compute_metrics(spec, halves[0]), engine.compute_metrics(spec, single))
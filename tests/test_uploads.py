@@ -0,0 +1,47 @@
+import gzip
+import hashlib
+
+import pytest
+
+from core import uploads
+
+CSV = b'id,label\n' + b''.join(b'%d,%d\n' % (i, i % 3) for i in range(5000))
+
+
+def spooled(data, max_size):
+    stream = uploads.spooled_upload_stream(max_size)
+    for start in range(0, len(data), 4096):
+        stream.write(data[start:start + 4096])
+    return stream
+
+
+@pytest.mark.parametrize('max_size', [1 << 20, 1024])
+def test_spooled_upload_keeps_its_digest(max_size):
+    stream = spooled(CSV, max_size)
+    # The small buffer has spilled to disk.
+    assert stream._rolled == (max_size < len(CSV))
+    expected = hashlib.sha256(CSV).hexdigest()
+    assert uploads.content_hash(stream) == expected
+
+    # Reading the plain upload, as scoring does, neither changes its bytes nor its digest.
+    assert uploads.open_prediction(stream) is stream
+    assert len(uploads.read_prediction_csv(stream)) == 5000
+    assert b''.join(uploads.iter_bytes(stream)) == CSV
+    assert uploads.source_size(stream) == len(CSV)
+    assert uploads.content_hash(stream) == expected
+
+
+def test_digest_covers_the_compressed_bytes():
+    data = gzip.compress(CSV)
+    stream = spooled(data, 1024)
+    assert uploads.content_hash(stream) == hashlib.sha256(data).hexdigest()
+    assert b''.join(uploads.iter_bytes(uploads.open_prediction(stream))) == CSV
+    assert uploads.content_hash(stream) == hashlib.sha256(data).hexdigest()
+
+
+def test_paths_and_unhashed_streams_have_no_digest(tmp_path):
+    path = tmp_path / 'predictions.csv'
+    path.write_bytes(CSV)
+    assert uploads.content_hash(path) is None
+    with open(path, 'rb') as stream:
+        assert uploads.content_hash(stream) is None
@@ -0,0 +1,138 @@
+import functools
+
+import pandas as pd
+import pytest
+
+from core import engine, schema, uploads, validation
+from core.scoring import evaluator_for, ground_truth_path
+
+COMPETITION = 'steel_plate_defect_prediction'
+
+
+@pytest.fixture
+def steel(tmp_path):
+    """(spec, ground truth, prediction frame, path to write it to)."""
+    spec = evaluator_for('evaluators', COMPETITION).SPEC
+    df_truth = engine.read_ground_truth(spec, ground_truth_path('competitions', COMPETITION))
+    return spec, df_truth, df_truth.reset_index(drop=True), tmp_path / 'prediction.csv'
+
+
+def write(frame, path):
+    frame.to_csv(path, index=False)
+    return path
+
+
+def read_inputs(spec, path):
+    return engine.validate_and_read_inputs(spec, ground_truth_path('competitions', COMPETITION), path)
+
+
+def with_value(frame, row, column, value):
+    frame = frame.astype({column: object})
+    frame.loc[row, column] = value
+    return frame
+
+
+def test_header_check(steel):
+    spec, df_truth, df_pred, path = steel
+    write(df_pred.drop(columns='Bumps'), path)
+    with pytest.raises(ValueError, match='missing required columns'):
+        engine.check_prediction_header(spec, df_truth, path)
+    # Extra columns are fine without strict_columns, and are not read.
+    write(df_pred.assign(extra='x'), path)
+    assert engine.check_prediction_header(spec, df_truth, path) == ['id'] + list(df_truth.columns[1:])
+
+    strict = evaluator_for('evaluators', 'pet_finder').SPEC
+    pet_truth = engine.read_ground_truth(strict, ground_truth_path('competitions', 'pet_finder'))
+    write(pet_truth.assign(extra=0), path)
+    with pytest.raises(ValueError, match='Column names do not match'):
+        engine.check_prediction_header(strict, pet_truth, path)
+
+
+def test_sample_check_names_the_line(steel):
+    spec, _, df_pred, path = steel
+    write(with_value(df_pred, 10, 'Stains', 1.5), path)
+    prediction_schema = spec.prediction_schema(list(df_pred.columns[1:]))
+    row_id = df_pred['id'].iloc[10]
+    with pytest.raises(ValueError, match=rf"Line 12 \(id {row_id}\): column 'Stains' has probability 1.5"):
+        validation.check_sample(path, prediction_schema, validation.PROBABILITY)
+
+    write(with_value(df_pred, 10, 'Stains', 'high'), path)
+    with pytest.raises(ValueError, match=rf"Line 12 \(id {row_id}\): column 'Stains' has 'high', which is not a number"):
+        validation.check_sample(path, prediction_schema, validation.PROBABILITY)
+
+    # Rows past the sample are left to the full parse.
+    write(with_value(df_pred, validation.SAMPLE_ROWS + 5, 'Stains', 1.5), path)
+    validation.check_sample(path, prediction_schema, validation.PROBABILITY)
+
+
+def test_cheap_stages_run_before_the_full_parse(steel):
+    spec, _, df_pred, path = steel
+    # A bad value in the sample is reported before the missing rows.
+    write(with_value(df_pred, 3, 'Bumps', -1.0).iloc[:-10], path)
+    with pytest.raises(ValueError, match="Line 5 .*'Bumps'"):
+        read_inputs(spec, path)
+    # A bad value past the sample is not, since the row count comes first.
+    write(with_value(df_pred, len(df_pred) - 20, 'Bumps', 'x').iloc[:-10], path)
+    with pytest.raises(ValueError, match='Ground Truth has 3844 rows, Prediction has 3834 rows'):
+        read_inputs(spec, path)
+
+
+@pytest.mark.parametrize('pyarrow', [True, False])
+@pytest.mark.parametrize('value, message', [
+    ('oops', "has 'oops', which is not a number"),
+    (2.0, 'has probability 2.0, outside'),
+    ('', 'has no value'),
+])
+def test_full_parse_names_the_bad_row(steel, monkeypatch, pyarrow, value, message):
+    if pyarrow and not schema.HAS_PYARROW:
+        pytest.skip('pyarrow is not installed')
+    monkeypatch.setattr(schema, 'HAS_PYARROW', pyarrow)
+    monkeypatch.setattr(validation, 'CHUNK_ROWS', 500)
+    spec, _, df_pred, path = steel
+    row = 2345
+    write(with_value(df_pred, row, 'Pastry', value), path)
+    with pytest.raises(ValueError, match=rf"Line {row + 2} \(id {df_pred['id'].iloc[row]}\): column 'Pastry' {message}"):
+        read_inputs(spec, path)
+
+
+def test_chunked_parse_numbers_lines_across_chunks(steel):
+    spec, _, df_pred, path = steel
+    prediction_schema = spec.prediction_schema(list(df_pred.columns[1:]))
+    write(with_value(df_pred, 777, 'Other_Faults', 'n/a?'), path)
+    chunks = validation.read_checked_chunks(path, 100, prediction_schema, validation.PROBABILITY)
+    with pytest.raises(ValueError, match=r"Line 779 .*'Other_Faults' has 'n/a\?'"):
+        list(chunks)
+
+
+@pytest.mark.parametrize('text, rows, exact', [
+    (b'', 0, True),
+    (b'id,a\n', 0, True),
+    (b'id,a\n1,2\n2,3\n', 2, True),
+    (b'id,a\n1,2\n2,3', 2, True),
+    (b'id,a\r\n1,2\r\n\r\n2,3\r\n', 2, True),
+    (b'id,a\n1,2\n\n\n2,3\n\n', 2, True),
+    (b'id,a\n1,"x\ny"\n2,3\n', 3, False),
+    (b'id,a\r1,2\r2,3\r', None, False),
+])
+def test_count_rows(tmp_path, monkeypatch, text, rows, exact):
+    path = tmp_path / 'prediction.csv'
+    path.write_bytes(text)
+    assert validation.count_rows(path) == (rows, exact)
+    # Line endings split across blocks are counted once.
+    monkeypatch.setattr(validation, 'iter_bytes', functools.partial(uploads.iter_bytes, block_size=1))
+    assert validation.count_rows(path) == (rows, exact)
+    if exact and text:
+        assert rows == len(pd.read_csv(path))
+
+
+def test_row_count_mismatch_is_found_without_parsing(steel, monkeypatch):
+    spec, df_truth, df_pred, path = steel
+    write(df_pred.iloc[:-1], path)
+
+    def parse(*args, **kwargs):
+        raise AssertionError('the body was parsed')
+    monkeypatch.setattr(validation, 'read_checked', parse)
+    with pytest.raises(ValueError, match=f'Ground Truth has {len(df_truth)} rows, Prediction has {len(df_truth) - 1} rows'):
+        read_inputs(spec, path)
+    # An upper bound from a quoted file only rejects too few rows.
+    validation.check_row_count(write(df_pred.assign(id=df_pred['id'].astype(str) + '"'), path), len(df_truth) - 5)